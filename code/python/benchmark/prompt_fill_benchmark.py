@@ -0,0 +1,96 @@
+"""
+Prompt filling microbenchmark.
+
+Fills the ranking prompt for 1,000 items, the way the ranking stage does for
+one query, and compares:
+  - str.replace:   the old fill_prompt, which re-scans the template with
+                   str.replace once per variable and resolves every variable
+                   from the handler on every call
+  - fill_prompt:   the compiled template, still bound to the handler per call
+  - bound prompt:  the template bound once per request, only the item
+                   description filled per item (what Ranking does)
+
+Run from the code/python directory:
+
+    python -m benchmark.prompt_fill_benchmark --items 1000 --repeat 5
+"""
+
+import argparse
+import json
+import time
+from types import SimpleNamespace
+
+import core.prompts as prompts
+from core.ranking import Ranking
+
+ITEM_VARIABLE = "item.description"
+
+
+def make_handler():
+    state = SimpleNamespace(is_decontextualization_done=lambda: True)
+    return SimpleNamespace(site="seriouseats", item_type="{http://schema.org/}Recipe", query="vegan chocolate cake",
+                           decontextualized_query="vegan chocolate cake without eggs or butter",
+                           prev_queries=["chocolate cake"], state=state)
+
+
+def make_descriptions(count):
+    return [json.dumps({"@type": "Recipe", "name": f"Recipe {i}", "recipeIngredient": ["flour", "cocoa", "sugar"] * 4,
+                        "description": "A rich, moist chocolate cake. " * 6}) for i in range(count)]
+
+
+def legacy_fill(prompt_str, handler, pr_dict):
+    """fill_prompt before templates were compiled."""
+    variables = set()
+    start = 0
+    while True:
+        start = prompt_str.find('{', start)
+        if start == -1:
+            break
+        end = prompt_str.find('}', start)
+        if end == -1:
+            break
+        variables.add(prompt_str[start+1:end].strip())
+        start = end + 1
+    for variable in variables:
+        value = pr_dict[variable] if variable in pr_dict else prompts.get_prompt_variable_value(variable, handler)
+        prompt_str = prompt_str.replace("{" + variable + "}", str(value))
+    return prompt_str
+
+
+def run(name, fill, descriptions, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for description in descriptions:
+            fill(description)
+        best = min(best, time.perf_counter() - start)
+    per_prompt_us = best / len(descriptions) * 1e6
+    print(f"{name:<14} {best * 1000:>10.2f} ms {per_prompt_us:>12.2f} us/prompt")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time filling ranking prompts")
+    parser.add_argument("--items", type=int, default=1000, help="Ranking prompts filled per run")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per variant; the best is reported")
+    args = parser.parse_args()
+
+    handler = make_handler()
+    template = Ranking.RANKING_PROMPT[0]
+    descriptions = make_descriptions(args.items)
+    assert legacy_fill(template, handler, {ITEM_VARIABLE: descriptions[0]}) == \
+        prompts.fill_prompt(template, handler, {ITEM_VARIABLE: descriptions[0]})
+
+    print(f"Filling {args.items} ranking prompts, best of {args.repeat}\n")
+    print(f"{'variant':<14} {'total':>13} {'per prompt':>15}")
+    baseline = run("str.replace", lambda d: legacy_fill(template, handler, {ITEM_VARIABLE: d}), descriptions, args.repeat)
+    compiled = run("fill_prompt", lambda d: prompts.fill_prompt(template, handler, {ITEM_VARIABLE: d}),
+                   descriptions, args.repeat)
+    bound_prompt = prompts.compile_prompt(template).bind(handler, [ITEM_VARIABLE])
+    bound = run("bound prompt", lambda d: bound_prompt.fill_with_prefix({ITEM_VARIABLE: d}, ITEM_VARIABLE),
+                descriptions, args.repeat)
+    print(f"\nSpeedup over str.replace: fill_prompt {baseline / compiled:.1f}x, bound prompt {baseline / bound:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
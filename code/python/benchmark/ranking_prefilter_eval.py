@@ -0,0 +1,100 @@
+"""
+Offline evaluation of the ranking prefilter.
+
+Replays queries recorded with ranking_prefilter.record_path (config_nlweb.yaml),
+in which every retrieved item was ranked by the LLM, and reports for each top_k
+how many LLM calls the prefilter would save and how many of the answers the user
+saw it would have kept. An answer counts as seen if it was among the
+NUM_RESULTS_TO_SEND best LLM scores above the ranking cutoff.
+
+For each site, the smallest top_k whose recall reaches --target is suggested as
+its site_top_k.
+
+Run from the code/python directory:
+
+    python -m benchmark.ranking_prefilter_eval data/ranking_prefilter_records.jsonl --k 10 20 30 40
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+
+from core.ranking import Ranking
+from core.ranking_prefilter import combine_scores
+
+SCORE_CUTOFF = 51
+
+
+def load_records(path: str) -> List[dict]:
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def relevant_items(items: List[dict], num_results: int) -> set:
+    """Positions of the items the LLM ranking would have shown."""
+    scored = [(item["llm_score"], i) for i, item in enumerate(items)
+              if item.get("llm_score") is not None and item["llm_score"] > SCORE_CUTOFF]
+    scored.sort(reverse=True)
+    return {i for _, i in scored[:num_results]}
+
+
+def evaluate(records: List[dict], ks: List[int], vector_weight: float, num_results: int) -> Dict[str, Dict[int, dict]]:
+    """Per site and top_k: mean recall of relevant items and fraction of LLM calls saved."""
+    totals = defaultdict(lambda: defaultdict(lambda: {"recall": 0.0, "saved": 0.0, "queries": 0}))
+    for record in records:
+        items = record["items"]
+        if not items:
+            continue
+        site = record["site"] if isinstance(record["site"], str) else ",".join(record["site"])
+        relevant = relevant_items(items, num_results)
+        scores = combine_scores([item["vector"] for item in items], [item["bm25"] for item in items], vector_weight)
+        order = np.argsort(-scores, kind="stable")
+        for k in ks:
+            kept = set(order[:k].tolist())
+            for key in (site, "(all)"):
+                row = totals[key][k]
+                row["recall"] += len(relevant & kept) / len(relevant) if relevant else 1.0
+                row["saved"] += 1.0 - min(k, len(items)) / len(items)
+                row["queries"] += 1
+    for rows in totals.values():
+        for row in rows.values():
+            row["recall"] /= row["queries"]
+            row["saved"] /= row["queries"]
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the ranking prefilter's top_k from recorded queries")
+    parser.add_argument("records", help="JSONL file written through ranking_prefilter.record_path")
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10, 15, 20, 30, 40], help="top_k values to try")
+    parser.add_argument("--vector-weight", type=float, default=0.7, help="Weight of the embedding signal")
+    parser.add_argument("--target", type=float, default=0.95, help="Recall a suggested top_k must reach")
+    args = parser.parse_args()
+
+    records = load_records(args.records)
+    ks = sorted(set(args.k))
+    totals = evaluate(records, ks, args.vector_weight, Ranking.NUM_RESULTS_TO_SEND)
+    print(f"{len(records)} recorded queries, vector_weight {args.vector_weight}\n")
+    print(f"{'site':<30} {'top_k':>6} {'queries':>8} {'recall':>8} {'calls saved':>12}")
+    suggestions = {}
+    for site in sorted(totals, key=lambda s: (s != "(all)", s)):
+        for k in ks:
+            row = totals[site][k]
+            print(f"{site:<30} {k:>6} {row['queries']:>8} {row['recall']:>8.1%} {row['saved']:>12.1%}")
+            if site not in suggestions and row["recall"] >= args.target:
+                suggestions[site] = k
+    print("\nSuggested site_top_k (smallest top_k reaching the target recall):")
+    for site in sorted(totals):
+        print(f"  {site}: {suggestions.get(site, 'none of the tried values')}")
+
+
+if __name__ == "__main__":
+    main()
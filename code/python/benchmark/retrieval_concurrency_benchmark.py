@@ -0,0 +1,110 @@
+"""
+Retrieval concurrency benchmark.
+
+Measures how VectorDBClient.search throughput scales with the number of
+concurrent queries issued against one shared client. The backends are local
+stand-ins that sleep for a fixed latency, so the numbers reflect the fan-out
+and locking overhead in core/retriever.py rather than any real database.
+
+Three modes are compared:
+  - serialized: every search holds a client-wide lock (the old behaviour)
+  - lock-free:  searches run concurrently
+  - limited:    searches run concurrently, capped per endpoint by max_concurrency
+
+Run from the code/python directory:
+
+    python benchmark/retrieval_concurrency_benchmark.py --latency-ms 50 --queries 64
+"""
+
+import argparse
+import asyncio
+import time
+
+from core.config import CONFIG, RetrievalProviderConfig
+from core.site_index import SiteRoutingIndex
+import core.retriever as retriever
+
+STANDIN_ENDPOINTS = ["standin_a", "standin_b"]
+
+
+class StandInBackend:
+    """Fake vector store that answers every search after a fixed delay."""
+
+    def __init__(self, name: str, latency: float):
+        self.name = name
+        self.latency = latency
+
+    async def get_sites(self, **kwargs):
+        return None
+
+    async def search(self, query, site, num_results=50, **kwargs):
+        await asyncio.sleep(self.latency)
+        return [[f"https://{self.name}.example/{query}/{i}", "{}", f"item {i}", site]
+                for i in range(min(num_results, 10))]
+
+    async def search_all_sites(self, query, num_results=50, **kwargs):
+        return await self.search(query, "all", num_results, **kwargs)
+
+
+def install_standins(latency: float, max_concurrency=None):
+    """Replace the configured endpoints with stand-in backends."""
+    CONFIG.retrieval_endpoints = {}
+    retriever._client_cache.clear()
+    retriever._endpoint_semaphores.clear()
+    retriever.clear_vector_db_clients()
+    retriever._site_index = SiteRoutingIndex()  # in-memory only, don't touch the real index file
+    for name in STANDIN_ENDPOINTS:
+        CONFIG.retrieval_endpoints[name] = RetrievalProviderConfig(
+            database_path="unused", db_type="qdrant", enabled=True,
+            max_concurrency=max_concurrency)
+        retriever._client_cache[f"qdrant_{name}"] = StandInBackend(name, latency)
+    CONFIG.write_endpoint = None
+
+
+async def run_queries(client, num_queries: int, concurrency: int, lock=None) -> float:
+    """Issue num_queries searches with at most concurrency in flight; return queries/sec."""
+    gate = asyncio.Semaphore(concurrency)
+    embedding = [0.0] * 8
+
+    async def one(i):
+        async with gate:
+            if lock is None:
+                await client.search(f"q{i}", "example", 10, query_embedding=embedding)
+            else:
+                async with lock:
+                    await client.search(f"q{i}", "example", 10, query_embedding=embedding)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(num_queries)))
+    return num_queries / (time.perf_counter() - start)
+
+
+async def main(args):
+    levels = [1, 2, 4, 8, 16, 32]
+    latency = args.latency_ms / 1000.0
+    rows = []
+    for concurrency in levels:
+        install_standins(latency)
+        client = retriever.get_vector_db_client()
+        serialized = await run_queries(client, args.queries, concurrency, lock=asyncio.Lock())
+        lock_free = await run_queries(client, args.queries, concurrency)
+
+        install_standins(latency, max_concurrency=args.max_concurrency)
+        client = retriever.get_vector_db_client()
+        limited = await run_queries(client, args.queries, concurrency)
+        rows.append((concurrency, serialized, lock_free, limited))
+
+    print(f"\nStand-in latency {args.latency_ms} ms, {len(STANDIN_ENDPOINTS)} endpoints, "
+          f"{args.queries} queries per level, limited mode max_concurrency={args.max_concurrency}")
+    print(f"{'concurrency':>11}  {'serialized q/s':>14}  {'lock-free q/s':>13}  {'limited q/s':>11}  {'speedup':>7}")
+    for concurrency, serialized, lock_free, limited in rows:
+        print(f"{concurrency:>11}  {serialized:>14.1f}  {lock_free:>13.1f}  {limited:>11.1f}  "
+              f"{lock_free / serialized:>6.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent VectorDBClient.search throughput")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Simulated backend latency per search")
+    parser.add_argument("--queries", type=int, default=64, help="Queries issued per concurrency level")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="Per-endpoint limit for the limited mode")
+    asyncio.run(main(parser.parse_args()))
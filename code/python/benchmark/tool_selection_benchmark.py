@@ -0,0 +1,147 @@
+"""
+Tool selection benchmark: per-tool fan-out vs. a single call.
+
+Runs every query through both ToolSelector modes against the configured LLM:
+  - per_tool:     one LLM call per tool, with early termination at score 90
+                  (what ToolSelector.do does by default)
+  - single_call:  one LLM call listing all the tools for the item type
+
+and reports, per mode, the wall-clock latency of selecting the tools for a
+query, the LLM calls and tokens it took, and how often the two modes pick the
+same tool. Tokens are estimated at 4 characters per token, from the prompt
+and answer structure sent and the JSON answer received. The LLM cache is
+bypassed so both modes make real calls.
+
+By default the queries are the <example>s in tools.xml, each labeled with the
+tool it is an example of, and accuracy against those labels is reported too.
+A file of queries (one per line, or "tool<TAB>query" to label them) can be
+given instead.
+
+Run from the code/python directory:
+
+    python -m benchmark.tool_selection_benchmark --item-type Recipe --repeat 3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from types import SimpleNamespace
+
+import core.router as router
+from core.config import CONFIG
+from core.llm import ask_llm
+from core.router import ToolSelector
+
+MODES = ["per_tool", "single_call"]
+
+
+def load_queries(path, tools):
+    """(query, expected tool name or None) pairs."""
+    if path is None:
+        return [(example, tool.name) for tool in tools for example in tool.examples]
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            label, _, query = line.partition("\t")
+            queries.append((query, label) if query else (label, None))
+    return queries
+
+
+def make_handler(query, item_type):
+    state = SimpleNamespace(start_precheck_step=lambda step: None, is_decontextualization_done=lambda: True)
+    return SimpleNamespace(site="all", item_type=item_type, query=query, decontextualized_query=query,
+                           prev_queries=[], state=state, query_params={})
+
+
+class UsageCounter:
+    """Wraps ask_llm to count calls and estimated tokens, with the LLM cache bypassed."""
+
+    def __init__(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    async def ask_llm(self, prompt, schema, *args, **kwargs):
+        kwargs["use_cache"] = False
+        # Counted before the call: per-tool calls cancelled by early termination are still paid for
+        self.calls += 1
+        self.input_tokens += (len(prompt) + len(json.dumps(schema))) // 4
+        response = await ask_llm(prompt, schema, *args, **kwargs)
+        self.output_tokens += len(json.dumps(response or {})) // 4
+        return response
+
+
+async def select(query, item_type, tools, mode):
+    """Top tool name (after the threshold and search fallback), elapsed seconds and usage of one selection."""
+    counter = UsageCounter()
+    router.ask_llm = counter.ask_llm
+    selector = ToolSelector(make_handler(query, item_type))
+    start = time.perf_counter()
+    if mode == "single_call":
+        results = await selector._evaluate_tools_in_one_call(query, tools)
+    else:
+        results = await selector._evaluate_tools_with_early_termination(query, tools, threshold=90)
+    elapsed = time.perf_counter() - start
+    results.sort(key=lambda r: r["score"], reverse=True)
+    selected = ToolSelector.select_tools(results)
+    return (selected[0]["tool"].name if selected else "search"), elapsed, counter
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+async def run(args):
+    router.init()
+    tools = ToolSelector(make_handler("", args.item_type)).get_tools_by_type(args.item_type)
+    queries = load_queries(args.queries, tools)
+    print(f"{len(queries)} queries, {len(tools)} tools for {args.item_type}: {[t.name for t in tools]}\n")
+
+    stats = {mode: {"latency": [], "calls": 0, "input": 0, "output": 0, "correct": 0} for mode in MODES}
+    agree = 0
+    for query, label in queries:
+        for _ in range(args.repeat):
+            picks = {}
+            for mode in MODES:
+                picks[mode], elapsed, counter = await select(query, args.item_type, tools, mode)
+                stats[mode]["latency"].append(elapsed)
+                stats[mode]["calls"] += counter.calls
+                stats[mode]["input"] += counter.input_tokens
+                stats[mode]["output"] += counter.output_tokens
+                stats[mode]["correct"] += int(picks[mode] == label)
+            agree += int(picks["per_tool"] == picks["single_call"])
+            if args.verbose:
+                print(f"  {query!r}: expected {label}, per_tool {picks['per_tool']}, single_call {picks['single_call']}")
+
+    runs = len(queries) * args.repeat
+    labeled = sum(1 for _, label in queries if label) * args.repeat
+    print(f"{'mode':<12} {'p50 ms':>8} {'p95 ms':>8} {'calls/q':>8} {'in tok/q':>9} {'out tok/q':>10} {'accuracy':>9}")
+    for mode in MODES:
+        s = stats[mode]
+        accuracy = f"{s['correct'] / labeled:.1%}" if labeled else "-"
+        print(f"{mode:<12} {statistics.median(s['latency']) * 1000:>8.0f} {percentile(s['latency'], 95) * 1000:>8.0f} "
+              f"{s['calls'] / runs:>8.1f} {s['input'] / runs:>9.0f} {s['output'] / runs:>10.0f} {accuracy:>9}")
+    print(f"\nSame top tool in both modes: {agree}/{runs} ({agree / runs:.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-tool and single-call tool selection")
+    parser.add_argument("--item-type", default="Recipe", help="Item type whose tools are scored")
+    parser.add_argument("--queries", default=None, help="File of queries, one per line, optionally 'tool<TAB>query'")
+    parser.add_argument("--repeat", type=int, default=1, help="Selections per query and mode")
+    parser.add_argument("--verbose", action="store_true", help="Print each query's picks")
+    args = parser.parse_args()
+    if not os.path.exists(os.path.join(CONFIG.config_directory, "tools.xml")):
+        parser.error(f"No tools.xml in {CONFIG.config_directory}")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
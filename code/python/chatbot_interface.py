@@ -4,6 +4,7 @@ import os
 import sys
 import asyncio
 import argparse
+from typing import Optional
 import httpx
 
 from mcp.server import Server
@@ -24,6 +25,23 @@ from mcp.types import (
 DEFAULT_SERVER_URL = "http://localhost:8000"
 DEFAULT_ENDPOINT = "/mcp"
 
+# One client for the life of the bridge, so requests reuse the connection to NLWeb.
+# core.http_pool is not used here: importing core loads the config, which prints
+# to stdout and would corrupt the stdio protocol stream.
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient()
+    return _http_client
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 async def forward_to_nlweb(function_name: str, arguments: Dict[str, Any], server_url: str, endpoint: str) -> Dict[str, Any]:
     """Forward a request to the NLWeb MCP endpoint"""
     nlweb_mcp_url = f"{server_url}{endpoint}"
@@ -39,22 +57,21 @@ async def forward_to_nlweb(function_name: str, arguments: Dict[str, Any], server
         # Print some debug info to stderr (won't interfere with stdio protocol)
         print(f"Forwarding to {nlweb_mcp_url}: {function_name}", file=sys.stderr)
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                nlweb_mcp_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                print(f"Error from server: {response.status_code} - {response.text}", file=sys.stderr)
-                return {
-                    "error": f"Server error: {response.status_code} - {response.text}"
-                }
-            
-            result = response.json()
-            return result
+        response = await get_http_client().post(
+            nlweb_mcp_url,
+            json=payload,
+            headers={"Content-Type": "application/json"},
+            timeout=30
+        )
+        
+        if response.status_code != 200:
+            print(f"Error from server: {response.status_code} - {response.text}", file=sys.stderr)
+            return {
+                "error": f"Server error: {response.status_code} - {response.text}"
+            }
+        
+        result = response.json()
+        return result
             
     except Exception as e:
         print(f"Request failed: {str(e)}", file=sys.stderr)
@@ -250,8 +267,11 @@ async def serve(server_url: str = DEFAULT_SERVER_URL, endpoint: str = DEFAULT_EN
 
     # Run the server
     options = server.create_initialization_options()
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(read_stream, write_stream, options, raise_exceptions=True)
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, options, raise_exceptions=True)
+    finally:
+        await close_http_client()
 
 # Main entry point when script is executed directly
 if __name__ == "__main__":
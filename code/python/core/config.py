@@ -35,6 +35,50 @@ class LLMProviderConfig:
     models: Optional[ModelConfig] = None
     endpoint: Optional[str] = None
     api_version: Optional[str] = None
+    rpm: Optional[int] = None  # Requests per minute allowed by the LLM scheduler
+    tpm: Optional[int] = None  # Tokens per minute allowed by the LLM scheduler
+
+@dataclass
+class LLMSchedulerConfig:
+    enabled: bool = True
+    max_concurrency: int = 0  # LLM calls in flight across all endpoints; 0 = unlimited
+    priorities: Dict[str, int] = field(default_factory=dict)  # Overrides of the call class priorities
+
+@dataclass
+class LLMTimeoutConfig:
+    default_timeout: float = 8  # Seconds, until a call has min_samples latency samples
+    percentile: float = 99  # Observed latency percentile the timeout is derived from
+    multiplier: float = 1.5  # Timeout = percentile latency * multiplier
+    min_timeout: float = 2
+    max_timeout: float = 30
+    min_samples: int = 20
+    retries: int = 0  # Further attempts on the fallback after its first one
+    fallback_endpoint: Optional[str] = None  # Endpoint for retries and hedges; None = neither
+    hedge_classes: List[str] = field(default_factory=lambda: ["decontextualize", "tool_routing"])
+    hedge_percentile: float = 95  # Latency after which a critical call is hedged
+
+@dataclass
+class LLMCacheConfig:
+    enabled: bool = False
+    memory_max_entries: int = 2048
+    disk_enabled: bool = True
+    disk_path: str = "data/llm_cache.sqlite"
+    disk_max_entries: int = 100000
+    ttl_seconds: int = 86400
+
+@dataclass
+class EmbeddingDedupConfig:
+    enabled: bool = True
+    path: str = "data/embedding_cache.sqlite"
+    max_entries: int = 1000000
+
+@dataclass
+class EmbeddingBatchConfig:
+    max_batch_size: int = 100  # Texts per provider request
+    max_batch_tokens: int = 8000  # Estimated tokens per provider request
+    concurrency: int = 4  # Provider requests in flight per batch_get_embeddings call
+    max_retries: int = 5  # Retries of a request rejected with a rate limit
+    retry_base_delay: float = 1.0  # Seconds; doubled on every retry
 
 @dataclass
 class EmbeddingProviderConfig:
@@ -43,6 +87,7 @@ class EmbeddingProviderConfig:
     api_version: Optional[str] = None
     model: Optional[str] = None
     config: Optional[Dict[str, Any]] = None
+    batch: EmbeddingBatchConfig = field(default_factory=EmbeddingBatchConfig)
 
 @dataclass
 class RetrievalProviderConfig:
@@ -56,6 +101,11 @@ class RetrievalProviderConfig:
     use_knn: Optional[bool] = None
     enabled: bool = False
     vector_type: Optional[Dict[str, Any]] = None
+    max_concurrency: Optional[int] = None  # Max in-flight searches against this endpoint
+    timeout: Optional[float] = None  # Search deadline in seconds, overrides endpoint_timeout
+    replica_of: Optional[str] = None  # Endpoint this one mirrors; replicas are hedged, not merged
+    ann_method: Optional[str] = None  # local_index: "ivf", "hnsw" or "exact"
+    ann_threshold: Optional[int] = None  # local_index: rows from which a site uses the approximate index
 @dataclass
 class SSLConfig:
     enabled: bool = False
@@ -83,6 +133,36 @@ class ServerConfig:
     logging: Optional[LoggingConfig] = None
     static: Optional[StaticConfig] = None
 
+@dataclass
+class HTTPPoolConfig:
+    max_connections: int = 100
+    max_connections_per_host: int = 20
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0  # seconds an idle connection is kept open
+    http2: bool = True  # used by httpx when the h2 package is installed
+    timeout: float = 30.0
+
+@dataclass
+class RankingPrefilterConfig:
+    enabled: bool = False
+    top_k: int = 30  # Items passed on to LLM ranking
+    site_top_k: Dict[str, int] = field(default_factory=dict)  # Per-site overrides of top_k
+    vector_weight: float = 0.7  # Weight of embedding similarity; BM25 gets the rest
+    embed_items: bool = False  # Embed items missing from the ingest embedding cache
+    record_path: Optional[str] = None  # JSONL of candidates and LLM scores for tuning top_k
+
+@dataclass
+class RankingEarlyStopConfig:
+    enabled: bool = True
+    min_score: int = 75  # Stop once enough answers to fill the result quota score at least this
+    max_in_flight: int = 0  # Ranking LLM calls running at once; 0 starts them all together
+
+@dataclass
+class ToolPreselectionConfig:
+    enabled: bool = False
+    top_k: int = 3  # Most similar tools sent to LLM scoring; search is always added
+    search_margin: float = 0.1  # Similarity lead at which search is chosen without LLM scoring
+
 @dataclass
 class NLWebConfig:
     sites: List[str]  # List of allowed sites
@@ -92,10 +172,16 @@ class NLWebConfig:
     chatbot_instructions: Dict[str, str] = field(default_factory=dict)  # Dictionary of chatbot instructions
     headers: Dict[str, str] = field(default_factory=dict)  # Dictionary of headers to include in responses
     tool_selection_enabled: bool = True  # Enable or disable tool selection
+    tool_selection_mode: str = "per_tool"  # "per_tool" (one LLM call per tool) or "single_call" (all tools in one call)
+    tool_preselection: ToolPreselectionConfig = field(default_factory=ToolPreselectionConfig)
     memory_enabled: bool = False  # Enable or disable memory functionality
     analyze_query_enabled: bool = False  # Enable or disable query analysis
     decontextualize_enabled: bool = True  # Enable or disable decontextualization
     required_info_enabled: bool = True  # Enable or disable required info checking
+    ranking_mode: str = "pointwise"  # "pointwise" (one LLM call per item) or "listwise" (batched)
+    ranking_batch_size: int = 10  # Items packed into one prompt in listwise mode
+    ranking_prefilter: RankingPrefilterConfig = field(default_factory=RankingPrefilterConfig)
+    ranking_early_stop: RankingEarlyStopConfig = field(default_factory=RankingEarlyStopConfig)
     api_keys: Dict[str, str] = field(default_factory=dict)  # API keys for external services
 
 @dataclass
@@ -261,15 +347,52 @@ class AppConfig:
                 api_endpoint = self._get_config_value(cfg.get("api_endpoint_env"))
                 api_version = self._get_config_value(cfg.get("api_version_env"))
                 llm_type = self._get_config_value(cfg.get("llm_type"))
+                rate_limits = cfg.get("rate_limits", {}) or {}
                 # Create the LLM provider config - no longer include embedding model
                 self.llm_endpoints[name] = LLMProviderConfig(
                     llm_type=llm_type,
                     api_key=api_key,
                     models=models,
                     endpoint=api_endpoint,
-                    api_version=api_version
+                    api_version=api_version,
+                    rpm=rate_limits.get("rpm"),
+                    tpm=rate_limits.get("tpm")
                 )
 
+            # Scheduling of LLM calls across requests
+            scheduler_data = data.get("scheduler", {}) or {}
+            self.llm_scheduler = LLMSchedulerConfig(
+                enabled=scheduler_data.get("enabled", True),
+                max_concurrency=scheduler_data.get("max_concurrency", 0),
+                priorities=scheduler_data.get("priorities", {}) or {}
+            )
+
+            # Adaptive timeouts, retries and hedging of LLM calls
+            timeout_data = data.get("timeouts", {}) or {}
+            self.llm_timeouts = LLMTimeoutConfig(
+                default_timeout=timeout_data.get("default_timeout", 8),
+                percentile=timeout_data.get("percentile", 99),
+                multiplier=timeout_data.get("multiplier", 1.5),
+                min_timeout=timeout_data.get("min_timeout", 2),
+                max_timeout=timeout_data.get("max_timeout", 30),
+                min_samples=timeout_data.get("min_samples", 20),
+                retries=timeout_data.get("retries", 0),
+                fallback_endpoint=timeout_data.get("fallback_endpoint"),
+                hedge_classes=timeout_data.get("hedge_classes", ["decontextualize", "tool_routing"]) or [],
+                hedge_percentile=timeout_data.get("hedge_percentile", 95)
+            )
+
+            # LLM response cache settings
+            cache_data = data.get("cache", {}) or {}
+            self.llm_cache = LLMCacheConfig(
+                enabled=cache_data.get("enabled", False),
+                memory_max_entries=cache_data.get("memory_max_entries", 2048),
+                disk_enabled=cache_data.get("disk_enabled", True),
+                disk_path=self._resolve_path(cache_data.get("disk_path", "data/llm_cache.sqlite")),
+                disk_max_entries=cache_data.get("disk_max_entries", 100000),
+                ttl_seconds=cache_data.get("ttl_seconds", 86400)
+            )
+
     def load_embedding_config(self, path: str = "config_embedding.yaml"):
         """Load embedding model configuration."""
         # Build the full path to the config file using the config directory
@@ -288,6 +411,17 @@ class AppConfig:
         
         self.preferred_embedding_provider: str = data["preferred_provider"]
         self.embedding_providers: Dict[str, EmbeddingProviderConfig] = {}
+        # Number of query embeddings kept in the process-wide LRU (0 disables it)
+        self.embedding_cache_size: int = data.get("query_cache_size", 1024)
+        # Batching defaults for bulk embedding; providers may override any field
+        default_batch = data.get("batch", {}) or {}
+        # Content-hash -> vector cache consulted by the data loader before embedding
+        dedup_data = data.get("ingest_cache", {}) or {}
+        self.embedding_dedup = EmbeddingDedupConfig(
+            enabled=dedup_data.get("enabled", True),
+            path=self._resolve_path(dedup_data.get("path", "data/embedding_cache.sqlite")),
+            max_entries=dedup_data.get("max_entries", 1000000)
+        )
 
         for name, cfg in data.get("providers", {}).items():
             # Extract configuration values from the YAML
@@ -296,6 +430,7 @@ class AppConfig:
             api_version = self._get_config_value(cfg.get("api_version_env"))
             model = self._get_config_value(cfg.get("model"))
             config = self._get_config_value(cfg.get("config"))
+            batch = {**default_batch, **(cfg.get("batch") or {})}
 
             # Create the embedding provider config
             self.embedding_providers[name] = EmbeddingProviderConfig(
@@ -303,7 +438,9 @@ class AppConfig:
                 endpoint=api_endpoint,
                 api_version=api_version,
                 model=model,
-                config=config
+                config=config,
+                batch=EmbeddingBatchConfig(**{k: v for k, v in batch.items()
+                                              if k in EmbeddingBatchConfig.__dataclass_fields__})
             )
 
     def load_retrieval_config(self, path: str = "config_retrieval.yaml"):
@@ -326,6 +463,22 @@ class AppConfig:
         
         # Get the write endpoint for database modifications
         self.write_endpoint: str = data.get("write_endpoint", None)
+        
+        # How long an endpoint's site list is trusted before it is reconciled in the background
+        self.sites_cache_ttl: int = data.get("sites_cache_ttl", 300)
+        
+        # Default search deadline per endpoint; a backend that misses it is left out of the results
+        self.retrieval_endpoint_timeout: Optional[float] = data.get("endpoint_timeout")
+        
+        # Overall search deadline; once at least one endpoint has answered, results are
+        # returned when it passes even if other endpoints are still running
+        self.retrieval_deadline: Optional[float] = data.get("retrieval_deadline")
+        
+        # Latency percentile after which a search is hedged to a replica endpoint
+        self.hedge_percentile: float = data.get("hedge_percentile", 95)
+        
+        # Where the endpoint -> sites routing index is persisted between restarts
+        self.site_index_path: str = self._resolve_path(data.get("site_index_path", "data/site_index.json"))
 
         # Changed from providers to endpoints
         for name, cfg in data.get("endpoints", {}).items():
@@ -340,7 +493,12 @@ class AppConfig:
                 db_type=self._get_config_value(cfg.get("db_type")),  # Add db_type
                 enabled=cfg.get("enabled", False),  # Add enabled field
                 use_knn=cfg.get("use_knn"),
-                vector_type=cfg.get("vector_type")
+                vector_type=cfg.get("vector_type"),
+                max_concurrency=cfg.get("max_concurrency"),
+                timeout=cfg.get("timeout"),
+                replica_of=cfg.get("replica_of"),
+                ann_method=cfg.get("ann_method"),
+                ann_threshold=cfg.get("ann_threshold")
             )
     
     def load_webserver_config(self, path: str = "config_webserver.yaml"):
@@ -408,6 +566,17 @@ class AppConfig:
             logging=logging_config,
             static=static_config
         )
+        
+        # Shared outbound HTTP connection pool (see core/http_pool.py)
+        pool_data = data.get("http_pool", {}) or {}
+        self.http_pool = HTTPPoolConfig(
+            max_connections=pool_data.get("max_connections", 100),
+            max_connections_per_host=pool_data.get("max_connections_per_host", 20),
+            max_keepalive_connections=pool_data.get("max_keepalive_connections", 20),
+            keepalive_expiry=pool_data.get("keepalive_expiry", 30.0),
+            http2=pool_data.get("http2", True),
+            timeout=pool_data.get("timeout", 30.0)
+        )
 
     def load_nlweb_config(self, path: str = "config_nlweb.yaml"):
         """Load Natural Language Web configuration."""
@@ -457,6 +626,15 @@ class AppConfig:
 
         # Load tool selection enabled flag
         tool_selection_enabled = self._get_config_value(data.get("tool_selection_enabled"), True)
+        tool_selection_mode = self._get_config_value(data.get("tool_selection_mode"), "per_tool")
+
+        # Load embedding-based preselection of the tools scored by the LLM
+        preselection_data = data.get("tool_preselection", {}) or {}
+        tool_preselection = ToolPreselectionConfig(
+            enabled=preselection_data.get("enabled", False),
+            top_k=preselection_data.get("top_k", 3),
+            search_margin=preselection_data.get("search_margin", 0.1)
+        )
         
         # Load memory enabled flag
         memory_enabled = self._get_config_value(data.get("memory_enabled"), False)
@@ -470,6 +648,30 @@ class AppConfig:
         # Load required info enabled flag
         required_info_enabled = self._get_config_value(data.get("required_info_enabled"), True)
         
+        # Load ranking mode and listwise batch size
+        ranking_mode = self._get_config_value(data.get("ranking_mode"), "pointwise")
+        ranking_batch_size = self._get_config_value(data.get("ranking_batch_size"), 10)
+
+        # Load the local prefilter that runs before LLM ranking
+        prefilter_data = data.get("ranking_prefilter", {}) or {}
+        record_path = prefilter_data.get("record_path")
+        ranking_prefilter = RankingPrefilterConfig(
+            enabled=prefilter_data.get("enabled", False),
+            top_k=prefilter_data.get("top_k", 30),
+            site_top_k=prefilter_data.get("site_top_k", {}) or {},
+            vector_weight=prefilter_data.get("vector_weight", 0.7),
+            embed_items=prefilter_data.get("embed_items", False),
+            record_path=self._resolve_path(record_path) if record_path else None
+        )
+
+        # Load when ranking stops early
+        early_stop_data = data.get("ranking_early_stop", {}) or {}
+        ranking_early_stop = RankingEarlyStopConfig(
+            enabled=early_stop_data.get("enabled", True),
+            min_score=early_stop_data.get("min_score", 75),
+            max_in_flight=early_stop_data.get("max_in_flight", 0)
+        )
+        
         # Load headers from config
         headers = data.get("headers", {})
         
@@ -500,10 +702,16 @@ class AppConfig:
             chatbot_instructions=chatbot_instructions,
             headers=headers,
             tool_selection_enabled=tool_selection_enabled,
+            tool_selection_mode=tool_selection_mode,
+            tool_preselection=tool_preselection,
             memory_enabled=memory_enabled,
             analyze_query_enabled=analyze_query_enabled,
             decontextualize_enabled=decontextualize_enabled,
             required_info_enabled=required_info_enabled,
+            ranking_mode=ranking_mode,
+            ranking_batch_size=ranking_batch_size,
+            ranking_prefilter=ranking_prefilter,
+            ranking_early_stop=ranking_early_stop,
             api_keys=api_keys
         )
     
@@ -613,6 +821,18 @@ class AppConfig:
         """Check if required info checking is enabled."""
         return self.nlweb.required_info_enabled if hasattr(self, 'nlweb') else True
     
+    def is_single_call_tool_selection_enabled(self) -> bool:
+        """Check if tool selection scores all tools with one LLM call."""
+        return hasattr(self, 'nlweb') and str(self.nlweb.tool_selection_mode).lower() == "single_call"
+    
+    def is_listwise_ranking_enabled(self) -> bool:
+        """Check if ranking packs several items into one LLM call."""
+        return hasattr(self, 'nlweb') and str(self.nlweb.ranking_mode).lower() == "listwise"
+    
+    def get_ranking_batch_size(self) -> int:
+        """Get the number of items ranked per LLM call in listwise mode."""
+        return max(1, int(self.nlweb.ranking_batch_size)) if hasattr(self, 'nlweb') else 10
+    
     def load_sites_config(self, path: str = "sites.xml"):
         """Load site configurations from XML file."""
         # Build the full path to the config file using the config directory
@@ -8,11 +8,14 @@ WARNING: This code is under development and may undergo changes in future releas
 Backwards compatibility is not guaranteed at this time.
 """
 
-from typing import Optional, List
+from typing import Awaitable, Callable, Optional, List
+from array import array
+from collections import OrderedDict
 import asyncio
+import random
 import threading
 
-from core.config import CONFIG
+from core.config import CONFIG, EmbeddingBatchConfig
 from misc.logger.logging_config_helper import get_configured_logger, LogLevel
 
 logger = get_configured_logger("embedding_wrapper")
@@ -26,6 +29,15 @@ _provider_locks = {
     "elasticsearch": threading.Lock()
 }
 
+# Process-wide LRU of query embeddings keyed by (provider, model, text).
+# Vectors are stored as packed doubles to keep the memory footprint small.
+_query_embedding_cache: "OrderedDict[tuple, array]" = OrderedDict()
+_query_embedding_cache_size = getattr(CONFIG, "embedding_cache_size", 1024)
+_embedding_cache_stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+# In-flight embedding requests, so identical concurrent queries share one call
+_inflight_embeddings = {}
+
 async def get_embedding(
     text: str,
     provider: Optional[str] = None,
@@ -85,6 +97,49 @@ async def get_embedding(
     
     logger.debug(f"Using embedding model: {model_id}")
 
+    cache_key = (provider, model_id, text)
+    cached = _query_embedding_cache.get(cache_key)
+    if cached is not None:
+        _query_embedding_cache.move_to_end(cache_key)
+        _embedding_cache_stats["hits"] += 1
+        logger.debug("Query embedding cache hit")
+        return list(cached)
+
+    # Single-flight: concurrent requests for the same text share one provider call
+    inflight = _inflight_embeddings.get(cache_key)
+    if inflight is not None:
+        _embedding_cache_stats["coalesced"] += 1
+        logger.debug("Joining in-flight embedding request")
+        return list(await asyncio.shield(inflight))
+
+    _embedding_cache_stats["misses"] += 1
+    task = asyncio.ensure_future(_compute_embedding(text, provider, model_id, timeout))
+    _inflight_embeddings[cache_key] = task
+    try:
+        result = await asyncio.shield(task)
+    finally:
+        if _inflight_embeddings.get(cache_key) is task:
+            del _inflight_embeddings[cache_key]
+
+    if _query_embedding_cache_size > 0:
+        _query_embedding_cache[cache_key] = array("d", result)
+        while len(_query_embedding_cache) > _query_embedding_cache_size:
+            _query_embedding_cache.popitem(last=False)
+    return list(result)
+
+
+def get_embedding_cache_stats() -> dict:
+    """Return counters for the query embedding cache."""
+    return {
+        "entries": len(_query_embedding_cache),
+        "max_entries": _query_embedding_cache_size,
+        "in_flight": len(_inflight_embeddings),
+        **_embedding_cache_stats
+    }
+
+
+async def _compute_embedding(text: str, provider: str, model_id: str, timeout: int) -> List[float]:
+    """Dispatch a single embedding request to the provider, bypassing the cache."""
     try:
         # Use a timeout wrapper for all embedding calls
         if provider == "openai":
@@ -184,6 +239,87 @@ async def get_embedding(
         )
         raise
 
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token), enough to size requests."""
+    return len(text) // 4 + 1
+
+
+def _plan_batches(texts: List[str], max_batch_size: int, max_batch_tokens: int) -> List[List[int]]:
+    """
+    Pack text indices, in order, into batches of at most max_batch_size texts and
+    max_batch_tokens estimated tokens. A text larger than the token budget gets a
+    batch of its own.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for i, text in enumerate(texts):
+        tokens = _estimate_tokens(text)
+        if current and (len(current) >= max_batch_size or current_tokens + tokens > max_batch_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    if getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429:
+        return True
+    message = str(error)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message or "rate limit" in message.lower()
+
+
+async def _embed_in_batches(
+    texts: List[str],
+    embed_batch: Callable[[List[str]], Awaitable[List[List[float]]]],
+    batch_config: EmbeddingBatchConfig,
+    timeout: float,
+    provider: str
+) -> List[List[float]]:
+    """
+    Embed texts with a provider batch call, splitting them into token-sized
+    requests that run concurrently (bounded by batch_config.concurrency).
+
+    Each request gets its own timeout. Requests rejected with a rate limit are
+    retried with exponential backoff and jitter; other errors propagate.
+    """
+    batches = _plan_batches(texts, max(1, batch_config.max_batch_size), max(1, batch_config.max_batch_tokens))
+    results: List[Optional[List[float]]] = [None] * len(texts)
+    semaphore = asyncio.Semaphore(max(1, batch_config.concurrency))
+    logger.debug(f"Embedding {len(texts)} texts with {provider} in {len(batches)} requests")
+
+    async def run_batch(indices: List[int]) -> None:
+        batch_texts = [texts[i] for i in indices]
+        attempt = 0
+        while True:
+            async with semaphore:
+                try:
+                    embeddings = await asyncio.wait_for(embed_batch(batch_texts), timeout=timeout)
+                    break
+                except Exception as e:
+                    if not _is_rate_limit_error(e) or attempt >= batch_config.max_retries:
+                        raise
+            # Back off outside the semaphore so other requests can use the slot
+            delay = batch_config.retry_base_delay * (2 ** attempt) * (1 + random.random() * 0.25)
+            attempt += 1
+            logger.warning(f"{provider} embedding rate limited, retry {attempt}/{batch_config.max_retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        if len(embeddings) != len(indices):
+            raise ValueError(f"{provider} returned {len(embeddings)} embeddings for {len(indices)} texts")
+        for i, embedding in zip(indices, embeddings):
+            results[i] = embedding
+
+    tasks = [asyncio.ensure_future(run_batch(indices)) for indices in batches]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return results
+
 async def batch_get_embeddings(
     texts: List[str],
     provider: Optional[str] = None,
@@ -269,23 +405,28 @@ async def batch_get_embeddings(
             return result
             
         if provider == "gemini":
-            # Gemini might not have a native batch API, so process one by one
-            logger.debug("Getting Gemini batch embeddings (sequential)")
+            # Gemini's embed_content takes a list of texts; send them in concurrent sub-batches
+            logger.debug("Getting Gemini batch embeddings")
             from embedding_providers.gemini_embedding import get_gemini_batch_embeddings
-            # Process texts one by one with individual timeouts
-            result = await asyncio.wait_for(
-                get_gemini_batch_embeddings(texts, model=model_id),
-                timeout=30  # Individual timeout per text
+            result = await _embed_in_batches(
+                texts,
+                lambda batch: get_gemini_batch_embeddings(batch, model=model_id),
+                provider_config.batch,
+                timeout,
+                provider
             )
             logger.debug(f"Gemini batch embeddings received, count: {len(result)}")
             return result
-        
+
         if provider == "ollama":
             logger.debug("Getting Ollama batch embeddings")
             from embedding_providers.ollama_embedding import get_ollama_batch_embeddings
-            result = await asyncio.wait_for(
-                get_ollama_batch_embeddings(texts, model=model_id),
-                timeout=timeout*5  # Ollama may take longer for batch processing
+            result = await _embed_in_batches(
+                texts,
+                lambda batch: get_ollama_batch_embeddings(batch, model=model_id),
+                provider_config.batch,
+                timeout * 5,  # Ollama may take longer for batch processing
+                provider
             )
             logger.debug(f"Ollama batch embeddings received, count: {len(result)}")
             return result
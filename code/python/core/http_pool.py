@@ -0,0 +1,266 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Shared outbound HTTP connection pool.
+
+Retrieval providers and the MCP forwarder used to open a new httpx.AsyncClient or
+aiohttp.ClientSession per call, paying a TCP + TLS handshake on every query. This
+module keeps one keep-alive pool per event loop for each library:
+
+- get_http_client() returns a shared httpx client (HTTP/2 when the h2 package is
+  installed) wrapped with per-host concurrency limits and request metrics.
+- get_aiohttp_session() returns a shared aiohttp session whose connector enforces
+  the same limits and counts new versus reused connections.
+
+The aiohttp server opens the pool on startup and closes it on cleanup; other
+processes (data loading, tests) create it lazily on first use.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import asyncio
+import importlib.util
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from core.config import CONFIG, HTTPPoolConfig
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("http_pool")
+
+_httpx_client: Optional["PooledHTTPClient"] = None
+_httpx_loop: Optional[asyncio.AbstractEventLoop] = None
+_aiohttp_session = None
+_aiohttp_loop: Optional[asyncio.AbstractEventLoop] = None
+
+_metrics = {
+    "clients_created": 0,
+    "requests": 0,
+    "errors": 0,
+    "in_flight": 0,
+    "max_in_flight": 0,
+    "host_wait_seconds": 0.0,
+    "connections_created": 0,
+    "connections_reused": 0,
+}
+_requests_per_host: Dict[str, int] = {}
+
+
+def _pool_config() -> HTTPPoolConfig:
+    return getattr(CONFIG, "http_pool", None) or HTTPPoolConfig()
+
+
+def _request_started(host: str) -> None:
+    _metrics["requests"] += 1
+    _metrics["in_flight"] += 1
+    _metrics["max_in_flight"] = max(_metrics["max_in_flight"], _metrics["in_flight"])
+    _requests_per_host[host] = _requests_per_host.get(host, 0) + 1
+
+
+def _request_finished(failed: bool) -> None:
+    _metrics["in_flight"] -= 1
+    if failed:
+        _metrics["errors"] += 1
+
+
+class PooledHTTPClient:
+    """
+    Facade over a shared httpx.AsyncClient with the same request methods.
+
+    Requests to one host are capped at max_connections_per_host. Using the facade as
+    an async context manager borrows the shared client; leaving the block does not
+    close it, so `async with get_http_client() as client:` is a drop-in replacement
+    for `async with httpx.AsyncClient() as client:`.
+    """
+
+    def __init__(self, client, per_host_limit: int):
+        self._client = client
+        self._per_host_limit = max(1, per_host_limit)
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._host_semaphores[host] = asyncio.Semaphore(self._per_host_limit)
+        return semaphore
+
+    async def request(self, method: str, url: str, **kwargs):
+        host = urlsplit(str(url)).netloc
+        wait_start = time.perf_counter()
+        async with self._host_semaphore(host):
+            _metrics["host_wait_seconds"] += time.perf_counter() - wait_start
+            _request_started(host)
+            failed = True
+            try:
+                response = await self._client.request(method, url, **kwargs)
+                failed = False
+                return response
+            finally:
+                _request_finished(failed)
+
+    async def get(self, url: str, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def head(self, url: str, **kwargs):
+        return await self.request("HEAD", url, **kwargs)
+
+    async def post(self, url: str, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url: str, **kwargs):
+        return await self.request("PUT", url, **kwargs)
+
+    async def patch(self, url: str, **kwargs):
+        return await self.request("PATCH", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs):
+        return await self.request("DELETE", url, **kwargs)
+
+    async def __aenter__(self) -> "PooledHTTPClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
+
+    def open_connections(self) -> Optional[int]:
+        # httpx has no public API for this; read the transport's pool if it is there
+        try:
+            return len(self._client._transport._pool.connections)
+        except Exception:
+            return None
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+def _current_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def get_http_client() -> PooledHTTPClient:
+    """
+    Return the shared httpx client for the running event loop, creating it on first use.
+    A client is bound to the loop it was created on, so a new loop gets a new client.
+    """
+    global _httpx_client, _httpx_loop
+    loop = _current_loop()
+    if _httpx_client is not None and _httpx_loop is loop:
+        return _httpx_client
+
+    import httpx
+
+    config = _pool_config()
+    http2 = config.http2 and importlib.util.find_spec("h2") is not None
+    if config.http2 and not http2:
+        logger.info("h2 package not installed, shared HTTP client will use HTTP/1.1")
+    client = httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        ),
+        timeout=config.timeout,
+    )
+    _httpx_client = PooledHTTPClient(client, config.max_connections_per_host)
+    _httpx_loop = loop
+    _metrics["clients_created"] += 1
+    logger.info(f"Created shared HTTP client (http2={http2}, max_connections={config.max_connections})")
+    return _httpx_client
+
+
+def _aiohttp_trace_config():
+    import aiohttp
+
+    async def on_request_start(session, ctx, params):
+        _request_started(params.url.host or "")
+
+    async def on_request_end(session, ctx, params):
+        _request_finished(failed=False)
+
+    async def on_request_exception(session, ctx, params):
+        _request_finished(failed=True)
+
+    async def on_connection_create_end(session, ctx, params):
+        _metrics["connections_created"] += 1
+
+    async def on_connection_reuseconn(session, ctx, params):
+        _metrics["connections_reused"] += 1
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    return trace_config
+
+
+def get_aiohttp_session():
+    """Return the shared aiohttp session for the running event loop, creating it on first use."""
+    global _aiohttp_session, _aiohttp_loop
+    loop = _current_loop()
+    if _aiohttp_session is not None and not _aiohttp_session.closed and _aiohttp_loop is loop:
+        return _aiohttp_session
+
+    import aiohttp
+
+    config = _pool_config()
+    connector = aiohttp.TCPConnector(
+        limit=config.max_connections,
+        limit_per_host=config.max_connections_per_host,
+        keepalive_timeout=config.keepalive_expiry,
+        ttl_dns_cache=300,
+    )
+    _aiohttp_session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=config.timeout),
+        trace_configs=[_aiohttp_trace_config()],
+    )
+    _aiohttp_loop = loop
+    _metrics["clients_created"] += 1
+    return _aiohttp_session
+
+
+async def close_http_pool() -> None:
+    """Close the shared clients. Safe to call when they were never created."""
+    global _httpx_client, _httpx_loop, _aiohttp_session, _aiohttp_loop
+    if _httpx_client is not None:
+        try:
+            await _httpx_client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing shared HTTP client: {e}")
+    if _aiohttp_session is not None and not _aiohttp_session.closed:
+        try:
+            await _aiohttp_session.close()
+        except Exception as e:
+            logger.warning(f"Error closing shared aiohttp session: {e}")
+    _httpx_client = _httpx_loop = None
+    _aiohttp_session = _aiohttp_loop = None
+
+
+def get_http_pool_stats() -> Dict[str, Any]:
+    """Pool counters for the metrics endpoint."""
+    config = _pool_config()
+    stats: Dict[str, Any] = dict(_metrics)
+    stats["host_wait_seconds"] = round(stats["host_wait_seconds"], 3)
+    stats["requests_per_host"] = dict(_requests_per_host)
+    stats["limits"] = {
+        "max_connections": config.max_connections,
+        "max_connections_per_host": config.max_connections_per_host,
+        "keepalive_expiry": config.keepalive_expiry,
+    }
+    if _httpx_client is not None:
+        stats["httpx_open_connections"] = _httpx_client.open_connections()
+    if _aiohttp_session is not None and not _aiohttp_session.closed:
+        try:
+            stats["aiohttp_open_connections"] = sum(len(c) for c in _aiohttp_session.connector._conns.values())
+        except Exception:
+            stats["aiohttp_open_connections"] = None
+    return stats
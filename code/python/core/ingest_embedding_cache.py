@@ -0,0 +1,97 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Content-hash -> vector cache for ingestion.
+
+The data loader consults this cache before calling batch_get_embeddings, so
+re-ingesting a site only embeds documents whose text changed. Vectors are keyed
+by a hash of (provider, model, text) and stored as float32 blobs in SQLite, which
+keeps them across runs and lets several loader processes share one file. The
+ranking prefilter reads the same file to score retrieved items by their text.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import asyncio
+import hashlib
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from core.sqlite_store import SQLiteLRUStore
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("ingest_embedding_cache")
+
+
+def content_key(provider: str, model: str, text: str) -> str:
+    return hashlib.sha256(f"{provider}\0{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingDedupCache:
+    """
+    Persistent vector cache. Blocking database work runs in a worker thread, and
+    least recently used entries are pruned beyond max_entries.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1000000):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._store = SQLiteLRUStore(path, "embedding_cache", {"vector": "BLOB NOT NULL"}, max_entries)
+
+    def _get_many_blocking(self, keys: List[str]) -> Dict[str, List[float]]:
+        rows = self._store.get_many(keys)
+        return {key: np.frombuffer(blob, dtype=np.float32).tolist() for key, (blob,) in rows.items()}
+
+    def _put_many_blocking(self, items: Dict[str, List[float]]) -> None:
+        self._store.put_many({key: (np.asarray(vector, dtype=np.float32).tobytes(),) for key, vector in items.items()})
+
+    async def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        try:
+            return await asyncio.to_thread(self._get_many_blocking, keys)
+        except Exception as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+            return {}
+
+    async def put_many(self, items: Dict[str, List[float]]) -> None:
+        try:
+            await asyncio.to_thread(self._put_many_blocking, items)
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    async def embed(
+        self,
+        texts: List[str],
+        embed_batch: Callable[[List[str]], Awaitable[List[List[float]]]],
+        provider: str,
+        model: Optional[str],
+    ) -> List[List[float]]:
+        """
+        Return one embedding per text, calling embed_batch only for texts that are
+        not cached. Identical texts within the batch are embedded once.
+        """
+        keys = [content_key(provider, model or "", text) for text in texts]
+        vectors = await self.get_many(list(set(keys)))
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in vectors:
+                self.hits += 1
+            else:
+                self.misses += 1
+                missing.setdefault(key, text)
+
+        if missing:
+            computed = await embed_batch(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), computed))
+            vectors.update(new_vectors)
+            await self.put_many(new_vectors)
+        return [vectors[key] for key in keys]
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        self._store.close()
@@ -9,12 +9,17 @@ Backwards compatibility is not guaranteed at this time.
 
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from core.config import CONFIG
 import asyncio
+import copy
 import threading
 import subprocess
 import sys
+import time
+from core.llm_cache import LLMCache, MemoryLRUCache, SQLiteCache, TieredLLMCache, make_cache_key
+from core.llm_scheduler import LLMScheduler, estimate_tokens
+from core.utils.latency import LatencyTracker
 
 
 from misc.logger.logging_config_helper import get_configured_logger, LogLevel
@@ -23,6 +28,79 @@ logger = get_configured_logger("llm_wrapper")
 # Cache for loaded providers
 _loaded_providers = {}
 
+# LLM response cache, built lazily from CONFIG.llm_cache
+_llm_cache: Optional[LLMCache] = None
+_llm_cache_initialized = False
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Return the process-wide LLM response cache, or None if caching is disabled."""
+    global _llm_cache, _llm_cache_initialized
+    if _llm_cache_initialized:
+        return _llm_cache
+    _llm_cache_initialized = True
+    cache_config = getattr(CONFIG, "llm_cache", None)
+    if not cache_config or not cache_config.enabled:
+        return None
+    memory = MemoryLRUCache(cache_config.memory_max_entries, cache_config.ttl_seconds)
+    disk = None
+    if cache_config.disk_enabled:
+        try:
+            disk = SQLiteCache(cache_config.disk_path, cache_config.disk_max_entries, cache_config.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Failed to open LLM disk cache at {cache_config.disk_path}, using memory only: {e}")
+    _llm_cache = TieredLLMCache(memory, disk)
+    logger.info(f"LLM response cache enabled (disk: {disk is not None})")
+    return _llm_cache
+
+def set_llm_cache(cache: Optional[LLMCache]):
+    """Replace the LLM response cache, e.g. with a shared or test implementation. None disables caching."""
+    global _llm_cache, _llm_cache_initialized
+    if _llm_cache is not None and _llm_cache is not cache:
+        _llm_cache.close()
+    _llm_cache = cache
+    _llm_cache_initialized = True
+
+def get_llm_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss counters for the LLM response cache."""
+    cache = get_llm_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+# LLM call latency per (endpoint, model, prompt name), used for adaptive timeouts and hedging
+_llm_latency = LatencyTracker()
+
+# Process-wide LLM call scheduler, built lazily from CONFIG.llm_scheduler
+_llm_scheduler: Optional[LLMScheduler] = None
+_llm_scheduler_initialized = False
+
+def get_llm_scheduler() -> Optional[LLMScheduler]:
+    """Return the process-wide LLM scheduler, or None if scheduling is disabled."""
+    global _llm_scheduler, _llm_scheduler_initialized
+    if _llm_scheduler_initialized:
+        return _llm_scheduler
+    _llm_scheduler_initialized = True
+    scheduler_config = getattr(CONFIG, "llm_scheduler", None)
+    if not scheduler_config or not scheduler_config.enabled:
+        return None
+    limits = {name: (cfg.rpm, cfg.tpm) for name, cfg in CONFIG.llm_endpoints.items()}
+    _llm_scheduler = LLMScheduler(limits, scheduler_config.max_concurrency)
+    _llm_scheduler.priorities.update(scheduler_config.priorities)
+    return _llm_scheduler
+
+def set_llm_scheduler(scheduler: Optional[LLMScheduler]):
+    """Replace the LLM scheduler, e.g. in tests. None disables scheduling."""
+    global _llm_scheduler, _llm_scheduler_initialized
+    _llm_scheduler = scheduler
+    _llm_scheduler_initialized = True
+
+def get_llm_scheduler_stats() -> Dict[str, Any]:
+    """Return queue depth and in-flight counters of the LLM scheduler."""
+    scheduler = get_llm_scheduler()
+    if scheduler is None:
+        return {"enabled": False}
+    return {"enabled": True, **scheduler.stats()}
+
 def init():
     """Initialize LLM providers based on configuration."""
     # Get all configured LLM endpoints
@@ -154,33 +232,157 @@ def _get_provider(llm_type: str):
         logger.error(f"Failed to import provider for {llm_type}: {e}")
         raise ValueError(f"Failed to load provider for {llm_type}: {e}")
 
+def _call_key(provider_name: str, model_id: str, prompt_name: Optional[str]) -> tuple:
+    return (provider_name, model_id, prompt_name or "unnamed")
+
+def _call_timeout(key: tuple) -> float:
+    """Timeout for a call: a multiple of its observed latency percentile, within configured bounds."""
+    policy = CONFIG.llm_timeouts
+    observed = _llm_latency.percentile(key, policy.percentile, min_samples=policy.min_samples)
+    if observed is None:
+        return policy.default_timeout
+    return min(policy.max_timeout, max(policy.min_timeout, observed * policy.multiplier))
+
+def _hedge_delay(key: tuple) -> Optional[float]:
+    """How long to wait on a critical call before hedging it, or None without enough latency data."""
+    policy = CONFIG.llm_timeouts
+    return _llm_latency.percentile(key, policy.hedge_percentile, min_samples=policy.min_samples)
+
+def get_llm_latency_stats() -> Dict[str, Any]:
+    """Per (endpoint, model, prompt) LLM latency (EWMA and percentiles), for the metrics endpoint."""
+    return _llm_latency.snapshot()
+
+def _resolve_model(provider_name: str, level: str):
+    """(llm_type, model_id) for an endpoint, or None if it is unknown or has no models."""
+    if provider_name not in CONFIG.llm_endpoints:
+        logger.error(f"Unknown provider '{provider_name}'")
+        return None
+    provider_config = CONFIG.get_llm_provider(provider_name)
+    if not provider_config or not provider_config.models:
+        logger.error(f"Missing model configuration for provider '{provider_name}'")
+        return None
+    return provider_config.llm_type, getattr(provider_config.models, level)
+
+async def _ask_endpoint(
+    provider_name: str,
+    prompt: str,
+    schema: Dict[str, Any],
+    level: str,
+    timeout: Optional[float],
+    max_length: int,
+    call_class: Optional[str],
+    prompt_name: Optional[str]
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    One call to one endpoint, recording its latency. Returns ("llm_type:model_id" of
+    the model that answered, response), with an empty response on failure.
+    """
+    resolved = _resolve_model(provider_name, level)
+    if resolved is None:
+        return "", {}
+    llm_type, model_id = resolved
+    model_name = f"{llm_type}:{model_id}"
+    logger.debug(f"Using LLM type: {llm_type}, model: {model_id}")
+    key = _call_key(provider_name, model_id, prompt_name)
+    if timeout is None:
+        timeout = _call_timeout(key)
+
+    try:
+        # Get the provider instance based on llm_type
+        try:
+            provider_instance = _get_provider(llm_type)
+        except ValueError as e:
+            error_msg = str(e)
+            logger.error(error_msg)
+            return model_name, {}
+
+        # Simply call the provider's get_completion method without locking
+        # Each provider should handle thread-safety internally
+        logger.debug(f"Calling {llm_type} provider completion for endpoint {provider_name} with max_tokens={max_length}")
+        scheduler = get_llm_scheduler()
+        if scheduler is None:
+            result = await _timed_completion(provider_instance, key, prompt, schema, model_id, timeout, max_length)
+        else:
+            # The timeout covers the provider call, not the wait for a slot
+            async with scheduler.slot(provider_name, estimate_tokens(prompt, max_length), call_class):
+                result = await _timed_completion(provider_instance, key, prompt, schema, model_id, timeout, max_length)
+        logger.debug(f"{provider_name} response received, size: {len(str(result))} chars")
+        return model_name, result
+
+    except asyncio.TimeoutError:
+        logger.error(f"LLM call timed out after {timeout:.1f}s with provider {provider_name}")
+        return model_name, {}
+    except Exception as e:
+        error_msg = f"LLM call failed: {type(e).__name__}: {str(e)}"
+        logger.error(f"Error with provider {provider_name}: {error_msg}")
+
+        logger.log_with_context(
+            LogLevel.ERROR,
+            "LLM call failed",
+            {
+                "endpoint": provider_name,
+                "llm_type": llm_type,
+                "model": model_id,
+                "level": level,
+                "error_type": type(e).__name__,
+                "error_message": str(e)
+            }
+        )
+
+        return model_name, {}
+
+async def _timed_completion(provider_instance, key: tuple, prompt: str, schema: Dict[str, Any],
+                            model_id: str, timeout: float, max_length: int) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(
+            provider_instance.get_completion(prompt, schema, model=model_id, timeout=timeout, max_tokens=max_length),
+            timeout=timeout
+        )
+    except asyncio.TimeoutError:
+        # The call took at least the timeout. A call cancelled because it lost a hedge
+        # race is not recorded: its elapsed time says nothing about its latency.
+        _llm_latency.record(key, timeout)
+        raise
+    _llm_latency.record(key, time.perf_counter() - start)
+    return result
+
 async def ask_llm(
     prompt: str,
     schema: Dict[str, Any],
     provider: Optional[str] = None,
     level: str = "low",
-    timeout: int = 8,
+    timeout: Optional[float] = None,
     query_params: Optional[Dict[str, Any]] = None,
-    max_length: int = 512
+    max_length: int = 512,
+    use_cache: bool = True,
+    call_class: Optional[str] = None,
+    prompt_name: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Route an LLM request to the specified endpoint, with dispatch based on llm_type.
     
+    Calls of a critical class (timeouts.hedge_classes) get further attempts on the
+    fallback endpoint, if one is configured: one when the call fails or times out,
+    or as a hedge once it has run past its hedge percentile latency (the first
+    answer wins), plus timeouts.retries more. Other calls are made once.
+    
     Args:
         prompt: The text prompt to send to the LLM
         schema: JSON schema that the response should conform to
         provider: The LLM endpoint to use (if None, use preferred endpoint from config)
         level: The model tier to use ('low' or 'high')
-        timeout: Request timeout in seconds
+        timeout: Request timeout in seconds; if None, derived from the observed latency
+            of this endpoint, model and prompt_name
         query_params: Optional query parameters for development mode provider override
         max_length: Maximum length of the response in tokens (default: 512)
+        use_cache: Whether to serve and store the response in the LLM response cache
+        call_class: Kind of call ('decontextualize', 'tool_routing', 'query_analysis',
+            'ranking', 'summarization'), which sets its priority in the LLM scheduler
+        prompt_name: Name of the prompt, which keys the latency statistics
         
     Returns:
-        Parsed JSON response from the LLM
-        
-    Raises:
-        ValueError: If the endpoint is unknown or response cannot be parsed
-        TimeoutError: If the request times out
+        Parsed JSON response from the LLM, or {} if every attempt failed
     """
     # Determine provider, with development mode override support
     provider_name = provider or CONFIG.preferred_llm_endpoint
@@ -202,69 +404,72 @@ async def ask_llm(
     logger.debug(f"Prompt preview: {prompt[:100]}...")
     logger.debug(f"Schema: {schema}")
     
-    if provider_name not in CONFIG.llm_endpoints:
-        error_msg = f"Unknown provider '{provider_name}'"
-        logger.error(error_msg)
+    resolved = _resolve_model(provider_name, level)
+    if resolved is None:
         return {}
+    llm_type, model_id = resolved
 
-    # Get provider config using the helper method
-    provider_config = CONFIG.get_llm_provider(provider_name)
-    if not provider_config or not provider_config.models:
-        error_msg = f"Missing model configuration for provider '{provider_name}'"
-        logger.error(error_msg)
-        return {}
+    cache = get_llm_cache() if use_cache else None
+    if cache is not None:
+        cache_key = make_cache_key(prompt, schema, f"{llm_type}:{model_id}", max_length)
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"LLM cache hit for {provider_name}/{model_id}")
+            # Callers may mutate the response (e.g. ranking zeroes scores), so hand out a copy
+            return copy.deepcopy(cached)
 
-    # Get llm_type for dispatch
-    llm_type = provider_config.llm_type
-    logger.debug(f"Using LLM type: {llm_type}")
+    policy = CONFIG.llm_timeouts
+    # Retrying or hedging on the endpoint that just failed or is already slow would only add to its load
+    fallback_name = policy.fallback_endpoint
+    use_fallback = bool(fallback_name) and fallback_name != provider_name and call_class in policy.hedge_classes
+    endpoints = [provider_name] + ([fallback_name] * (1 + policy.retries) if use_fallback else [])
+    pending = set()
+    next_index = 0
 
-    model_id = getattr(provider_config.models, level)
-    logger.debug(f"Using model: {model_id}")
-    
-    # Initialize variables for exception handling
-    llm_type_for_error = llm_type
+    def launch():
+        nonlocal next_index
+        name = endpoints[next_index]
+        next_index += 1
+        pending.add(asyncio.create_task(
+            _ask_endpoint(name, prompt, schema, level, timeout, max_length, call_class, prompt_name)))
+        return name
 
+    result = {}
+    answered_by = None
     try:
+        last_launched = launch()
+        while pending:
+            hedge_after = None
+            if next_index < len(endpoints):
+                last_resolved = _resolve_model(last_launched, level)
+                if last_resolved is not None:
+                    hedge_after = _hedge_delay(_call_key(last_launched, last_resolved[1], prompt_name))
+            done, _ = await asyncio.wait(pending, timeout=hedge_after, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                logger.info(f"Hedging LLM call {prompt_name} from {last_launched} to {endpoints[next_index]} "
+                            f"after {hedge_after:.2f}s")
+                last_launched = launch()
+                continue
+            for task in done:
+                pending.discard(task)
+                answered_by, answer = task.result()
+                if answer:
+                    result = answer
+                    break
+            if result:
+                break
+            if next_index < len(endpoints) and not pending:
+                logger.info(f"Retrying LLM call {prompt_name} on {endpoints[next_index]}")
+                last_launched = launch()
+    finally:
+        for task in pending:
+            task.cancel()
 
-        # Get the provider instance based on llm_type
-        try:
-            provider_instance = _get_provider(llm_type)
-        except ValueError as e:
-            error_msg = str(e)
-            logger.error(error_msg)
-            return {}
-        
-        # Simply call the provider's get_completion method without locking
-        # Each provider should handle thread-safety internally
-        logger.debug(f"Calling {llm_type} provider completion for endpoint {provider_name} with max_tokens={max_length}")
-        result = await asyncio.wait_for(
-            provider_instance.get_completion(prompt, schema, model=model_id, timeout=timeout, max_tokens=max_length),
-            timeout=timeout
-        )
-        logger.debug(f"{provider_name} response received, size: {len(str(result))} chars")
-        return result
-        
-    except asyncio.TimeoutError:
-        logger.error(f"LLM call timed out after {timeout}s with provider {provider_name}")
-        return {}
-    except Exception as e:
-        error_msg = f"LLM call failed: {type(e).__name__}: {str(e)}"
-        logger.error(f"Error with provider {provider_name}: {error_msg}")
-
-        logger.log_with_context(
-            LogLevel.ERROR,
-            "LLM call failed",
-            {
-                "endpoint": provider_name,
-                "llm_type": llm_type_for_error,
-                "model": model_id,
-                "level": level,
-                "error_type": type(e).__name__,
-                "error_message": str(e)
-            }
-        )
-
-        return {}
+    # Only cache real answers; failures come back as empty dicts. An answer from the
+    # fallback is keyed on the fallback's model, never served as the primary's.
+    if cache is not None and result and isinstance(result, dict):
+        await cache.set(make_cache_key(prompt, schema, answered_by, max_length), copy.deepcopy(result))
+    return result
 
 
 def get_available_providers() -> list:
@@ -0,0 +1,227 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Content-addressed cache for LLM responses.
+
+Responses are keyed by a hash of the filled prompt, the response schema and the
+model id, so identical calls (ranking the same item for the same query, repeated
+query analysis, tool scoring) are answered without going back to the provider.
+The default cache has two tiers: an in-process LRU and an on-disk SQLite store,
+both with TTL and size-bound eviction.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from core.sqlite_store import SQLiteLRUStore
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("llm_cache")
+
+
+def make_cache_key(prompt: str, schema: Any, model_id: str, max_length: Optional[int] = None) -> str:
+    """
+    Build a content-addressed cache key for an LLM call.
+
+    Args:
+        prompt: The fully filled prompt text
+        schema: The response schema passed to the provider
+        model_id: The provider model id that will serve the call
+        max_length: Maximum response length, since it can truncate answers
+
+    Returns:
+        Hex digest identifying the call
+    """
+    payload = json.dumps(
+        {"prompt": prompt, "schema": schema, "model": model_id, "max_length": max_length},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache(ABC):
+    """Interface for LLM response caches. Implementations must be safe to call from the event loop."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for key, or None on a miss."""
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a response under key."""
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for this cache."""
+        return {}
+
+    def close(self) -> None:
+        """Release any resources held by the cache."""
+        pass
+
+
+class MemoryLRUCache(LLMCache):
+    """In-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: Optional[float] = 86400):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_sync(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set_sync(self, key: str, value: Dict[str, Any], expires_at: Optional[float] = None) -> None:
+        if expires_at is None and self.ttl_seconds:
+            expires_at = time.time() + self.ttl_seconds
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.get_sync(key)
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        self.set_sync(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class SQLiteCache(LLMCache):
+    """
+    On-disk cache stored in a single SQLite file.
+    Blocking database work runs in a worker thread so the event loop is never stalled.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000, ttl_seconds: Optional[float] = 86400):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._store = SQLiteLRUStore(path, "llm_cache", {"value": "TEXT NOT NULL"}, max_entries, expiring=True)
+
+    @property
+    def max_entries(self) -> int:
+        return self._store.max_entries
+
+    def _get_blocking(self, key: str) -> Optional[tuple]:
+        row = self._store.get_many([key]).get(key)
+        if row is None:
+            return None
+        value, expires_at = row
+        return json.loads(value), expires_at
+
+    def _set_blocking(self, key: str, value: Dict[str, Any]) -> None:
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        self._store.put_many({key: (json.dumps(value),)}, expires_at=expires_at)
+
+    async def get_with_expiry(self, key: str) -> Optional[tuple]:
+        try:
+            result = await asyncio.to_thread(self._get_blocking, key)
+        except Exception as e:
+            logger.warning(f"LLM disk cache read failed: {e}")
+            result = None
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        result = await self.get_with_expiry(key)
+        return result[0] if result else None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        try:
+            await asyncio.to_thread(self._set_blocking, key, value)
+        except Exception as e:
+            logger.warning(f"LLM disk cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self._store.evictions,
+        }
+
+    def close(self) -> None:
+        self._store.close()
+
+
+class TieredLLMCache(LLMCache):
+    """Memory LRU in front of an optional disk tier. Disk hits are promoted into memory."""
+
+    def __init__(self, memory: MemoryLRUCache, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.memory.get_sync(key)
+        if value is None and self.disk is not None:
+            result = await self.disk.get_with_expiry(key)
+            if result is not None:
+                value, expires_at = result
+                self.memory.set_sync(key, value, expires_at)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        self.memory.set_sync(key, value)
+        if self.disk is not None:
+            await self.disk.set(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        stats = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "memory": self.memory.stats(),
+        }
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
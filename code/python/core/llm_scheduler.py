@@ -0,0 +1,241 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Process-wide scheduler for LLM calls.
+
+A single request fires dozens of concurrent LLM calls (query analysis, tool
+routing, ranking, summarization) and nothing used to limit them across requests,
+so under load every provider returned 429s and all requests degraded together.
+Every ask_llm call now takes a slot from this scheduler first. Each endpoint has
+token buckets for requests and tokens per minute (rpm/tpm in config_llm.yaml),
+a global cap bounds the calls in flight, and waiting calls are granted in
+priority order of their call class, so decontextualization and tool routing are
+not stuck behind a long ranking fan-out.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("llm_scheduler")
+
+# Lower values are granted first. Calls without a class get DEFAULT_PRIORITY.
+DEFAULT_PRIORITIES = {
+    "decontextualize": 0,
+    "tool_routing": 0,
+    "query_analysis": 1,
+    "ranking": 2,
+    "summarization": 3,
+}
+DEFAULT_PRIORITY = 2
+
+
+def estimate_tokens(prompt: str, max_length: int) -> int:
+    """Tokens a call counts against the tpm budget: about 4 characters per prompt token plus the response limit."""
+    return len(prompt) // 4 + max_length
+
+
+class TokenBucket:
+    """Refills at rate_per_minute / 60 per second, holding at most a minute's worth."""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount is available, 0 if it is available now."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "tokens", "call_class", "future", "enqueued")
+
+    def __init__(self, priority, seq, tokens, call_class, future):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.call_class = call_class
+        self.future = future
+        self.enqueued = time.monotonic()
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _EndpointState:
+    """Queue, buckets and counters for one LLM endpoint."""
+
+    def __init__(self, rpm: Optional[int], tpm: Optional[int]):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.queue: List[_Waiter] = []
+        self.in_flight = 0
+        self.granted = 0
+        self.max_queue_depth = 0
+        self.wait_seconds = 0.0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    def head(self) -> Optional[_Waiter]:
+        while self.queue and self.queue[0].future.done():
+            heapq.heappop(self.queue)  # Cancelled while waiting
+        return self.queue[0] if self.queue else None
+
+    def wait_time(self, waiter: _Waiter, now: float) -> float:
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(waiter.tokens, now))
+        return wait
+
+    def take(self, waiter: _Waiter, now: float) -> None:
+        if self.requests is not None:
+            self.requests.take(1, now)
+        if self.tokens is not None:
+            self.tokens.take(waiter.tokens, now)
+
+
+class LLMScheduler:
+    """
+    Grants LLM calls a slot in priority order, within per-endpoint rate limits.
+
+    Args:
+        limits: Endpoint name to (rpm, tpm); None or 0 means unlimited
+        max_concurrency: LLM calls in flight across all endpoints; 0 means unlimited
+        priorities: Call class to priority, lower first; defaults to DEFAULT_PRIORITIES
+    """
+
+    def __init__(self, limits: Optional[Dict[str, tuple]] = None, max_concurrency: int = 0,
+                 priorities: Optional[Dict[str, int]] = None):
+        self.limits = dict(limits or {})
+        self.max_concurrency = max_concurrency
+        self.priorities = dict(DEFAULT_PRIORITIES if priorities is None else priorities)
+        self.in_flight = 0
+        self._endpoints: Dict[str, _EndpointState] = {}
+        self._seq = itertools.count()
+
+    def _endpoint(self, name: str) -> _EndpointState:
+        state = self._endpoints.get(name)
+        if state is None:
+            rpm, tpm = self.limits.get(name, (None, None))
+            state = self._endpoints[name] = _EndpointState(rpm, tpm)
+        return state
+
+    def priority(self, call_class: Optional[str]) -> int:
+        return self.priorities.get(call_class, DEFAULT_PRIORITY)
+
+    @asynccontextmanager
+    async def slot(self, endpoint: str, tokens: int = 0, call_class: Optional[str] = None):
+        """Wait for a slot on endpoint, hold it for the duration of the block."""
+        await self.acquire(endpoint, tokens, call_class)
+        try:
+            yield
+        finally:
+            self.release(endpoint)
+
+    async def acquire(self, endpoint: str, tokens: int = 0, call_class: Optional[str] = None) -> None:
+        state = self._endpoint(endpoint)
+        future = asyncio.get_running_loop().create_future()
+        waiter = _Waiter(self.priority(call_class), next(self._seq), tokens, call_class, future)
+        heapq.heappush(state.queue, waiter)
+        state.max_queue_depth = max(state.max_queue_depth, len(state.queue))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as the caller was cancelled; hand the slot back
+                self.release(endpoint)
+            else:
+                future.cancel()
+                self._dispatch()
+            raise
+
+    def release(self, endpoint: str) -> None:
+        state = self._endpoint(endpoint)
+        state.in_flight -= 1
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant waiting calls, best priority first across endpoints, while limits allow."""
+        now = time.monotonic()
+        blocked = set()
+        while not self.max_concurrency or self.in_flight < self.max_concurrency:
+            best_name, best = None, None
+            for name, state in self._endpoints.items():
+                if name in blocked:
+                    continue
+                head = state.head()
+                if head is not None and (best is None or head < best):
+                    best_name, best = name, head
+            if best is None:
+                return
+            state = self._endpoints[best_name]
+            wait = state.wait_time(best, now)
+            if wait > 0:
+                # Rate limited: the head waits for its budget, lower priorities queue behind it
+                blocked.add(best_name)
+                self._schedule(state, wait)
+                continue
+            heapq.heappop(state.queue)
+            state.take(best, now)
+            state.in_flight += 1
+            state.granted += 1
+            state.wait_seconds += now - best.enqueued
+            self.in_flight += 1
+            best.future.set_result(None)
+
+    def _schedule(self, state: _EndpointState, wait: float) -> None:
+        if state.timer is not None:
+            return
+        loop = asyncio.get_running_loop()
+
+        def wake():
+            state.timer = None
+            self._dispatch()
+
+        state.timer = loop.call_later(wait, wake)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and throughput counters, for the metrics endpoint."""
+        endpoints = {}
+        for name, state in self._endpoints.items():
+            state.head()
+            queued: Dict[str, int] = {}
+            for waiter in state.queue:
+                if not waiter.future.done():
+                    key = waiter.call_class or "default"
+                    queued[key] = queued.get(key, 0) + 1
+            endpoints[name] = {
+                "queued": sum(queued.values()),
+                "queued_by_class": queued,
+                "max_queue_depth": state.max_queue_depth,
+                "in_flight": state.in_flight,
+                "granted": state.granted,
+                "avg_wait_ms": round(state.wait_seconds / state.granted * 1000, 1) if state.granted else 0.0,
+            }
+        return {"in_flight": self.in_flight, "max_concurrency": self.max_concurrency, "endpoints": endpoints}
@@ -0,0 +1,116 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Support for provider-side prompt prefix caching.
+
+Ranking sends one prompt per item (or batch) that differs from the others only
+in the item description. OpenAI and Azure OpenAI cache the longest previously
+seen prefix of a request automatically; Anthropic caches up to a content block
+marked with cache_control. Both only pay off if every call for a query starts
+with the same bytes, so ranking prompts are filled as a PrefixedPrompt: a str
+whose first prefix_length characters (instructions and query) are identical for
+all items, with the per-item text after them. Providers that support caching
+send the prefix as its own block, the rest treat it as the plain string it is.
+
+Providers report the cached input tokens of each call to record_usage, and the
+totals are served by the metrics endpoint.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+
+class PrefixedPrompt(str):
+    """A filled prompt whose first prefix_length characters are shared with other calls."""
+
+    prefix_length: int
+
+    def __new__(cls, prefix: str, suffix: str):
+        prompt = super().__new__(cls, prefix + suffix)
+        prompt.prefix_length = len(prefix)
+        return prompt
+
+    @property
+    def prefix(self) -> str:
+        return self[:self.prefix_length]
+
+    @property
+    def suffix(self) -> str:
+        return self[self.prefix_length:]
+
+    def cache_key(self) -> str:
+        """Stable identifier of the prefix, for providers that route requests by it."""
+        return hashlib.sha256(self.prefix.encode("utf-8")).hexdigest()[:32]
+
+    def __reduce__(self):
+        return (PrefixedPrompt, (self.prefix, self.suffix))
+
+
+def split_prompt(prompt: str):
+    """(prefix, suffix) of a prompt; a plain string has no shared prefix."""
+    prefix_length = getattr(prompt, "prefix_length", 0)
+    return prompt[:prefix_length], prompt[prefix_length:]
+
+
+class PromptCacheStats:
+    """Input tokens and provider cache hits per (endpoint, model)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def record(self, provider: str, model: Optional[str], input_tokens: Optional[int],
+               cached_tokens: Optional[int] = 0, cache_write_tokens: Optional[int] = 0) -> None:
+        key = f"{provider}:{model}"
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = {"calls": 0, "cache_hits": 0, "input_tokens": 0,
+                                            "cached_tokens": 0, "cache_write_tokens": 0}
+            stats["calls"] += 1
+            stats["input_tokens"] += input_tokens or 0
+            stats["cached_tokens"] += cached_tokens or 0
+            stats["cache_write_tokens"] += cache_write_tokens or 0
+            if cached_tokens:
+                stats["cache_hits"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            result = {}
+            for key, stats in self._stats.items():
+                result[key] = dict(stats)
+                total = stats["input_tokens"]
+                result[key]["cached_token_ratio"] = round(stats["cached_tokens"] / total, 3) if total else 0.0
+            return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+_stats = PromptCacheStats()
+
+
+def record_usage(provider: str, model: Optional[str], input_tokens: Optional[int],
+                 cached_tokens: Optional[int] = 0, cache_write_tokens: Optional[int] = 0) -> None:
+    """
+    Record the input token usage a provider reported for one call.
+
+    Args:
+        provider: Provider name (llm_type)
+        model: Model id
+        input_tokens: All input tokens of the call, cached ones included
+        cached_tokens: Input tokens read from the provider's prompt cache
+        cache_write_tokens: Input tokens written to the cache (Anthropic bills these separately)
+    """
+    _stats.record(provider, model, input_tokens, cached_tokens, cache_write_tokens)
+
+
+def get_prompt_cache_stats() -> Dict[str, Any]:
+    """Prompt cache hits and saved input tokens per endpoint and model, for the metrics endpoint."""
+    return _stats.snapshot()
@@ -12,9 +12,11 @@ Backwards compatibility is not guaranteed at this time.
 from xml.etree import ElementTree as ET
 import json 
 import os  # Add this import
+import time
 from misc.logger.logging_config_helper import get_configured_logger
 from core.llm import ask_llm
 from core.config import CONFIG
+from core.prompt_cache import PrefixedPrompt
 
 logger = get_configured_logger("prompts")
 prompt_runner_logger = get_configured_logger("prompt_runner")
@@ -22,74 +24,234 @@ prompt_runner_logger = get_configured_logger("prompt_runner")
 
 BASE_NS = "http://nlweb.ai/base"
 
-# This file deals with getting the right prompt for a given
-# type, site and prompt-name. 
-# Also deals with filling in the prompt.
-# #Yet to do the subclass check.
+SITE_TAG = "{" + BASE_NS + "}Site"
+PROMPT_TAG = "{" + BASE_NS + "}Prompt"
+PROMPT_STRING_TAG = "{" + BASE_NS + "}promptString"
+RETURN_STRUC_TAG = "{" + BASE_NS + "}returnStruc"
+ROOT_TYPE = "Item"
+
+# Seconds between checks of the prompt files for changes
+PROMPT_RELOAD_INTERVAL = 2.0
+
+
+def _type_name(item_type):
+    """Local name of a type: '{http://nlweb.ai/base}Recipe' -> 'Recipe'."""
+    return item_type.split("}")[-1] if item_type else ROOT_TYPE
+
+
+def _file_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _parse_prompt(prompt_element):
+    """(prompt text, return structure) of a Prompt element."""
+    prompt_text = prompt_element.find(PROMPT_STRING_TAG).text
+    return_struc_element = prompt_element.find(RETURN_STRUC_TAG)
+    return_struc = None
+    if return_struc_element is not None and return_struc_element.text:
+        return_struc_text = return_struc_element.text.strip()
+        if return_struc_text:
+            try:
+                return_struc = json.loads(return_struc_text)
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to parse return structure JSON for '{prompt_element.get('ref')}': {e}")
+    return prompt_text, return_struc
+
+
+class PromptIndex:
+    """
+    The prompt files compiled into a dictionary keyed by (site, type, prompt name).
+
+    Top-level type elements (Item, Recipe, ...) hold prompts for every site; a
+    Site element with a ref holds overrides for that site. A type element may name
+    its parent with subClassOf="..."; every type falls back to Item. A lookup tries
+    the item's type and then its ancestors, each first for the site and then for
+    all sites, and the resolved answer is memoized.
+    """
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.mtimes = {path: _file_mtime(path) for path in self.paths}
+        self.prompts = {}
+        self.parents = {}
+        self._resolved = {}
+        for path in self.paths:
+            self._load(ET.parse(path).getroot())
+
+    def _load(self, root):
+        for element in root:
+            if element.tag == SITE_TAG:
+                for type_element in element:
+                    self._load_type(element.get("ref"), type_element)
+            elif isinstance(element.tag, str):  # Skip comments
+                self._load_type(None, element)
+
+    def _load_type(self, site, type_element):
+        type_name = _type_name(type_element.tag)
+        parent = type_element.get("subClassOf")
+        if parent:
+            self.parents[type_name] = _type_name(parent)
+        for prompt_element in type_element.findall(PROMPT_TAG):
+            # A later definition of the same prompt replaces an earlier one
+            self.prompts[(site, type_name, prompt_element.get("ref"))] = _parse_prompt(prompt_element)
+
+    def type_chain(self, type_name):
+        """The type followed by its ancestors, ending with Item."""
+        chain = []
+        while type_name and type_name not in chain:
+            chain.append(type_name)
+            type_name = self.parents.get(type_name, ROOT_TYPE if type_name != ROOT_TYPE else None)
+        return chain
+
+    def lookup(self, site, item_type, prompt_name):
+        key = (site, item_type, prompt_name)
+        result = self._resolved.get(key)
+        if result is None:
+            result = (None, None)
+            sites = [site, None] if site else [None]
+            for type_name in self.type_chain(_type_name(item_type)):
+                found = next((self.prompts[(s, type_name, prompt_name)] for s in sites
+                              if (s, type_name, prompt_name) in self.prompts), None)
+                if found is not None:
+                    result = found
+                    break
+            else:
+                logger.warning(f"Prompt '{prompt_name}' not found for site='{site}', item_type='{item_type}'")
+            self._resolved[key] = result
+        return result
+
+    def changed(self):
+        return any(_file_mtime(path) != mtime for path, mtime in self.mtimes.items())
+
+
+_prompt_index = None
+_next_reload_check = 0.0
 
-prompt_roots = []
 def init_prompts(files=["prompts.xml"]):
-    global prompt_roots
+    """Build the prompt index from the given files in the config directory."""
+    global _prompt_index, _next_reload_check
     logger.info(f"Initializing prompts from files: {files}")
-    
-    for file in files:
-        # Create full path by joining the config directory with the filename
-        file_path = os.path.join(CONFIG.config_directory, file)
-        try:
-            logger.debug(f"Loading prompt file: {file_path}")
-            prompt_roots.append(ET.parse(file_path).getroot())
-            logger.debug(f"Successfully loaded prompt file: {file}")
-        except Exception as e:
-            logger.error(f"Failed to load prompt file '{file}': {str(e)}")
-            raise
+    paths = [os.path.join(CONFIG.config_directory, file) for file in files]
+    try:
+        _prompt_index = PromptIndex(paths)
+    except Exception as e:
+        logger.error(f"Failed to load prompt files {files}: {str(e)}")
+        raise
+    _next_reload_check = time.monotonic() + PROMPT_RELOAD_INTERVAL
+    logger.debug(f"Indexed {len(_prompt_index.prompts)} prompts")
+
+
+def get_prompt_index():
+    """The current prompt index, rebuilt when a prompt file has changed on disk."""
+    global _prompt_index, _next_reload_check
+    if _prompt_index is None:
+        logger.debug("Prompt index not initialized, initializing now")
+        init_prompts()
+        return _prompt_index
+    now = time.monotonic()
+    if now >= _next_reload_check:
+        _next_reload_check = now + PROMPT_RELOAD_INTERVAL
+        if _prompt_index.changed():
+            try:
+                _prompt_index = PromptIndex(_prompt_index.paths)
+                logger.info("Prompt files changed on disk, reloaded prompts")
+            except Exception as e:
+                # Keep serving the previous prompts until the file is fixed
+                logger.error(f"Failed to reload prompt files, keeping previous prompts: {str(e)}")
+                _prompt_index.mtimes = {path: _file_mtime(path) for path in _prompt_index.paths}
+    return _prompt_index
+
+class PromptTemplate:
+    """
+    A prompt string compiled once into literal text and variable slots.
+
+    Filling joins the segments instead of running str.replace once per variable.
+    A slot is any {...} without leading or trailing whitespace inside the braces;
+    names get_prompt_variable_value does not know fill in as empty strings.
+    """
+
+    __slots__ = ("segments", "variables")
+
+    def __init__(self, prompt_str):
+        # segments alternate literal text (even positions) and variable names (odd positions)
+        self.segments = []
+        literal_start = 0
+        start = 0
+        while True:
+            start = prompt_str.find('{', start)
+            if start == -1:
+                break
+            end = prompt_str.find('}', start)
+            if end == -1:
+                break
+            var = prompt_str[start+1:end]
+            if var and var == var.strip():
+                self.segments.append(prompt_str[literal_start:start])
+                self.segments.append(var)
+                literal_start = end + 1
+            start = end + 1
+        self.segments.append(prompt_str[literal_start:])
+        self.variables = set(self.segments[1::2])
+
+    def bind(self, handler, item_variables=()):
+        """Resolve every variable except item_variables from the handler, once."""
+        values = {}
+        for variable in self.variables:
+            if variable not in item_variables:
+                value = get_prompt_variable_value(variable, handler)
+                values[variable] = value if isinstance(value, str) else str(value)
+        return BoundPrompt(self, values)
+
+
+class BoundPrompt:
+    """A PromptTemplate with its request-level values filled in; fill() supplies the per-item values."""
+
+    __slots__ = ("template", "values")
+
+    def __init__(self, template, values):
+        self.template = template
+        self.values = values
+
+    def _parts(self, pr_dict, segments):
+        parts = []
+        for i, segment in enumerate(segments):
+            if i % 2 == 0:
+                parts.append(segment)
+            else:
+                value = pr_dict[segment] if segment in pr_dict else self.values.get(segment, "")
+                parts.append(value if isinstance(value, str) else str(value))
+        return "".join(parts)
+
+    def fill(self, pr_dict={}):
+        return self._parts(pr_dict, self.template.segments)
+
+    def fill_with_prefix(self, pr_dict, variable):
+        """
+        Fill the prompt as a PrefixedPrompt: everything before the first slot of
+        variable is identical across calls that only differ in that variable.
+        """
+        segments = self.template.segments
+        split_at = next((i for i in range(1, len(segments), 2) if segments[i] == variable), None)
+        if split_at is None:
+            return self.fill(pr_dict)
+        return PrefixedPrompt(self._parts(pr_dict, segments[:split_at]),
+                              self._parts(pr_dict, [""] + segments[split_at:]))
 
 
-def super_class_of(child_class, parent_class):
-    if parent_class == child_class:
-        logger.debug(f"Class match: {child_class} == {parent_class}")
-        return True
-    if parent_class == "{" + BASE_NS + "}Item" :
-        logger.debug(f"Universal parent class matched: {parent_class}")
-        return True
-    logger.debug(f"No class relationship: {child_class} is not a subclass of {parent_class}")
-    return False
+compiled_prompts = {}
+def compile_prompt(prompt_str):
+    """Return the compiled form of a prompt string, compiling it on first use."""
+    template = compiled_prompts.get(prompt_str)
+    if template is None:
+        logger.debug(f"Compiling prompt template (length: {len(prompt_str)})")
+        template = compiled_prompts[prompt_str] = PromptTemplate(prompt_str)
+    return template
 
-prompt_var_cache = {}
 def get_prompt_variables_from_prompt(prompt):
-    if prompt in prompt_var_cache:
-        logger.debug(f"Using cached variables for prompt (length: {len(prompt)})")
-        return prompt_var_cache[prompt]
-    
-    logger.debug(f"Extracting variables from prompt (length: {len(prompt)})")
-    variables = extract_variables_from_prompt(prompt)
-    prompt_var_cache[prompt] = variables
-    logger.debug(f"Found {len(variables)} variables: {variables}")
-    return variables
-
-def extract_variables_from_prompt(prompt):
-    # Find all strings between { and }
-    variables = set()
-    start = 0
-    while True:
-        # Find next opening brace
-        start = prompt.find('{', start)
-        if start == -1:
-            break
-            
-        # Find matching closing brace
-        end = prompt.find('}', start)
-        if end == -1:
-            break
-            
-        # Extract variable name and add to set
-        var = prompt[start+1:end].strip()
-        variables.add(var)
-        
-        # Move start position
-        start = end + 1
-    
-    logger.debug(f"Extracted variables: {variables}")
-    return variables
+    return compile_prompt(prompt).variables
 
 def get_prompt_variable_value(variable, handler):
     logger.debug(f"Getting value for variable: {variable}")
@@ -151,106 +313,31 @@ def get_prompt_variable_value(variable, handler):
     return value
 
 def fill_prompt(prompt_str, handler, pr_dict={}):
-    logger.debug(f"Filling prompt template (length: {len(prompt_str)})")
     try:
-        variables = get_prompt_variables_from_prompt(prompt_str)
-        logger.debug(f"Found {len(variables)} variables to fill")
-        for variable in variables:
-            if (variable in pr_dict):
-                value = pr_dict[variable]
-            else:
-                value = get_prompt_variable_value(variable, handler)
-            # Ensure value is a string
-            if not isinstance(value, str):
-                value = str(value)
-                
-            prompt_str = prompt_str.replace("{" + variable + "}", value)
-        
-        logger.debug(f"Prompt filled successfully (final length: {len(prompt_str)})")
-        return prompt_str
+        return compile_prompt(prompt_str).bind(handler, pr_dict).fill(pr_dict)
     except Exception as e:
         logger.error(f"Error filling prompt: {str(e)}")
         logger.debug("Error details:", exc_info=True)
         raise
 
+def fill_prompt_with_prefix(prompt_str, handler, pr_dict, variable):
+    """
+    Fill a prompt whose variable (e.g. item.description) changes from call to call.
+    Everything before the variable is filled into a prefix that is byte-identical
+    across those calls, so providers can cache it.
+    """
+    return compile_prompt(prompt_str).bind(handler, pr_dict).fill_with_prefix(pr_dict, variable)
 
-cached_prompts = {}
-def get_cached_values(site, item_type, prompt_name):
-    cache_key = (site, item_type, prompt_name)
-    if cache_key in cached_prompts:
-        logger.debug(f"Cache hit for prompt: {cache_key}")
-        return cached_prompts[cache_key]
-    logger.debug(f"Cache miss for prompt: {cache_key}")
-    return None
-
-def find_prompt(site, item_type, prompt_name):  
-    if (site):
-        site = site[0]
-    if (prompt_roots == []):
-        logger.debug("Prompt roots not initialized, initializing now")
-        init_prompts()
-    
-    cached_values = get_cached_values(site, item_type, prompt_name)
-    if cached_values is not None:
-        logger.debug(f"Returning cached prompt for '{prompt_name}'")
-        return cached_values
-
-    BASE_NS = "http://nlweb.ai/base"
-    SITE_TAG = "{" + BASE_NS + "}Site"
-    PROMPT_TAG = "{" + BASE_NS + "}Prompt"
-    PROMPT_STRING_TAG = "{" + BASE_NS + "}promptString"
-    RETURN_STRUC_TAG = "{" + BASE_NS + "}returnStruc"
-    
-    # First, try to find a Site element matching the site parameter
-    site_element = None
-    prompt_element = None
-    
-    logger.debug(f"Searching for site element with ref='{site}'")
-    for root_element in prompt_roots:
-        for site_element in root_element.findall(SITE_TAG):
-            if site_element.get("ref") == site:
-                break
-    
-    candidate_roots = []
-    if site_element is not None:
-        candidate_roots.append(site_element)
-    else:
-        candidate_roots = prompt_roots
-    
-    # If site element found, search for matching Type element within it
-    for candidate_root in candidate_roots:
-        for child in candidate_root:
-            if (super_class_of(item_type, child.tag)):
-                children = child.findall(PROMPT_TAG)
-                
-                for pe in children:
-                    if pe.get("ref") == prompt_name:
-                        prompt_element = pe
-                        break
-    
-    if prompt_element is not None:
-        prompt_text = prompt_element.find(PROMPT_STRING_TAG).text
-        return_struc_element = prompt_element.find(RETURN_STRUC_TAG)
-        
-        if return_struc_element is not None and return_struc_element.text:
-            return_struc_text = return_struc_element.text.strip()
-            if return_struc_text == "":
-                return_struc = None
-            else:
-                try:
-                    return_struc = json.loads(return_struc_text)
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse return structure JSON: {e}")
-                    return_struc = None
-        else:
-            return_struc = None
-        
-        cached_prompts[(site, item_type, prompt_name)] = (prompt_text, return_struc)
-        return prompt_text, return_struc
-    else:
-        logger.warning(f"Prompt '{prompt_name}' not found for site='{site}', item_type='{item_type}'")
-        cached_prompts[(site, item_type, prompt_name)] = (None, None)
-        return None, None
+
+def find_prompt(site, item_type, prompt_name):
+    """
+    Return (prompt string, return structure) for the site, item type and prompt
+    name, or (None, None) if no prompt applies. site may be a site name or a list
+    of them, in which case the first one's prompts are used.
+    """
+    if isinstance(site, (list, tuple)):
+        site = site[0] if site else None
+    return get_prompt_index().lookup(site, item_type, prompt_name)
 
 
 def get_prompt_variables_from_file(xml_file_path):
@@ -274,7 +361,7 @@ def get_prompt_variables_from_file(xml_file_path):
             if element.tag == '{http://nlweb.ai/base}promptString':
                 prompt_text = element.text
                 if prompt_text:
-                    variables = extract_variables_from_prompt(prompt_text)
+                    variables = compile_prompt(prompt_text).variables
                     all_variables.update(variables)
                     logger.debug(f"Found {len(variables)} variables in promptString")
             
@@ -321,8 +408,8 @@ class PromptRunner:
     def __init__(self, handler):
         self.handler = handler
 
-    async def run_prompt(self, prompt_name, level="low", verbose=False, timeout=8):
-        prompt_runner_logger.info(f"Running prompt: {prompt_name} with level={level}, timeout={timeout}s")
+    async def run_prompt(self, prompt_name, level="low", verbose=False, timeout=None, call_class="query_analysis"):
+        prompt_runner_logger.info(f"Running prompt: {prompt_name} with level={level}, timeout={timeout or 'adaptive'}")
         
         try:
             prompt_str, ans_struc = self.get_prompt(prompt_name)
@@ -339,7 +426,8 @@ class PromptRunner:
             prompt_runner_logger.debug(f"Filled prompt length: {len(prompt)} chars")
             
             prompt_runner_logger.info(f"Calling LLM with level={level}")
-            response = await ask_llm(prompt, ans_struc, level=level, timeout=timeout, query_params=self.handler.query_params)
+            response = await ask_llm(prompt, ans_struc, level=level, timeout=timeout, query_params=self.handler.query_params,
+                                     call_class=call_class, prompt_name=prompt_name)
             
             if response is None:
                 prompt_runner_logger.warning(f"LLM returned None for prompt '{prompt_name}'")
@@ -58,7 +58,7 @@ class PrevQueryDecontextualizer(NoOpDecontextualizer):
             return
         
         response = await self.run_prompt(self.DECONTEXTUALIZE_QUERY_PROMPT_NAME, 
-                                         level="high", verbose=False)
+                                         level="high", verbose=False, call_class="decontextualize")
         logger.info(f"response: {response}")
         if response is None:
             logger.info("No response from decontextualizer")
@@ -116,7 +116,8 @@ class ContextUrlDecontextualizer(PrevQueryDecontextualizer):
             await self.handler.state.precheck_step_done(self.STEP_NAME)
             return
         
-        response = await self.run_prompt(self.DECONTEXTUALIZE_QUERY_PROMPT_NAME, level="high", verbose=False)
+        response = await self.run_prompt(self.DECONTEXTUALIZE_QUERY_PROMPT_NAME, level="high", verbose=False,
+                                         call_class="decontextualize")
         if response is None:
             self.handler.requires_decontextualization = False
             await self.handler.state.precheck_step_done(self.STEP_NAME)
@@ -131,7 +132,8 @@ class ContextUrlDecontextualizer(PrevQueryDecontextualizer):
             (url, schema_json, name, site) = item
             self.context_description = json.dumps(trim_json(schema_json))
             self.handler.context_description = self.context_description
-            response = await self.run_prompt(self.DECONTEXTUALIZE_QUERY_PROMPT_NAME, verbose=True)
+            response = await self.run_prompt(self.DECONTEXTUALIZE_QUERY_PROMPT_NAME, verbose=True,
+                                             call_class="decontextualize")
             self.handler.requires_decontextualization = True
             self.handler.abort_fast_track_event.set()  # Use event instead of flag
             self.handler.decontextualized_query = response["decontextualized_query"]
@@ -8,12 +8,16 @@ WARNING: This code is under development and may undergo changes in future releas
 Backwards compatibility is not guaranteed at this time.
 """
 
-from core.utils.utils import log
+from core.utils.utils import log, get_param
+from core.config import CONFIG
 from core.llm import ask_llm
 import asyncio
+import functools
 import json
 from core.utils.json_utils import trim_json
-from core.prompts import find_prompt, fill_prompt
+from core.prompts import find_prompt, compile_prompt
+from core.ranking_prefilter import RankingPrefilter
+from core.ranking_policy import RankingPolicy
 from misc.logger.logging_config_helper import get_configured_logger
 
 logger = get_configured_logger("ranking_engine")
@@ -38,6 +42,23 @@ The user's question is: {request.query}. The item's description is {item.descrip
  "description" : "short description of the item"}]
  
     RANKING_PROMPT_NAME = "RankingPrompt"
+
+    # Default listwise prompt, used when RankingListPrompt is not found in prompts.xml.
+    LISTWISE_RANKING_PROMPT = ["""  Assign a score between 0 and 100 to each of the following numbered {site.itemType}s
+based on how relevant it is to the user's question. Use your knowledge from other sources, about the item, to make a judgement.
+Score every item independently of the others.
+If the score is above 50, provide a short description of the item highlighting the relevance to the user's question, without mentioning the user's question.
+If the score is below 75, in the description, include the reason why it is still relevant.
+Return one entry per item, using the item's number as its id.
+The user's question is: {request.query}. The items' descriptions are:
+{items.description}""",
+    {"items" : [{"id" : "the number of the item",
+                 "score" : "integer between 0 and 100",
+                 "description" : "short description of the item"}]}]
+
+    LISTWISE_RANKING_PROMPT_NAME = "RankingListPrompt"
+    LISTWISE_TOKENS_PER_ITEM = 128
+    LISTWISE_TIMEOUT = 20
      
     def get_ranking_prompt(self):
         site = self.handler.site
@@ -49,7 +70,33 @@ The user's question is: {request.query}. The item's description is {item.descrip
         else:
             logger.debug(f"Using custom ranking prompt for site: {site}, item_type: {item_type}")
             return prompt_str, ans_struc
+
+    def get_listwise_ranking_prompt(self):
+        site = self.handler.site
+        item_type = self.handler.item_type
+        prompt_str, ans_struc = find_prompt(site, item_type, self.LISTWISE_RANKING_PROMPT_NAME)
+        if prompt_str is None:
+            logger.debug("Using default listwise ranking prompt")
+            return self.LISTWISE_RANKING_PROMPT[0], self.LISTWISE_RANKING_PROMPT[1]
+        else:
+            logger.debug(f"Using custom listwise ranking prompt for site: {site}, item_type: {item_type}")
+            return prompt_str, ans_struc
         
+    def get_bound_prompt(self, listwise=False):
+        """
+        The (listwise) ranking prompt with its request-level variables filled in once,
+        and its answer structure. Only the item descriptions are filled per call.
+        """
+        if listwise not in self._bound_prompts:
+            if listwise:
+                prompt_str, ans_struc = self.get_listwise_ranking_prompt()
+                item_variable = "items.description"
+            else:
+                prompt_str, ans_struc = self.get_ranking_prompt()
+                item_variable = "item.description"
+            self._bound_prompts[listwise] = (compile_prompt(prompt_str).bind(self.handler, [item_variable]), ans_struc)
+        return self._bound_prompts[listwise]
+
     def __init__(self, handler, items, ranking_type=FAST_TRACK):
         ll = len(items)
         self.ranking_type_str = "FAST_TRACK" if ranking_type == self.FAST_TRACK else "REGULAR_TRACK"
@@ -61,6 +108,15 @@ The user's question is: {request.query}. The item's description is {item.descrip
         self.rankedAnswers = []
         self.ranking_type = ranking_type
         self._results_lock = asyncio.Lock()  # Add lock for thread-safe operations
+        self.listwise = CONFIG.is_listwise_ranking_enabled()
+        self.batch_size = CONFIG.get_ranking_batch_size()
+        self.policy = RankingPolicy(self.NUM_RESULTS_TO_SEND)
+        self._bound_prompts = {}
+        # In development mode, allow overriding the ranking mode per request
+        if CONFIG.is_development_mode() and handler.query_params:
+            mode = get_param(handler.query_params, "ranking_mode", str, None)
+            if mode:
+                self.listwise = mode.lower() == "listwise"
 
     async def rankItem(self, url, json_str, name, site):
         if not self.handler.connection_alive_event.is_set():
@@ -72,59 +128,136 @@ The user's question is: {request.query}. The item's description is {item.descrip
             return
         try:
             logger.debug(f"Ranking item: {name} from {site}")
-            prompt_str, ans_struc = self.get_ranking_prompt()
+            bound_prompt, ans_struc = self.get_bound_prompt()
             description = trim_json(json_str)
-            prompt = fill_prompt(prompt_str, self.handler, {"item.description": description})
+            prompt = bound_prompt.fill_with_prefix({"item.description": description}, "item.description")
             
             logger.debug(f"Sending ranking request to LLM for item: {name}")
-            ranking = await ask_llm(prompt, ans_struc, level="low", query_params=self.handler.query_params)
+            ranking = await ask_llm(prompt, ans_struc, level="low", query_params=self.handler.query_params,
+                                   call_class="ranking", prompt_name=self.RANKING_PROMPT_NAME)
             logger.debug(f"Received ranking score: {ranking.get('score', 'N/A')} for item: {name}")
             
-            
-            # Handle both string and dictionary inputs for json_str
-            schema_object = json_str if isinstance(json_str, dict) else json.loads(json_str)
-            
-            # If schema_object is an array, set it to the first item
-            if isinstance(schema_object, list) and len(schema_object) > 0:
-                schema_object = schema_object[0]
-            
-            ansr = {
-                'url': url,
-                'site': site,
-                'name': name,
-                'ranking': ranking,
-                'schema_object': schema_object,
-                'sent': False,
-            }
-            
-            # Check if required_item_type is specified and filter based on @type
-            if self.handler.required_item_type is not None:
-                item_type = schema_object.get('@type', None)
-                if item_type != self.handler.required_item_type:
-                    logger.debug(f"Item type mismatch: expected {self.handler.required_item_type}, got {item_type} - setting score to 0")
-                    ranking["score"] = 0
-            
-            if (ranking["score"] > self.EARLY_SEND_THRESHOLD):
-                logger.info(f"High score item: {name} (score: {ranking['score']}) - sending early {self.ranking_type_str}")
-                try:
-                    await self.sendAnswers([ansr])
-                except (BrokenPipeError, ConnectionResetError):
-                    logger.warning(f"Client disconnected while sending early answer for {name}")
-                    self.handler.connection_alive_event.clear()
-                    return
-            
-            async with self._results_lock:  # Use lock when modifying shared state
-                self.rankedAnswers.append(ansr)
+            ansr = self.buildAnswer(url, json_str, name, site, ranking)
+            await self.addAnswers([ansr])
             logger.debug(f"Item {name} added to ranked answers")
         
         except Exception as e:
             logger.error(f"Error in rankItem for {name}: {str(e)}")
             logger.debug(f"Full error trace: ", exc_info=True)
-            # Import here to avoid circular import
-            from config.config import CONFIG
             if CONFIG.should_raise_exceptions():
                 raise  # Re-raise in testing/development mode
 
+    async def rankBatch(self, batch):
+        """
+        Rank a batch of items with a single listwise LLM call.
+        Items the LLM does not return a score for are ranked individually.
+        """
+        if not self.handler.connection_alive_event.is_set():
+            logger.warning("Connection lost, skipping batch ranking")
+            return
+        if (self.ranking_type == Ranking.FAST_TRACK and self.handler.state.should_abort_fast_track()):
+            logger.info("Fast track aborted, skipping batch ranking")
+            return
+
+        rankings = {}
+        try:
+            bound_prompt, ans_struc = self.get_bound_prompt(listwise=True)
+            descriptions = []
+            for idx, (url, json_str, name, site) in enumerate(batch, start=1):
+                descriptions.append(f"Item {idx}: {json.dumps(trim_json(json_str))}")
+            prompt = bound_prompt.fill_with_prefix({"items.description": "\n".join(descriptions)}, "items.description")
+
+            logger.debug(f"Sending listwise ranking request to LLM for {len(batch)} items")
+            response = await ask_llm(prompt, ans_struc, level="low", query_params=self.handler.query_params,
+                                     timeout=self.LISTWISE_TIMEOUT,
+                                     max_length=self.LISTWISE_TOKENS_PER_ITEM * len(batch),
+                                     call_class="ranking", prompt_name=self.LISTWISE_RANKING_PROMPT_NAME)
+            rankings = self.parseListwiseRankings(response, len(batch))
+            logger.debug(f"Received {len(rankings)}/{len(batch)} listwise scores")
+        except Exception as e:
+            logger.error(f"Error in rankBatch: {str(e)}")
+            logger.debug(f"Full error trace: ", exc_info=True)
+            if CONFIG.should_raise_exceptions():
+                raise
+
+        answers = []
+        missing = []
+        for idx, (url, json_str, name, site) in enumerate(batch, start=1):
+            if idx not in rankings:
+                missing.append((url, json_str, name, site))
+                continue
+            try:
+                answers.append(self.buildAnswer(url, json_str, name, site, rankings[idx]))
+            except Exception as e:
+                logger.error(f"Error building ranked answer for {name}: {str(e)}")
+        await self.addAnswers(answers)
+
+        if missing:
+            logger.info(f"Listwise ranking returned no score for {len(missing)} items, ranking them individually")
+            await asyncio.gather(*[self.rankItem(*item) for item in missing], return_exceptions=True)
+
+    def parseListwiseRankings(self, response, batch_len):
+        """Map 1-based item ids to {"score", "description"} dicts from a listwise response."""
+        rankings = {}
+        if not isinstance(response, dict):
+            return rankings
+        entries = response.get("items", [])
+        if not isinstance(entries, list):
+            return rankings
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            try:
+                idx = int(entry.get("id"))
+                score = int(entry.get("score"))
+            except (TypeError, ValueError):
+                continue
+            if 1 <= idx <= batch_len and idx not in rankings:
+                rankings[idx] = {"score": score, "description": entry.get("description", "")}
+        return rankings
+
+    def buildAnswer(self, url, json_str, name, site, ranking):
+        # Handle both string and dictionary inputs for json_str
+        schema_object = json_str if isinstance(json_str, dict) else json.loads(json_str)
+        
+        # If schema_object is an array, set it to the first item
+        if isinstance(schema_object, list) and len(schema_object) > 0:
+            schema_object = schema_object[0]
+        
+        ansr = {
+            'url': url,
+            'site': site,
+            'name': name,
+            'ranking': ranking,
+            'schema_object': schema_object,
+            'sent': False,
+        }
+        
+        # Check if required_item_type is specified and filter based on @type
+        if self.handler.required_item_type is not None:
+            item_type = schema_object.get('@type', None)
+            if item_type != self.handler.required_item_type:
+                logger.debug(f"Item type mismatch: expected {self.handler.required_item_type}, got {item_type} - setting score to 0")
+                ranking["score"] = 0
+        return ansr
+
+    async def addAnswers(self, answers):
+        """Send high scoring answers early and record all answers as ranked."""
+        early = [a for a in answers if a["ranking"]["score"] > self.EARLY_SEND_THRESHOLD]
+        if early:
+            early.sort(key=lambda a: a["ranking"]["score"], reverse=True)
+            logger.info(f"{len(early)} high score items - sending early {self.ranking_type_str}")
+            try:
+                await self.sendAnswers(early)
+            except (BrokenPipeError, ConnectionResetError):
+                logger.warning("Client disconnected while sending early answers")
+                self.handler.connection_alive_event.clear()
+                return
+        
+        async with self._results_lock:  # Use lock when modifying shared state
+            self.rankedAnswers.extend(answers)
+        self.policy.record([a["ranking"]["score"] for a in answers])
+
     def shouldSend(self, result):
         # Don't send if we've already reached the limit
         if self.num_results_sent >= self.NUM_RESULTS_TO_SEND:
@@ -232,21 +365,31 @@ The user's question is: {request.query}. The item's description is {item.descrip
     
     async def do(self):
         logger.info(f"Starting ranking process with {len(self.items)} items")
-        tasks = []
-        for url, json_str, name, site in self.items:
-            if self.handler.connection_alive_event.is_set():  # Only add new tasks if connection is still alive
-                tasks.append(asyncio.create_task(self.rankItem(url, json_str, name, site)))
-            else:
-                logger.warning("Connection lost, not creating new ranking tasks")
-       
+        prefilter = RankingPrefilter(self.handler)
+        self.items = self.policy.order(await prefilter.select(self.items))
+        if prefilter.config.record_path:
+            # Recorded queries need an LLM score for every item
+            self.policy.enabled = False
+        jobs = []
+        if self.listwise:
+            logger.info(f"Using listwise ranking with batches of {self.batch_size} items")
+            for i in range(0, len(self.items), self.batch_size):
+                jobs.append(functools.partial(self.rankBatch, self.items[i:i + self.batch_size]))
+        else:
+            for url, json_str, name, site in self.items:
+                jobs.append(functools.partial(self.rankItem, url, json_str, name, site))
+
+        # Ranking starts while the sites message is sent; only start tasks while the connection is alive
+        ranking_task = asyncio.create_task(self.policy.run(jobs, self.handler.connection_alive_event.is_set))
         await self.sendMessageOnSitesBeingAsked(self.items)
 
         try:
-            logger.debug(f"Running {len(tasks)} ranking tasks concurrently")
-            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.debug(f"Running {len(jobs)} ranking tasks")
+            await ranking_task
         except Exception as e:
             logger.error(f"Error during ranking tasks: {str(e)}")
             log(f"Error during ranking tasks: {str(e)}")
+        prefilter.record(self.rankedAnswers)
 
         if not self.handler.connection_alive_event.is_set():
             logger.warning("Connection lost during ranking, skipping sending results")
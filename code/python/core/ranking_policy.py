@@ -0,0 +1,110 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Scheduling policy for the LLM calls of the ranking stage.
+
+Ranking used to start one LLM call per item and wait for all of them, even after
+NUM_RESULTS_TO_SEND good answers had been sent and nothing else could reach the
+user. RankingPolicy runs the calls best candidates first, optionally with a
+limited number in flight, and once NUM_RESULTS_TO_SEND answers scoring at least
+min_score have been ranked, it cancels the calls still running and never starts
+the rest. Settings are in the ranking_early_stop block of config_nlweb.yaml.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, List, Optional, Sequence
+
+from core.config import CONFIG
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("ranking_policy")
+
+
+class RankingPolicy:
+    """
+    Orders ranking work and stops it early once the result quota is filled.
+
+    Args:
+        num_results: Results the ranking stage sends (Ranking.NUM_RESULTS_TO_SEND)
+        enabled: Stop early at all; defaults to the configured value
+        min_score: Score an answer must reach to count towards the quota
+        max_in_flight: Ranking calls running at once; 0 runs them all at once
+    """
+
+    def __init__(self, num_results: int, enabled: Optional[bool] = None,
+                 min_score: Optional[int] = None, max_in_flight: Optional[int] = None):
+        config = CONFIG.nlweb.ranking_early_stop
+        self.num_results = num_results
+        self.enabled = config.enabled if enabled is None else enabled
+        self.min_score = config.min_score if min_score is None else min_score
+        self.max_in_flight = config.max_in_flight if max_in_flight is None else max_in_flight
+        self.high_scores = 0
+        self.cancelled = 0
+        self.skipped = 0
+
+    @staticmethod
+    def order(items: Sequence) -> List:
+        """
+        Items best first. Retrieval scores are used when every item has one from the
+        same endpoint, since scores from different backends are not comparable; otherwise
+        the retrieval order, which is already by relevance, is kept.
+        """
+        items = list(items)
+        scores = [getattr(item, "score", None) for item in items]
+        if items and None not in scores and len({getattr(item, "endpoint", None) for item in items}) == 1:
+            items.sort(key=lambda item: item.score, reverse=True)
+        return items
+
+    def record(self, scores: Sequence[int]) -> None:
+        """Count ranked answers."""
+        self.high_scores += sum(1 for score in scores if score >= self.min_score)
+
+    @property
+    def quota_filled(self) -> bool:
+        return self.enabled and self.high_scores >= self.num_results
+
+    async def run(self, jobs: Sequence[Callable[[], Awaitable]],
+                  should_start: Callable[[], bool] = lambda: True) -> None:
+        """
+        Run the jobs in order, at most max_in_flight at a time, until they finish or
+        the quota is filled. Jobs are only started while should_start() is true.
+        """
+        jobs = list(jobs)
+        limit = self.max_in_flight if self.max_in_flight and self.max_in_flight > 0 else len(jobs)
+        next_job = 0
+        running = set()
+
+        def start_jobs():
+            nonlocal next_job
+            while next_job < len(jobs) and len(running) < limit and not self.quota_filled:
+                if not should_start():
+                    logger.warning("Not starting more ranking tasks")
+                    next_job = len(jobs)
+                    return
+                running.add(asyncio.ensure_future(jobs[next_job]()))
+                next_job += 1
+
+        start_jobs()
+        try:
+            while running:
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is not None:
+                        logger.error(f"Error during ranking task: {task.exception()}")
+                if self.quota_filled:
+                    break
+                start_jobs()
+        finally:
+            if running:
+                self.cancelled = len(running)
+                for task in running:
+                    task.cancel()
+                await asyncio.gather(*running, return_exceptions=True)
+            self.skipped = len(jobs) - next_job
+        if self.quota_filled and (self.cancelled or self.skipped):
+            logger.info(f"Result quota filled with scores >= {self.min_score}: cancelled {self.cancelled} "
+                        f"running and skipped {self.skipped} pending ranking tasks")
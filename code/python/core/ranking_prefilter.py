@@ -0,0 +1,241 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Local prefilter between retrieval and LLM ranking.
+
+Retrieval returns up to 50 items per query, and Ranking makes one LLM call for
+each of them. The prefilter scores the items in-process, with NumPy, and passes
+only the best top_k on to the LLM. The score combines two signals, each scaled
+to [0, 1] over the candidates:
+
+- Embedding similarity between the query and the item. When all items come from
+  one endpoint, this is the score the backend returned with them. Otherwise item
+  vectors are looked up in the data loader's ingest embedding cache, which is
+  keyed by the item's text; items that are not in it fall back to their
+  retrieval order.
+- BM25 of the query terms over the item's trimmed JSON.
+
+The settings are in the ranking_prefilter block of config_nlweb.yaml. With
+record_path set, every ranked query's candidates, signals and LLM scores are
+appended to a JSONL file, which benchmark/ranking_prefilter_eval.py replays to
+choose top_k per site.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from core.config import CONFIG
+from core.embedding import batch_get_embeddings, get_embedding
+from core.ingest_embedding_cache import EmbeddingDedupCache, content_key
+from core.utils.json_utils import trim_json
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("ranking_prefilter")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+_item_cache = None
+_item_cache_lock = threading.Lock()
+_record_lock = threading.Lock()
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if len(token) > 1]
+
+
+def item_text(json_str: Any) -> str:
+    """The text BM25 sees for an item: its trimmed JSON, or the raw JSON if trimming fails."""
+    try:
+        return json.dumps(trim_json(json_str), ensure_ascii=False)
+    except Exception:
+        return json_str if isinstance(json_str, str) else json.dumps(json_str, ensure_ascii=False)
+
+
+def bm25_scores(query: str, texts: Sequence[str], k1: float = BM25_K1, b: float = BM25_B) -> np.ndarray:
+    """
+    BM25 of the query against each text. Document frequencies are taken over the
+    texts themselves, since the candidates are the only corpus available here.
+    """
+    terms = sorted(set(tokenize(query)))
+    if not terms or not texts:
+        return np.zeros(len(texts))
+    term_index = {term: j for j, term in enumerate(terms)}
+    tf = np.zeros((len(texts), len(terms)))
+    lengths = np.empty(len(texts))
+    for i, text in enumerate(texts):
+        tokens = tokenize(text)
+        lengths[i] = len(tokens)
+        for token, count in Counter(tokens).items():
+            j = term_index.get(token)
+            if j is not None:
+                tf[i, j] = count
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log(1.0 + (len(texts) - df + 0.5) / (df + 0.5))
+    average_length = max(lengths.mean(), 1.0)
+    norm = k1 * (1.0 - b + b * lengths / average_length)
+    return (tf * (k1 + 1.0) / (tf + norm[:, None])) @ idf
+
+
+def _scale(values: np.ndarray) -> np.ndarray:
+    """Min-max scale to [0, 1]; all zeros if the values are all equal."""
+    if len(values) == 0:
+        return values
+    low, high = values.min(), values.max()
+    if high - low < 1e-12:
+        return np.zeros_like(values, dtype=float)
+    return (values - low) / (high - low)
+
+
+def combine_scores(vector: Sequence[Optional[float]], bm25: Sequence[float], vector_weight: float) -> np.ndarray:
+    """
+    Combined prefilter score per item, in retrieval order.
+
+    Args:
+        vector: Cosine similarity per item, or None where the item has no vector
+        bm25: BM25 score per item
+        vector_weight: Weight of the vector signal; BM25 gets 1 - vector_weight
+    """
+    n = len(bm25)
+    if n == 0:
+        return np.zeros(0)
+    # Items without a vector get a prior from their retrieval position instead
+    semantic = 1.0 - np.arange(n) / max(n - 1, 1)
+    known = np.array([v is not None for v in vector], dtype=bool)
+    if known.any():
+        semantic[known] = _scale(np.array([v for v in vector if v is not None], dtype=float))
+    return vector_weight * semantic + (1.0 - vector_weight) * _scale(np.asarray(bm25, dtype=float))
+
+
+def top_k_for_site(site: Any) -> int:
+    config = CONFIG.nlweb.ranking_prefilter
+    sites = site if isinstance(site, list) else [site]
+    overrides = [config.site_top_k[s] for s in sites if s in config.site_top_k]
+    return max(overrides) if overrides else config.top_k
+
+
+def _get_item_cache():
+    """The ingest embedding cache, opened on first use; None if it is disabled or unavailable."""
+    global _item_cache
+    config = getattr(CONFIG, "embedding_dedup", None)
+    if config is None or not config.enabled:
+        return None
+    with _item_cache_lock:
+        if _item_cache is None:
+            try:
+                _item_cache = EmbeddingDedupCache(config.path, config.max_entries)
+            except Exception as e:
+                logger.warning(f"Ingest embedding cache unavailable for the prefilter: {e}")
+                _item_cache = False
+        return _item_cache or None
+
+
+async def _item_vectors(json_strs: List[Any], embed_missing: bool) -> List[Optional[List[float]]]:
+    """Vectors for the items as stored at ingestion time, keyed by their JSON text."""
+    cache = _get_item_cache()
+    texts = [s if isinstance(s, str) else json.dumps(s) for s in json_strs]
+    provider = CONFIG.preferred_embedding_provider
+    provider_config = CONFIG.get_embedding_provider(provider)
+    model = provider_config.model if provider_config else None
+    if cache is None:
+        if not embed_missing:
+            return [None] * len(texts)
+        return await batch_get_embeddings(texts, provider, model)
+    if embed_missing:
+        return await cache.embed(texts, lambda missing: batch_get_embeddings(missing, provider, model),
+                                 provider, model)
+    keys = [content_key(provider, model or "", text) for text in texts]
+    found = await cache.get_many(list(set(keys)))
+    return [found.get(key) for key in keys]
+
+
+def _cosine(query: np.ndarray, vectors: List[Optional[List[float]]]) -> List[Optional[float]]:
+    rows = [i for i, v in enumerate(vectors) if v is not None and len(v) == len(query)]
+    scores: List[Optional[float]] = [None] * len(vectors)
+    if rows:
+        matrix = np.asarray([vectors[i] for i in rows], dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        for i, score in zip(rows, matrix @ query):
+            scores[i] = float(score)
+    return scores
+
+
+class RankingPrefilter:
+    """Scores a handler's retrieved items and keeps the best top_k for LLM ranking."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.config = CONFIG.nlweb.ranking_prefilter
+        self.query = getattr(handler, "decontextualized_query", "") or handler.query
+        self.signals: Dict[str, Dict[str, Any]] = {}
+
+    async def _vector_scores(self, items) -> List[Optional[float]]:
+        # Retrieval scores are only comparable within one endpoint; use them when they all come from one
+        scores = [getattr(item, "score", None) for item in items]
+        endpoints = {getattr(item, "endpoint", None) for item in items}
+        if items and None not in scores and len(endpoints) == 1:
+            return scores
+        try:
+            embedding = await get_embedding(self.query, query_params=self.handler.query_params)
+            query = np.asarray(embedding, dtype=np.float32)
+            query /= max(float(np.linalg.norm(query)), 1e-12)
+            vectors = await _item_vectors([item[1] for item in items], self.config.embed_items)
+            return _cosine(query, vectors)
+        except Exception as e:
+            logger.warning(f"Prefilter falling back to retrieval order for the vector signal: {e}")
+            return [None] * len(items)
+
+    async def score(self, items) -> np.ndarray:
+        """Combined score per item. Also keeps each item's signals for recording."""
+        vector = await self._vector_scores(items)
+        bm25 = bm25_scores(self.query, [item_text(item[1]) for item in items])
+        for rank, (item, v, b) in enumerate(zip(items, vector, bm25)):
+            self.signals[item[0]] = {"rank": rank, "vector": v, "bm25": float(b)}
+        return combine_scores(vector, bm25, self.config.vector_weight)
+
+    async def select(self, items):
+        """
+        Return the top_k items by prefilter score, in their retrieval order. While
+        recording, items are scored but none are dropped, so every one gets an LLM score.
+        """
+        top_k = top_k_for_site(self.handler.site)
+        recording = bool(self.config.record_path)
+        cut = self.config.enabled and not recording and len(items) > top_k
+        if not cut and not recording:
+            return items
+        start = time.perf_counter()
+        scores = await self.score(items)
+        if not cut:
+            return items
+        keep = np.sort(np.argsort(-scores, kind="stable")[:top_k])
+        logger.info(f"Prefilter kept {len(keep)} of {len(items)} items for LLM ranking "
+                    f"in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return [items[i] for i in keep]
+
+    def record(self, ranked_answers: List[Dict[str, Any]]) -> None:
+        """Append this query's candidates, signals and LLM scores to record_path."""
+        if not self.config.record_path or not self.signals:
+            return
+        llm_scores = {answer["url"]: answer["ranking"].get("score") for answer in ranked_answers}
+        entry = {
+            "query": self.query,
+            "site": self.handler.site,
+            "items": [dict(signals, url=url, llm_score=llm_scores.get(url))
+                      for url, signals in sorted(self.signals.items(), key=lambda kv: kv[1]["rank"])],
+        }
+        try:
+            with _record_lock, open(self.config.record_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except Exception as e:
+            logger.warning(f"Failed to record prefilter candidates: {e}")
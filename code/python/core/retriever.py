@@ -20,6 +20,9 @@ from core.utils.utils import get_param
 from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
 from core.utils.json_utils import merge_json_array
+from core.site_index import SiteRoutingIndex
+from core.search_result import SearchResult
+from core.utils.latency import LatencyTracker
 
 logger = get_configured_logger("retriever")
 
@@ -30,6 +33,187 @@ _client_cache_lock = asyncio.Lock()
 # Preloaded client modules
 _preloaded_modules = {}
 
+# Process-level registry of VectorDBClient instances, keyed by resolved endpoint name
+# (None means "all enabled endpoints")
+_vector_db_clients: Dict[Optional[str], "VectorDBClient"] = {}
+
+# Site routing index shared by all clients, created on first use
+_site_index: Optional[SiteRoutingIndex] = None
+_sites_refresh_tasks: Dict[str, asyncio.Task] = {}
+# When site discovery last failed per endpoint; kept in memory only, so a failure is never persisted
+_sites_failed_at: Dict[str, float] = {}
+
+
+def get_site_index() -> SiteRoutingIndex:
+    """Return the process-wide site routing index, (re)loading the persisted copy when it changes."""
+    global _site_index
+    if _site_index is None:
+        _site_index = SiteRoutingIndex(getattr(CONFIG, "site_index_path", None))
+    else:
+        _site_index.reload_if_changed()
+    return _site_index
+
+# Search latency per endpoint, used to order replicas and pick hedge delays
+_endpoint_latency = LatencyTracker()
+_HEDGE_MIN_SAMPLES = 10
+_DEFAULT_HEDGE_DELAY = 1.0
+
+# Per-endpoint concurrency limiters, shared by every VectorDBClient in the process
+_endpoint_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def _get_endpoint_semaphore(endpoint_name: str) -> Optional[asyncio.Semaphore]:
+    """Return the limiter for an endpoint, or None if its max_concurrency is unset."""
+    endpoint_config = CONFIG.retrieval_endpoints.get(endpoint_name)
+    limit = endpoint_config.max_concurrency if endpoint_config else None
+    if not limit:
+        return None
+    semaphore = _endpoint_semaphores.get(endpoint_name)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(limit)
+        _endpoint_semaphores[endpoint_name] = semaphore
+    return semaphore
+
+
+async def _run_limited(endpoint_name: str, coro):
+    """Await coro, holding the endpoint's concurrency slot if one is configured."""
+    semaphore = _get_endpoint_semaphore(endpoint_name)
+    if semaphore is None:
+        return await coro
+    async with semaphore:
+        return await coro
+
+
+def _get_endpoint_timeout(endpoint_name: str) -> Optional[float]:
+    """Per-endpoint search deadline in seconds, falling back to the global endpoint_timeout."""
+    endpoint_config = CONFIG.retrieval_endpoints.get(endpoint_name)
+    if endpoint_config and endpoint_config.timeout:
+        return endpoint_config.timeout
+    return getattr(CONFIG, "retrieval_endpoint_timeout", None)
+
+
+async def _search_endpoint(endpoint_name: str, coro) -> Tuple[str, Any]:
+    """
+    Run one endpoint's search under its concurrency limit and deadline, recording its latency.
+    
+    Returns:
+        (endpoint_name, results), or (endpoint_name, exception) if the search failed or timed out
+    """
+    start = time.perf_counter()
+    try:
+        timeout = _get_endpoint_timeout(endpoint_name)
+        result = await asyncio.wait_for(_run_limited(endpoint_name, coro), timeout)
+        _endpoint_latency.record(endpoint_name, time.perf_counter() - start)
+        return endpoint_name, result
+    except asyncio.CancelledError:
+        # Lost a hedge race or the retrieval deadline. The elapsed time is only a lower
+        # bound on the latency, so it is recorded only when it is above the current
+        # estimate; a hedge cancelled soon after it started would drag the estimate down.
+        elapsed = time.perf_counter() - start
+        estimate = _endpoint_latency.ewma(endpoint_name)
+        if estimate is not None and elapsed > estimate:
+            _endpoint_latency.record(endpoint_name, elapsed)
+        raise
+    except Exception as e:
+        if isinstance(e, asyncio.TimeoutError):
+            _endpoint_latency.record(endpoint_name, time.perf_counter() - start)
+        return endpoint_name, e
+
+
+def _group_replicas(endpoint_names: List[str]) -> List[List[str]]:
+    """
+    Group endpoints with their replicas (replica_of in config_retrieval.yaml).
+    A replica whose primary is not among endpoint_names is searched on its own.
+    """
+    groups: Dict[str, List[str]] = {}
+    for name in endpoint_names:
+        endpoint_config = CONFIG.retrieval_endpoints.get(name)
+        primary = endpoint_config.replica_of if endpoint_config else None
+        key = primary if primary in endpoint_names else name
+        groups.setdefault(key, []).append(name)
+    return list(groups.values())
+
+
+def _hedge_delay(endpoint_name: str) -> float:
+    """How long to wait on an endpoint before hedging the request to a replica."""
+    delay = _endpoint_latency.percentile(
+        endpoint_name, getattr(CONFIG, "hedge_percentile", 95), min_samples=_HEDGE_MIN_SAMPLES)
+    return delay if delay is not None else _DEFAULT_HEDGE_DELAY
+
+
+async def _search_replica_group(group: List[str], make_search) -> Tuple[str, Any]:
+    """
+    Search one group of replicas and return the first successful answer.
+    
+    The replica with the lowest latency EWMA is asked first. If it has not answered
+    after its hedge delay (the configured percentile of its latency), the next replica
+    is asked too; a failure moves on to the next replica immediately. Losers are cancelled.
+    
+    Returns:
+        (endpoint_name, results), or (endpoint_name, exception) if every replica failed
+    """
+    if len(group) == 1:
+        return await _search_endpoint(group[0], make_search(group[0]))
+    
+    # Endpoints with no latency data yet sort first, so every replica gets sampled
+    ordered = sorted(group, key=lambda name: _endpoint_latency.ewma(name) or 0.0)
+    pending = set()
+    last_result: Tuple[str, Any] = (ordered[0], ValueError("No replica answered"))
+    next_index = 0
+    
+    def launch():
+        nonlocal next_index
+        name = ordered[next_index]
+        next_index += 1
+        pending.add(asyncio.create_task(_search_endpoint(name, make_search(name))))
+        return name
+    
+    try:
+        last_launched = launch()
+        while pending:
+            hedge_after = _hedge_delay(last_launched) if next_index < len(ordered) else None
+            done, _ = await asyncio.wait(pending, timeout=hedge_after, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                logger.info(f"Hedging search from {last_launched} to {ordered[next_index]} after {hedge_after:.2f}s")
+                last_launched = launch()
+                continue
+            for task in done:
+                pending.discard(task)
+                name, result = task.result()
+                if result is not None and not isinstance(result, Exception):
+                    return name, result
+                last_result = (name, result)
+                if next_index < len(ordered):
+                    last_launched = launch()
+        return last_result
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _send_retrieval_partial(handler, query: str, site, missing_endpoints: List[str], deadline: float):
+    """Tell the client that results are partial because some endpoints missed the retrieval deadline."""
+    if not (handler and hasattr(handler, 'http_handler') and hasattr(handler.http_handler, 'write_stream')):
+        return
+    message = {
+        "message_type": "retrieval_partial",
+        "query": query,
+        "site": site,
+        "missing_endpoints": missing_endpoints,
+        "deadline": deadline,
+        "query_id": getattr(handler, 'query_id', None)
+    }
+    try:
+        await handler.http_handler.write_stream(message)
+    except Exception as e:
+        logger.warning(f"Failed to send retrieval partial message: {e}")
+
+
+def get_retrieval_latency_stats() -> Dict[str, Any]:
+    """Per-endpoint search latency (EWMA and percentiles), for the metrics endpoint."""
+    return _endpoint_latency.snapshot()
+
+
 def init():
     """Initialize retrieval clients based on configuration."""
     # Preload modules for enabled endpoints
@@ -65,6 +249,9 @@ def init():
                 elif db_type == "shopify_mcp":
                     from retrieval_providers.shopify_mcp import ShopifyMCPClient
                     _preloaded_modules[db_type] = ShopifyMCPClient
+                elif db_type == "local_index":
+                    from retrieval_providers.local_index_client import LocalVectorIndexClient
+                    _preloaded_modules[db_type] = LocalVectorIndexClient
                 
             except Exception as e:
                 logger.warning(f"Failed to preload {db_type} client module: {e}")
@@ -79,8 +266,12 @@ _db_type_packages = {
     "elasticsearch": ["elasticsearch[async]>=8,<9"],
     "postgres": ["psycopg", "psycopg[binary]>=3.1.12", "psycopg[pool]>=3.2.0", "pgvector>=0.4.0"],
     "shopify_mcp": ["aiohttp>=3.8.0"],
+    "local_index": ["numpy"],
 }
 
+# Backends that embed the query themselves and accept a precomputed query_embedding
+_embedding_db_types = {"azure_ai_search", "milvus", "opensearch", "qdrant", "elasticsearch", "postgres", "local_index"}
+
 # Cache for installed packages
 _installed_packages = set()
 
@@ -229,6 +420,36 @@ class VectorDBClientInterface(ABC):
         return None
 
 
+def _resolve_endpoint_name(endpoint_name: Optional[str], query_params: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Apply the development-mode 'db' / 'retrieval_backend' query parameter override.
+    
+    Args:
+        endpoint_name: Endpoint requested by the caller, if any
+        query_params: Optional query parameters from the HTTP request
+        
+    Returns:
+        The endpoint name to use, or None for all enabled endpoints
+    """
+    if CONFIG.is_development_mode() and query_params:
+        # Check for 'db' or 'retrieval_backend' parameter
+        param_endpoint = query_params.get('db') or query_params.get('retrieval_backend')
+        if param_endpoint:
+            # Handle case where param_endpoint might be a list
+            if isinstance(param_endpoint, list):
+                if len(param_endpoint) > 0:
+                    param_endpoint = param_endpoint[0]
+                    logger.warning(f"Development mode: 'db' parameter was a list, using first element: {param_endpoint}")
+                else:
+                    logger.error("Development mode: 'db' parameter is an empty list")
+                    param_endpoint = None
+            
+            if param_endpoint:
+                logger.info(f"Development mode: Using database endpoint from params: {param_endpoint}")
+                endpoint_name = param_endpoint
+    return endpoint_name
+
+
 class VectorDBClient:
     """
     Unified client for vector database operations. This class routes operations to the appropriate
@@ -247,23 +468,8 @@ class VectorDBClient:
         self.endpoint_name = endpoint_name  # Store the endpoint name
         self.db_type = None  # Will be set based on the primary endpoint
         
-        # In development mode, check if query_params specifies a database endpoint
-        if CONFIG.is_development_mode() and self.query_params:
-            # Check for 'db' or 'retrieval_backend' parameter
-            param_endpoint = self.query_params.get('db') or self.query_params.get('retrieval_backend')
-            if param_endpoint:
-                # Handle case where param_endpoint might be a list
-                if isinstance(param_endpoint, list):
-                    if len(param_endpoint) > 0:
-                        param_endpoint = param_endpoint[0]
-                        logger.warning(f"Development mode: 'db' parameter was a list, using first element: {param_endpoint}")
-                    else:
-                        logger.error("Development mode: 'db' parameter is an empty list")
-                        param_endpoint = None
-                
-                if param_endpoint:
-                    logger.info(f"Development mode: Using database endpoint from params: {param_endpoint}")
-                    endpoint_name = param_endpoint
+        # In development mode, query_params may select a database endpoint
+        endpoint_name = _resolve_endpoint_name(endpoint_name, self.query_params)
         
         # If specific endpoint requested, validate and use it
         if endpoint_name:
@@ -327,41 +533,73 @@ class VectorDBClient:
         else:
             logger.warning("No write endpoint configured - write operations will fail")
         
-        self._retrieval_lock = asyncio.Lock()
-        
-        # Cache for endpoint sites - will be populated lazily
-        self._endpoint_sites_cache: Dict[str, Optional[List[str]]] = {}
+        self._write_lock = asyncio.Lock()
         
     
-    async def _get_endpoint_sites(self, endpoint_name: str) -> Optional[List[str]]:
+    async def _get_endpoint_sites(self, endpoint_name: str) -> Optional[frozenset]:
         """
-        Get the list of sites available in an endpoint, with caching.
+        Get the set of sites available in an endpoint from the site routing index.
+        
+        Only the first lookup for an endpoint that is not in the (persisted) index waits
+        on the backend. After that the indexed set, kept current by uploads and deletes
+        (including the data loader's), is returned immediately. It is reconciled with the
+        backend in the background once it is older than sites_cache_ttl, which picks up
+        sites written by anything else, such as replication into a replica endpoint.
         
         Args:
             endpoint_name: Name of the endpoint
             
         Returns:
-            List of site names if supported, None if not supported by this backend.
+            Set of site names if supported, None if not supported by this backend
+            or its sites are not known yet.
         """
-        # Return cached value if available
-        if endpoint_name in self._endpoint_sites_cache:
-            return self._endpoint_sites_cache[endpoint_name]
+        entry = get_site_index().get(endpoint_name)
+        failed_at = _sites_failed_at.get(endpoint_name)
+        if entry is None and failed_at is None:
+            return await asyncio.shield(self._start_sites_refresh(endpoint_name))
         
+        # A failed discovery is retried no sooner than a successful one is repeated
+        checked_at = max(entry[0] if entry is not None else 0.0, failed_at or 0.0)
+        if time.time() - checked_at > CONFIG.sites_cache_ttl:
+            self._start_sites_refresh(endpoint_name)
+        return entry[1] if entry is not None else None
+    
+    def _start_sites_refresh(self, endpoint_name: str) -> asyncio.Task:
+        """Start (or join) the single in-flight site discovery for an endpoint."""
+        task = _sites_refresh_tasks.get(endpoint_name)
+        if task is None or task.done():
+            task = asyncio.create_task(self._refresh_endpoint_sites(endpoint_name))
+            _sites_refresh_tasks[endpoint_name] = task
+        return task
+    
+    async def _refresh_endpoint_sites(self, endpoint_name: str) -> Optional[frozenset]:
+        """
+        Query the backend for its sites and store the result in the site routing index.
+        A failed query leaves the index as it is.
+        """
         try:
             client = await self.get_client(endpoint_name)
             sites = await client.get_sites()
-            self._endpoint_sites_cache[endpoint_name] = sites
+            sites = frozenset(sites) if sites is not None else None
             if sites:
-                logger.info(f"Endpoint {endpoint_name} has {len(sites)} sites: {sites[:5]}{'...' if len(sites) > 5 else ''}")
+                logger.info(f"Endpoint {endpoint_name} has {len(sites)} sites: {sorted(sites)[:5]}{'...' if len(sites) > 5 else ''}")
             else:
                 logger.info(f"Endpoint {endpoint_name} returned empty sites list")
-            return sites
         except Exception as e:
-            # Any error means the backend doesn't support get_sites or it failed
+            _sites_failed_at[endpoint_name] = time.time()
+            previous = get_site_index().get(endpoint_name)
+            if previous is not None:
+                # Keep serving the last known sites rather than dropping the endpoint
+                logger.warning(f"Refreshing sites for endpoint {endpoint_name} failed, keeping cached list: {e}")
+                return previous[1]
+            # Query the endpoint for every site until discovery succeeds
             logger.error(f"Backend for endpoint {endpoint_name} does not support get_sites() or it failed: {e}", exc_info=True)
-            # Cache None to indicate unsupported
-            self._endpoint_sites_cache[endpoint_name] = None
             return None
+        _sites_failed_at.pop(endpoint_name, None)
+        site_index = get_site_index()
+        site_index.set(endpoint_name, sites)
+        await asyncio.to_thread(site_index.save)
+        return sites
     
     async def _endpoint_has_site(self, endpoint_name: str, site: Union[str, List[str]]) -> bool:
         """
@@ -396,11 +634,7 @@ class VectorDBClient:
             sites_to_check = site
         
         # Check if any requested site is available in the endpoint
-        for site_name in sites_to_check:
-            if site_name in endpoint_sites:
-                return True
-        
-        return False
+        return not endpoint_sites.isdisjoint(sites_to_check)
     
     def _has_valid_credentials(self, name: str, config) -> bool:
         """
@@ -433,6 +667,9 @@ class VectorDBClient:
         elif db_type == "shopify_mcp":
             # Shopify MCP doesn't require authentication
             return True
+        elif db_type == "local_index":
+            # The in-process index only needs a directory for its partitions
+            return bool(config.database_path)
         else:
             logger.warning(f"Unknown database type {db_type} for endpoint {name}")
             return False
@@ -457,6 +694,11 @@ class VectorDBClient:
         # Use cache key combining db_type and endpoint
         cache_key = f"{db_type}_{endpoint_name}"
         
+        # Fast path: no lock needed once the client exists
+        client = _client_cache.get(cache_key)
+        if client is not None:
+            return client
+        
         # Check if client already exists in cache
         async with _client_cache_lock:
             if cache_key in _client_cache:
@@ -497,6 +739,9 @@ class VectorDBClient:
                 elif db_type == "shopify_mcp":
                     from retrieval_providers.shopify_mcp import ShopifyMCPClient
                     client = ShopifyMCPClient(endpoint_name)
+                elif db_type == "local_index":
+                    from retrieval_providers.local_index_client import LocalVectorIndexClient
+                    client = LocalVectorIndexClient(endpoint_name)
                 else:
                     error_msg = f"Unsupported database type: {db_type}"
                     logger.error(error_msg)
@@ -534,104 +779,60 @@ class VectorDBClient:
         # Return deduplicated results
         return list(url_to_result.values())
     
-    def _aggregate_results(self, endpoint_results: Dict[str, List[List[str]]]) -> List[List[str]]:
+    def _aggregate_results(self, endpoint_results: Dict[str, List[List[str]]],
+                           num_results: Optional[int] = None) -> List[SearchResult]:
         """
         Aggregate results from multiple endpoints, merging JSON data for duplicate URLs.
         
         When the same URL appears in multiple endpoints, the JSON data (second element)
-        from each source is merged into a single array.
+        from each source is merged into a single array. The endpoints' lists are
+        interleaved to preserve relevance ordering; a URL takes the score and endpoint
+        of the copy that comes first in that order.
         
         Args:
             endpoint_results: Dictionary mapping endpoint names to their results
+            num_results: Optional cap on the number of results returned
             
         Returns:
             Aggregated results with merged JSON for duplicate URLs
         """
-        # Dictionary to store aggregated data by URL
-        # Format: {url: {"result": [url, json_array, name, site], "sources": [json1, json2...]}}
-        url_to_data = {}
-        
-        # First pass: collect all results and group by URL
+        # Collect the JSON of every copy of each URL
+        json_lists: Dict[str, List[str]] = {}
         for endpoint_name, results in endpoint_results.items():
             if results:
                 logger.debug(f"Got {len(results)} results from {endpoint_name}")
-                
                 for result in results:
-                    if len(result) >= 4:  # Ensure we have [url, json, name, site]
-                        url = result[0]
-                        json_data = result[1]
-                        name = result[2]
-                        site = result[3]
-                        
-                        if url not in url_to_data:
-                            # First occurrence of this URL
-                            url_to_data[url] = {
-                                "url": url,
-                                "json_list": [json_data] if json_data else [],
-                                "name": name,
-                                "site": site,
-                                "first_endpoint": endpoint_name
-                            }
-                        else:
-                            # URL already seen, append JSON data
-                            if json_data:
-                                url_to_data[url]["json_list"].append(json_data)
-        
-        # Second pass: build final results maintaining order from first endpoint
-        # We'll interleave to preserve relevance ordering
+                    if len(result) >= 4 and result[0]:  # Ensure we have [url, json, name, site]
+                        json_list = json_lists.setdefault(result[0], [])
+                        if result[1]:
+                            json_list.append(result[1])
+        
+        # Interleave the endpoints' lists, merging JSON only for the URLs that are kept
         final_results = []
         seen_urls = set()
-        
-        # Create iterators for each endpoint's results
-        iterators = {}
-        for endpoint_name, results in endpoint_results.items():
-            if results:
-                iterators[endpoint_name] = iter(results)
-        
-        # Interleave results to maintain relevance ordering
-        while iterators:
-            endpoints_to_remove = []
-            
-            for endpoint_name, iterator in iterators.items():
-                try:
-                    result = next(iterator)
-                    if len(result) >= 1:
-                        url = result[0]
-                        if url and url not in seen_urls:
-                            seen_urls.add(url)
-                            # Get the aggregated data for this URL
-                            data = url_to_data.get(url)
-                            if data:
-                                # Merge JSON data if multiple sources
-                                json_list = data["json_list"]
-                                if len(json_list) > 1:
-                                    # Multiple sources - merge them
-                                    merged_json = merge_json_array(json_list)
-                                    # Convert back to JSON string
-                                    merged_json_str = json.dumps(merged_json)
-                                else:
-                                    # Single source - use as is
-                                    merged_json_str = json_list[0] if json_list else "{}"
-                                
-                                # Create result with merged JSON
-                                merged_result = [
-                                    data["url"],
-                                    merged_json_str,  # Single merged JSON string
-                                    data["name"],
-                                    data["site"]
-                                ]
-                                final_results.append(merged_result)
-                except StopIteration:
-                    endpoints_to_remove.append(endpoint_name)
-            
-            # Remove exhausted iterators
-            for endpoint in endpoints_to_remove:
-                del iterators[endpoint]
-        
-        # Calculate total results safely
-        total_results = sum(len(r) for r in endpoint_results.values() if r is not None)
-        logger.info(f"Aggregated {total_results} total results into {len(final_results)} unique URLs")
-        
+        iterators = [(endpoint_name, iter(results)) for endpoint_name, results in endpoint_results.items() if results]
+        while iterators and (num_results is None or len(final_results) < num_results):
+            remaining = []
+            for endpoint_name, iterator in iterators:
+                result = next(iterator, None)
+                if result is None:
+                    continue
+                remaining.append((endpoint_name, iterator))
+                if len(result) < 4 or not result[0] or result[0] in seen_urls:
+                    continue
+                url, name, site = result[0], result[2], result[3]
+                seen_urls.add(url)
+                json_list = json_lists[url]
+                if len(json_list) > 1:
+                    # Multiple sources - merge them into a single JSON string
+                    merged_json_str = json.dumps(merge_json_array(json_list))
+                else:
+                    merged_json_str = json_list[0] if json_list else "{}"
+                final_results.append(SearchResult(url, merged_json_str, name, site,
+                                                  getattr(result, "score", None), endpoint_name))
+                if num_results is not None and len(final_results) >= num_results:
+                    break
+            iterators = remaining
         return final_results
     
     async def delete_documents_by_site(self, site: str, **kwargs) -> int:
@@ -648,13 +849,16 @@ class VectorDBClient:
         if not self.write_endpoint:
             raise ValueError("No write endpoint configured for delete operations")
             
-        async with self._retrieval_lock:
+        async with self._write_lock:
             logger.info(f"Deleting documents for site: {site} using write endpoint: {self.write_endpoint}")
             
             try:
                 client = await self.get_client(self.write_endpoint)
                 count = await client.delete_documents_by_site(site, **kwargs)
                 logger.info(f"Successfully deleted {count} documents for site: {site}")
+                site_index = get_site_index()
+                if site_index.remove_site(self.write_endpoint, site):
+                    await asyncio.to_thread(site_index.save)
                 return count
             except Exception as e:
                 logger.exception(f"Error deleting documents for site {site}: {e}")
@@ -684,13 +888,17 @@ class VectorDBClient:
         if not self.write_endpoint:
             raise ValueError("No write endpoint configured for upload operations")
             
-        async with self._retrieval_lock:
+        async with self._write_lock:
             logger.info(f"Uploading {len(documents)} documents to write endpoint: {self.write_endpoint}")
             
             try:
                 client = await self.get_client(self.write_endpoint)
                 count = await client.upload_documents(documents, **kwargs)
                 logger.info(f"Successfully uploaded {count} documents")
+                # Keep the routing index current so the new sites are searchable without a rescan
+                site_index = get_site_index()
+                if site_index.add_sites(self.write_endpoint, (doc.get("site") for doc in documents)):
+                    await asyncio.to_thread(site_index.save)
                 return count
             except Exception as e:
                 logger.exception(f"Error uploading documents: {e}")
@@ -706,8 +914,21 @@ class VectorDBClient:
                 )
                 raise
     
+    async def _embed_query(self, query: str, query_params: Optional[Dict[str, Any]] = None) -> Optional[List[float]]:
+        """
+        Compute the query embedding once for all vector backends.
+        
+        Returns None if embedding fails, in which case each backend embeds the query itself.
+        """
+        from core.embedding import get_embedding
+        try:
+            return await get_embedding(query, query_params=query_params)
+        except Exception as e:
+            logger.warning(f"Shared query embedding failed, backends will embed individually: {e}")
+            return None
+    
     async def search(self, query: str, site: Union[str, List[str]], 
-                    num_results: int = 50, endpoint_name: Optional[str] = None, **kwargs) -> List[List[str]]:
+                    num_results: int = 50, endpoint_name: Optional[str] = None, **kwargs) -> List[SearchResult]:
         """
         Search for documents matching the query and site.
         
@@ -719,7 +940,8 @@ class VectorDBClient:
             **kwargs: Additional parameters
             
         Returns:
-            List of search results
+            List of SearchResult, which unpack as [url, json, name, site] and carry
+            the backend's score and the endpoint name
         """
         # Handle configured sites
         if site == "all":
@@ -732,7 +954,7 @@ class VectorDBClient:
         if endpoint_name:
             if endpoint_name not in CONFIG.retrieval_endpoints:
                 raise ValueError(f"Invalid endpoint: {endpoint_name}")
-            temp_client = VectorDBClient(endpoint_name=endpoint_name)
+            temp_client = get_vector_db_client(endpoint_name=endpoint_name)
             return await temp_client.search(query, site, num_results, **kwargs)
         
         # Process site parameter for consistency
@@ -742,98 +964,117 @@ class VectorDBClient:
         elif isinstance(site, str):
             site = site.replace(" ", "_")
 
-        async with self._retrieval_lock:
-            logger.info(f"Searching for '{query[:50]}...' in site: {site}, num_results: {num_results}")
-            logger.info(f"Querying {len(self.enabled_endpoints)} enabled endpoints in parallel")
-            start_time = time.time()
-            
-            # Create tasks for parallel queries to endpoints that have the requested site
-            tasks = []
-            endpoint_names = []
-            skipped_endpoints = []
-            
-            for endpoint_name in self.enabled_endpoints:
-                try:
-                    # Check if endpoint has data for the requested site
-                    if not await self._endpoint_has_site(endpoint_name, site):
-                        skipped_endpoints.append(endpoint_name)
-                        continue
-                    
-                    client = await self.get_client(endpoint_name)
-                    
-                    # Use search_all_sites if site is "all"
-                    if site == "all":
-                        task = asyncio.create_task(client.search_all_sites(query, num_results, **kwargs))
-                    else:
-                        # For Shopify MCP, always go through the rewrite wrapper
-                        if type(client).__name__ == 'ShopifyMCPClient':
-                            # Extract handler from kwargs for rewriting
-                            handler_for_rewrite = kwargs.pop('handler', None)  # Remove handler from kwargs
-                            # Use the rewrite wrapper for Shopify MCP
-                            task = asyncio.create_task(
-                                search_with_rewrite(client, query, site, num_results, handler_for_rewrite, **kwargs)
-                            )
-                        else:
-                            # Regular search for other backends
-                            # Remove handler from kwargs if present (some backends don't accept it)
-                            search_kwargs = kwargs.copy()
-                            search_kwargs.pop('handler', None)
-                            task = asyncio.create_task(client.search(query, site, num_results, **search_kwargs))
-                    tasks.append(task)
-                    endpoint_names.append(endpoint_name)
-                except Exception as e:
-                    logger.warning(f"Failed to create search task for endpoint {endpoint_name}: {e}")
-            
-            if skipped_endpoints:
-                logger.debug(f"Skipped endpoints without site '{site}': {skipped_endpoints}")
-            
-            if not tasks:
-                raise ValueError("No valid endpoints available for search")
-            
-            # Execute all searches in parallel and collect results
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Process results and handle failures gracefully
-            endpoint_results = {}
-            successful_endpoints = 0
+        logger.info(f"Searching for '{query[:50]}...' in site: {site}, num_results: {num_results}")
+        logger.info(f"Querying {len(self.enabled_endpoints)} enabled endpoints in parallel")
+        start_time = time.time()
+        
+        # Pick the endpoints that have the requested site
+        selected_endpoints = []
+        skipped_endpoints = []
+        query_embedding = kwargs.pop('query_embedding', None)
+        handler = kwargs.pop('handler', None)
+        
+        for endpoint_name in self.enabled_endpoints:
+            try:
+                if await self._endpoint_has_site(endpoint_name, site):
+                    selected_endpoints.append(endpoint_name)
+                else:
+                    skipped_endpoints.append(endpoint_name)
+            except Exception as e:
+                logger.warning(f"Failed to check sites for endpoint {endpoint_name}: {e}")
+        
+        if skipped_endpoints:
+            logger.debug(f"Skipped endpoints without site '{site}': {skipped_endpoints}")
+        
+        if not selected_endpoints:
+            raise ValueError("No valid endpoints available for search")
+        
+        # Embed the query once and share the vector across all vector backends
+        if query_embedding is None and any(
+                self.enabled_endpoints[name].db_type in _embedding_db_types for name in selected_endpoints):
+            query_embedding = await self._embed_query(query, kwargs.get('query_params'))
+        
+        async def endpoint_search(endpoint_name: str):
+            client = await self.get_client(endpoint_name)
+            endpoint_kwargs = kwargs
+            if query_embedding is not None and self.enabled_endpoints[endpoint_name].db_type in _embedding_db_types:
+                endpoint_kwargs = {**kwargs, 'query_embedding': query_embedding}
             
-            for endpoint_name, result in zip(endpoint_names, results):
-                if isinstance(result, Exception):
+            # Use search_all_sites if site is "all"
+            if site == "all":
+                return await client.search_all_sites(query, num_results, **endpoint_kwargs)
+            # For Shopify MCP, always go through the rewrite wrapper
+            if type(client).__name__ == 'ShopifyMCPClient':
+                return await search_with_rewrite(client, query, site, num_results, handler, **kwargs)
+            return await client.search(query, site, num_results, **endpoint_kwargs)
+        
+        # Replicas of the same index form one group: only the fastest is asked, and the
+        # others are hedged in if it is slow. Each group runs under its own deadline.
+        groups = _group_replicas(selected_endpoints)
+        tasks = [asyncio.create_task(_search_replica_group(group, endpoint_search)) for group in groups]
+        
+        # Collect group results as they arrive, until the global retrieval deadline
+        endpoint_results: Dict[str, List[List[str]]] = {}
+        successful_endpoints = 0
+        pending = set(tasks)
+        deadline = getattr(CONFIG, "retrieval_deadline", None)
+        deadline_at = start_time + deadline if deadline else None
+        
+        while pending:
+            timeout = None
+            if deadline_at is not None and successful_endpoints > 0:
+                timeout = max(0.0, deadline_at - time.time())
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            for task in done:
+                endpoint_name, result = task.result()
+                if isinstance(result, asyncio.TimeoutError):
+                    logger.warning(f"Search timed out for endpoint {endpoint_name} after "
+                                   f"{_get_endpoint_timeout(endpoint_name)}s, continuing without it")
+                elif isinstance(result, Exception):
                     logger.warning(f"Search failed for endpoint {endpoint_name}: {result}")
                 elif result is None:
                     logger.warning(f"Endpoint {endpoint_name} returned None, treating as empty results")
-                    endpoint_results[endpoint_name] = []
                 else:
                     endpoint_results[endpoint_name] = result
                     successful_endpoints += 1
-            
-            if successful_endpoints == 0:
-                raise ValueError("All endpoint searches failed")
-            
-            # Aggregate and deduplicate results
-            final_results = self._aggregate_results(endpoint_results)
-            
-            # Limit to requested number of results
-            # Results are already in relevance order from aggregation
-            final_results = final_results[:num_results]
-            
-            end_time = time.time()
-            search_duration = end_time - start_time
-            
-            logger.log_with_context(
-                LogLevel.INFO,
-                "Parallel search completed",
-                {
-                    "duration": f"{search_duration:.2f}s",
-                    "endpoints_queried": len(tasks),
-                    "endpoints_succeeded": successful_endpoints,
-                    "total_results": len(final_results),
-                    "site": site
-                }
-            )
-            
-            return final_results
-    
+        
+        if pending:
+            # Global deadline hit: return what we have and tell the client it is partial
+            missing = [name for task, group in zip(tasks, groups) if task in pending for name in group]
+            for task in pending:
+                task.cancel()
+            logger.warning(f"Retrieval deadline of {deadline}s reached, returning partial results without {missing}")
+            await _send_retrieval_partial(handler, query, site, missing, deadline)
+        
+        if successful_endpoints == 0:
+            raise ValueError("All endpoint searches failed")
+        
+        # Interleave in endpoint configuration order, so the order does not depend on which answered first
+        ordered_results = {name: endpoint_results[name] for name in self.enabled_endpoints if name in endpoint_results}
+        final_results = self._aggregate_results(ordered_results, num_results)
+        total_results = sum(len(results) for results in endpoint_results.values())
+        logger.info(f"Aggregated {total_results} total results into {len(final_results)} unique URLs")
+        
+        end_time = time.time()
+        search_duration = end_time - start_time
+        
+        logger.log_with_context(
+            LogLevel.INFO,
+            "Parallel search completed",
+            {
+                "duration": f"{search_duration:.2f}s",
+                "endpoints_queried": len(selected_endpoints),
+                "endpoints_succeeded": successful_endpoints,
+                "partial": bool(pending),
+                "total_results": len(final_results),
+                "site": site
+            }
+        )
+        
+        return final_results
+
     async def search_by_url(self, url: str, endpoint_name: Optional[str] = None, **kwargs) -> Optional[List[str]]:
         """
         Retrieve a document by its exact URL.
@@ -848,51 +1089,50 @@ class VectorDBClient:
         """
         # If endpoint is specified and different from current, create a new client for that endpoint
         if endpoint_name and endpoint_name != self.endpoint_name:
-            temp_client = VectorDBClient(endpoint_name=endpoint_name)
+            temp_client = get_vector_db_client(endpoint_name=endpoint_name)
             return await temp_client.search_by_url(url, **kwargs)
         
-        async with self._retrieval_lock:
-            logger.info(f"Retrieving item with URL: {url}")
+        logger.info(f"Retrieving item with URL: {url}")
+        
+        try:
+            # For single endpoint mode, use the first (and only) endpoint
+            if self.endpoint_name:
+                client = await self.get_client(self.endpoint_name)
+            else:
+                # Multiple endpoints - need to search all of them
+                for endpoint_name in self.enabled_endpoints:
+                    try:
+                        client = await self.get_client(endpoint_name)
+                        result = await client.search_by_url(url, **kwargs)
+                        if result:
+                            return result
+                    except Exception as e:
+                        logger.warning(f"Failed to search by URL in endpoint {endpoint_name}: {e}")
+                return None
             
-            try:
-                # For single endpoint mode, use the first (and only) endpoint
-                if self.endpoint_name:
-                    client = await self.get_client(self.endpoint_name)
-                else:
-                    # Multiple endpoints - need to search all of them
-                    for endpoint_name in self.enabled_endpoints:
-                        try:
-                            client = await self.get_client(endpoint_name)
-                            result = await client.search_by_url(url, **kwargs)
-                            if result:
-                                return result
-                        except Exception as e:
-                            logger.warning(f"Failed to search by URL in endpoint {endpoint_name}: {e}")
-                    return None
-                
-                result = await client.search_by_url(url, **kwargs)
-                
-                if result:
-                    logger.debug(f"Successfully retrieved item for URL: {url}")
-                else:
-                    logger.warning(f"No item found for URL: {url}")
-                
-                return result
-            except Exception as e:
-                logger.exception(f"Error retrieving item with URL: {url}")
-                logger.log_with_context(
-                    LogLevel.ERROR,
-                    "Item retrieval failed",
-                    {
-                        "error_type": type(e).__name__,
-                        "error_message": str(e),
-                        "url": url,
-                        "db_type": self.db_type,
-                        "endpoint": self.endpoint_name
-                    }
-                )
-                raise
-    
+            result = await client.search_by_url(url, **kwargs)
+            
+            if result:
+                logger.debug(f"Successfully retrieved item for URL: {url}")
+            else:
+                logger.warning(f"No item found for URL: {url}")
+            
+            return result
+        except Exception as e:
+            logger.exception(f"Error retrieving item with URL: {url}")
+            logger.log_with_context(
+                LogLevel.ERROR,
+                "Item retrieval failed",
+                {
+                    "error_type": type(e).__name__,
+                    "error_message": str(e),
+                    "url": url,
+                    "db_type": self.db_type,
+                    "endpoint": self.endpoint_name
+                }
+            )
+            raise
+
     async def search_all_sites(self, query: str, num_results: int = 50, 
                              endpoint_name: Optional[str] = None, **kwargs) -> List[List[str]]:
         """
@@ -927,68 +1167,70 @@ class VectorDBClient:
         """
         # If endpoint is specified and different from current, create a new client for that endpoint
         if endpoint_name and endpoint_name != self.endpoint_name:
-            temp_client = VectorDBClient(endpoint_name=endpoint_name)
+            temp_client = get_vector_db_client(endpoint_name=endpoint_name)
             return await temp_client.get_sites(**kwargs)
         
-        async with self._retrieval_lock:
-            logger.info("Retrieving list of sites from database")
+        logger.info("Retrieving list of sites from database")
+        
+        try:
+            # For single endpoint mode, use the first (and only) endpoint
+            if self.endpoint_name:
+                client = await self.get_client(self.endpoint_name)
+                sites = await client.get_sites(**kwargs)
+            else:
+                # Multiple endpoints - aggregate sites from all
+                all_sites = set()
+                for endpoint_name in self.enabled_endpoints:
+                    try:
+                        client = await self.get_client(endpoint_name)
+                        endpoint_sites = await client.get_sites(**kwargs)
+                        if endpoint_sites:  # Not None and not empty
+                            all_sites.update(endpoint_sites)
+                    except Exception as e:
+                        logger.warning(f"Failed to get sites from endpoint {endpoint_name}: {e}")
+                sites = list(all_sites)
             
-            try:
-                # For single endpoint mode, use the first (and only) endpoint
-                if self.endpoint_name:
-                    client = await self.get_client(self.endpoint_name)
-                    sites = await client.get_sites(**kwargs)
-                else:
-                    # Multiple endpoints - aggregate sites from all
-                    all_sites = set()
-                    for endpoint_name in self.enabled_endpoints:
-                        try:
-                            client = await self.get_client(endpoint_name)
-                            endpoint_sites = await client.get_sites(**kwargs)
-                            if endpoint_sites:  # Not None and not empty
-                                all_sites.update(endpoint_sites)
-                        except Exception as e:
-                            logger.warning(f"Failed to get sites from endpoint {endpoint_name}: {e}")
-                    sites = list(all_sites)
-                
-                # If backend doesn't support get_sites, it should return None
-                if sites is None:
-                    # Return empty list to indicate unknown sites
-                    logger.info(f"Backend doesn't support get_sites, will query for all sites")
-                    return []
-                
-                logger.log_with_context(
-                    LogLevel.INFO,
-                    "Sites retrieved",
-                    {
-                        "sites_count": len(sites),
-                        "db_type": self.db_type,
-                        "endpoint": self.endpoint_name
-                    }
-                )
-                return sites
-            except Exception as e:
-                # Backend doesn't support get_sites or error occurred
-                logger.info(f"Backend doesn't support get_sites or error occurred: {e}")
-                
-                # Return empty list to indicate unknown sites (will be queried for all)
-                logger.log_with_context(
-                    LogLevel.INFO,
-                    "Backend doesn't support get_sites, will query for all sites",
-                    {
-                        "db_type": self.db_type,
-                        "endpoint": self.endpoint_name,
-                        "error": str(e)
-                    }
-                )
+            # If backend doesn't support get_sites, it should return None
+            if sites is None:
+                # Return empty list to indicate unknown sites
+                logger.info(f"Backend doesn't support get_sites, will query for all sites")
                 return []
+            
+            logger.log_with_context(
+                LogLevel.INFO,
+                "Sites retrieved",
+                {
+                    "sites_count": len(sites),
+                    "db_type": self.db_type,
+                    "endpoint": self.endpoint_name
+                }
+            )
+            return sites
+        except Exception as e:
+            # Backend doesn't support get_sites or error occurred
+            logger.info(f"Backend doesn't support get_sites or error occurred: {e}")
+            
+            # Return empty list to indicate unknown sites (will be queried for all)
+            logger.log_with_context(
+                LogLevel.INFO,
+                "Backend doesn't support get_sites, will query for all sites",
+                {
+                    "db_type": self.db_type,
+                    "endpoint": self.endpoint_name,
+                    "error": str(e)
+                }
+            )
+            return []
 
 
 # Factory function to make it easier to get a client with the right type
 def get_vector_db_client(endpoint_name: Optional[str] = None, 
                         query_params: Optional[Dict[str, Any]] = None) -> VectorDBClient:
     """
-    Factory function to create a vector database client with the appropriate configuration.
+    Factory function to get a vector database client with the appropriate configuration.
+    
+    Clients are kept in a process-level registry, so configuration and credential
+    validation happen once per endpoint selection rather than on every request.
     
     Args:
         endpoint_name: Optional name of the endpoint to use
@@ -997,7 +1239,38 @@ def get_vector_db_client(endpoint_name: Optional[str] = None,
     Returns:
         Configured VectorDBClient instance
     """
-    return VectorDBClient(endpoint_name=endpoint_name, query_params=query_params)
+    resolved = _resolve_endpoint_name(endpoint_name, query_params)
+    if resolved is not None and not isinstance(resolved, str):
+        # Let the constructor report the invalid endpoint
+        return VectorDBClient(endpoint_name=resolved)
+    
+    client = _vector_db_clients.get(resolved)
+    if client is None:
+        client = VectorDBClient(endpoint_name=resolved)
+        _vector_db_clients[resolved] = client
+    return client
+
+
+def clear_vector_db_clients():
+    """Drop all registered clients and the in-memory site index, e.g. after the configuration changes."""
+    _vector_db_clients.clear()
+    global _site_index
+    _site_index = None
+    _sites_refresh_tasks.clear()
+    _sites_failed_at.clear()
+
+
+async def warm_site_cache():
+    """Populate the site membership cache for all enabled endpoints, so first queries don't pay for discovery."""
+    try:
+        client = get_vector_db_client()
+    except ValueError as e:
+        logger.warning(f"Skipping site cache warm-up: {e}")
+        return
+    await asyncio.gather(
+        *(client._get_endpoint_sites(name) for name in client.enabled_endpoints),
+        return_exceptions=True
+    )
 
 
 async def search_with_rewrite(client: VectorDBClientInterface, query: str, site: Union[str, List[str]], 
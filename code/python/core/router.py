@@ -19,6 +19,8 @@ from misc.logger.logging_config_helper import get_configured_logger
 from core.llm import ask_llm
 from core.config import CONFIG
 from core.prompts import fill_prompt
+from core.utils.utils import get_param
+from core.tool_index import preselect_tools, warm_tool_index
 logger = get_configured_logger("tool_selector")
 
 @dataclass
@@ -43,6 +45,10 @@ def init():
     _tools_cache[tools_xml_path] = tools
     
     logger.info(f"Loaded {len(tools)} tools")
+    
+    # Embed the tools for preselection now rather than on the first query
+    if hasattr(CONFIG, 'nlweb') and CONFIG.nlweb.tool_preselection.enabled:
+        warm_tool_index(tools)
     logger.info("Router initialization complete")
 
 def _load_tools_from_file(tools_xml_path: str) -> List[Tool]:
@@ -129,6 +135,19 @@ class ToolSelector:
     STEP_NAME = "ToolSelector"
     MIN_TOOL_SCORE_THRESHOLD = 70  # Minimum score required to select a tool
     
+    # Prompt for scoring all tools with one LLM call (tool_selection_mode: single_call).
+    # Each tool's own prompt, without its query line, is listed under its name.
+    SINGLE_CALL_PROMPT = """The user has the following query: {request.query}.
+
+Below are the tools that can handle queries on this site. For each tool, assign a score from 0 to 100
+for whether it is appropriate for the query, following the tool's own instructions, and provide the
+parameters it asks for. Score every tool independently of the others.
+Return one entry per tool, keyed by the tool's name.
+
+{tools.description}"""
+    SINGLE_CALL_PROMPT_NAME = "ToolSelectionPrompt"
+    SINGLE_CALL_TOKENS_PER_TOOL = 96
+    
     # Type hierarchy for schema.org types
     # TODO: This is a placeholder for now. We need to have a proper type hierarchy from schema.org
     TYPE_HIERARCHY = {
@@ -149,6 +168,12 @@ class ToolSelector:
     def __init__(self, handler):
         self.handler = handler
         self.handler.state.start_precheck_step(self.STEP_NAME)
+        self.single_call = CONFIG.is_single_call_tool_selection_enabled()
+        # In development mode, allow overriding the tool selection mode per request
+        if CONFIG.is_development_mode() and getattr(handler, 'query_params', None):
+            mode = get_param(handler.query_params, "tool_selection_mode", str, None)
+            if mode:
+                self.single_call = mode.lower() == "single_call"
         
         # Load tools if not already cached
         tools_xml_path = os.path.join(CONFIG.config_directory, "tools.xml")
@@ -312,8 +337,26 @@ class ToolSelector:
             # Get tools for this type
             tools = self.get_tools_by_type(schema_type)
             
-            # Evaluate tools with early termination strategy
-            tool_results = await self._evaluate_tools_with_early_termination(query, tools, threshold=90)
+            # Narrow the tools down by embedding similarity before asking the LLM
+            skip_llm = False
+            preselection = CONFIG.nlweb.tool_preselection
+            if preselection.enabled and len(tools) > 1:
+                tools_xml_path = os.path.join(CONFIG.config_directory, "tools.xml")
+                all_tools = _tools_cache.get(tools_xml_path, tools)
+                tools, skip_llm = await preselect_tools(query, tools, all_tools, preselection.top_k,
+                                                        preselection.search_margin,
+                                                        query_params=self.handler.query_params)
+                logger.info(f"Preselected tools: {[t.name for t in tools]}{' (LLM scoring skipped)' if skip_llm else ''}")
+            
+            if skip_llm:
+                # Search won by a clear margin, so it is used with the query as is
+                result = {"score": 100, "search_query": query, "justification": "Preselected by embedding similarity"}
+                tool_results = [{"tool": tools[0], "result": result, "score": 100}]
+            elif self.single_call:
+                tool_results = await self._evaluate_tools_in_one_call(query, tools)
+            else:
+                # Evaluate tools with early termination strategy
+                tool_results = await self._evaluate_tools_with_early_termination(query, tools, threshold=90)
             
             # Sort by score
             tool_results.sort(key=lambda x: x["score"], reverse=True)
@@ -324,20 +367,7 @@ class ToolSelector:
                 for i, result in enumerate(tool_results):
                     logger.info(f"  {result['tool'].name}: {result['score']}")
             
-            # Filter out tools below threshold
-            original_results = tool_results[:]
-            tool_results = [r for r in tool_results if r['score'] >= self.MIN_TOOL_SCORE_THRESHOLD]
-            
-            # If no tools meet threshold, fall back to search if available
-            if not tool_results and original_results:
-                logger.info(f"No tools meet minimum threshold of {self.MIN_TOOL_SCORE_THRESHOLD}, checking for search fallback")
-                # Look for search tool in original results
-                search_result = next((r for r in original_results if r['tool'].name == 'search'), None)
-                if search_result:
-                    logger.info(f"Falling back to search tool (score: {search_result['score']})")
-                    tool_results = [search_result]
-                else:
-                    logger.info("No search tool available as fallback")
+            tool_results = self.select_tools(tool_results)
             
             # Check if top tool is not search and abort fastTrack if needed
             if tool_results and tool_results[0]['tool'].name != 'search':
@@ -395,6 +425,65 @@ class ToolSelector:
             
             await self.handler.state.precheck_step_done(self.STEP_NAME)
     
+    @classmethod
+    def select_tools(cls, tool_results: List[dict]) -> List[dict]:
+        """Drop tool results (sorted by score) below the threshold, falling back to search if none is left."""
+        # Filter out tools below threshold
+        selected = [r for r in tool_results if r['score'] >= cls.MIN_TOOL_SCORE_THRESHOLD]
+        
+        # If no tools meet threshold, fall back to search if available
+        if not selected and tool_results:
+            logger.info(f"No tools meet minimum threshold of {cls.MIN_TOOL_SCORE_THRESHOLD}, checking for search fallback")
+            # Look for search tool in original results
+            search_result = next((r for r in tool_results if r['tool'].name == 'search'), None)
+            if search_result:
+                logger.info(f"Falling back to search tool (score: {search_result['score']})")
+                selected = [search_result]
+            else:
+                logger.info("No search tool available as fallback")
+        return selected
+    
+    def _single_call_prompt(self, tools: List[Tool]):
+        """The prompt and answer structure for scoring all the tools with one LLM call."""
+        sections = []
+        for tool in tools:
+            # The query is stated once at the top, so drop each tool's own query line
+            lines = [line.strip() for line in tool.prompt.splitlines() if "{request.query}" not in line]
+            description = fill_prompt("\n".join(lines).strip(), self.handler)
+            sections.append(f'Tool "{tool.name}":\n{description}')
+        prompt = fill_prompt(self.SINGLE_CALL_PROMPT, self.handler, {"tools.description": "\n\n".join(sections)})
+        ans_struc = {tool.name: tool.return_structure or {"score": "integer between 0 and 100"} for tool in tools}
+        return prompt, ans_struc
+    
+    async def _evaluate_tools_in_one_call(self, query: str, tools: List[Tool]) -> List[dict]:
+        """Score all the tools with a single LLM call, in the same form as _evaluate_tool's results."""
+        tools = [tool for tool in tools if tool.prompt]
+        if not tools:
+            return []
+        prompt, ans_struc = self._single_call_prompt(tools)
+        try:
+            response = await ask_llm(prompt, ans_struc, level="high", query_params=self.handler.query_params,
+                                     max_length=max(512, self.SINGLE_CALL_TOKENS_PER_TOOL * len(tools)),
+                                     call_class="tool_routing", prompt_name=self.SINGLE_CALL_PROMPT_NAME)
+        except Exception as e:
+            logger.error(f"Single-call tool evaluation error: {str(e)}")
+            response = None
+        if not response:
+            logger.warning("No response from LLM for single-call tool evaluation")
+            return []
+        
+        tool_results = []
+        for tool in tools:
+            result = response.get(tool.name)
+            if not isinstance(result, dict):
+                result = {"score": 0, "justification": "Not scored by LLM"}
+            try:
+                score = int(result.get("score", 0))
+            except (TypeError, ValueError):
+                score = 0
+            tool_results.append({"tool": tool, "result": result, "score": score})
+        return tool_results
+    
     async def _evaluate_tool(self, query: str, tool: Tool) -> dict:
         """Evaluate a single tool for the query."""
         if not tool.prompt:
@@ -407,7 +496,8 @@ class ToolSelector:
             # Use high level for all tools to ensure fair evaluation timing
             level = "high"
             start_time = time.time()
-            response = await ask_llm(filled_prompt, tool.return_structure, level=level, query_params=self.handler.query_params)
+            response = await ask_llm(filled_prompt, tool.return_structure, level=level, query_params=self.handler.query_params,
+                                     call_class="tool_routing", prompt_name=tool.name)
             end_time = time.time()
             elapsed_time = end_time - start_time
             
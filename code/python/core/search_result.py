@@ -0,0 +1,67 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Result record returned by retrieval.
+
+Retrieval has always returned [url, json, name, site] lists, and callers unpack
+them positionally. SearchResult is still such a list, so that code and JSON
+serialization keep working, but also carries the backend's similarity score and
+the name of the endpoint the result came from.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+from typing import Any, Optional, Sequence
+
+
+class SearchResult(list):
+    """
+    [url, json, name, site] plus score and endpoint attributes.
+
+    score is the backend's relevance score, higher is better. Its scale depends on
+    the backend (cosine similarity for vector stores, BM25-style scores for text
+    search), so scores are only comparable between results of the same endpoint.
+    None if the backend does not report one.
+    """
+
+    __slots__ = ("score", "endpoint")
+
+    def __init__(self, url: str, json_str: Any, name: str, site: str,
+                 score: Optional[float] = None, endpoint: Optional[str] = None):
+        super().__init__((url, json_str, name, site))
+        self.score = score
+        self.endpoint = endpoint
+
+    @classmethod
+    def from_row(cls, row: Sequence[Any], score: Optional[float] = None,
+                 endpoint: Optional[str] = None) -> "SearchResult":
+        """Wrap a legacy [url, json, name, site] row, keeping the score and endpoint it already has."""
+        if score is None:
+            score = getattr(row, "score", None)
+        if endpoint is None:
+            endpoint = getattr(row, "endpoint", None)
+        return cls(row[0], row[1], row[2], row[3], score, endpoint)
+
+    @property
+    def url(self) -> str:
+        return self[0]
+
+    @property
+    def json(self) -> Any:
+        return self[1]
+
+    @property
+    def name(self) -> str:
+        return self[2]
+
+    @property
+    def site(self) -> str:
+        return self[3]
+
+    def __reduce__(self):
+        return (SearchResult, (self[0], self[1], self[2], self[3], self.score, self.endpoint))
+
+    def __repr__(self) -> str:
+        return f"SearchResult({list.__repr__(self)}, score={self.score!r}, endpoint={self.endpoint!r})"
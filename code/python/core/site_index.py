@@ -0,0 +1,168 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Site routing index for retrieval endpoints.
+
+Keeps the set of sites held by each endpoint so that VectorDBClient can pick the
+endpoints for a query with a set lookup instead of asking every backend for its
+site list (which for Qdrant means scrolling the whole collection). The index is
+updated incrementally when documents are uploaded or deleted and persisted to a
+JSON file, so a restarted server starts with a warm index. The data loader runs
+in its own process and writes the same file; the server reloads it when its
+modification time changes. Each endpoint's set is also reconciled with its
+backend in the background once it is older than sites_cache_ttl (see
+VectorDBClient._get_endpoint_sites), for sites that reach a backend another way.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("site_index")
+
+# Minimum seconds between checks of the index file for changes made by other processes
+RELOAD_INTERVAL = 2.0
+
+
+def _file_mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class SiteRoutingIndex:
+    """
+    Endpoint -> set of sites, with the time each entry was last reconciled
+    against the backend. A site set of None means the backend cannot list its
+    sites and should be queried for every site.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._entries: Dict[str, Tuple[float, Optional[frozenset]]] = {}
+        self._save_lock = threading.Lock()
+        self._mtime: Optional[int] = None
+        self._checked_at = 0.0
+        if path:
+            self.load()
+
+    def load(self) -> None:
+        """
+        Load the persisted index, if any. Entries in the file replace the ones in
+        memory; a missing or corrupt file leaves the index as it is.
+        """
+        if not self.path:
+            return
+        mtime = _file_mtime(self.path)
+        if mtime is None:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            entries = {}
+            for endpoint_name, entry in data.get("endpoints", {}).items():
+                sites = entry.get("sites")
+                entries[endpoint_name] = (
+                    float(entry.get("fetched_at", 0)),
+                    frozenset(sites) if sites is not None else None,
+                )
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable site routing index {self.path}: {e}")
+            return
+        self._entries.update(entries)
+        self._mtime = mtime
+        logger.info(f"Loaded site routing index for {len(entries)} endpoints from {self.path}")
+
+    def reload_if_changed(self) -> bool:
+        """Reload the file if another process (e.g. the data loader) has written it since. Returns True if reloaded."""
+        if not self.path:
+            return False
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_INTERVAL:
+            return False
+        self._checked_at = now
+        mtime = _file_mtime(self.path)
+        if mtime is None or mtime == self._mtime:
+            return False
+        self.load()
+        return True
+
+    def save(self) -> None:
+        """Write the index to disk atomically. Safe to call from a worker thread."""
+        if not self.path:
+            return
+        data = {
+            "endpoints": {
+                endpoint_name: {
+                    "fetched_at": fetched_at,
+                    "sites": sorted(sites) if sites is not None else None,
+                }
+                for endpoint_name, (fetched_at, sites) in list(self._entries.items())
+            }
+        }
+        with self._save_lock:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+                self._mtime = _file_mtime(self.path)
+            except Exception as e:
+                logger.warning(f"Failed to persist site routing index to {self.path}: {e}")
+
+    def get(self, endpoint_name: str) -> Optional[Tuple[float, Optional[frozenset]]]:
+        """Return (fetched_at, sites) for an endpoint, or None if it has never been indexed."""
+        return self._entries.get(endpoint_name)
+
+    def set(self, endpoint_name: str, sites: Optional[Iterable[str]], fetched_at: Optional[float] = None) -> Optional[frozenset]:
+        """Replace an endpoint's site set with the backend's authoritative list."""
+        sites = frozenset(sites) if sites is not None else None
+        self._entries[endpoint_name] = (fetched_at if fetched_at is not None else time.time(), sites)
+        return sites
+
+    def add_sites(self, endpoint_name: str, sites: Iterable[str]) -> bool:
+        """
+        Record that an endpoint now holds data for sites.
+
+        Endpoints that have never been indexed, or that cannot list their sites, are
+        left alone so that the first lookup still asks the backend for the full list.
+
+        Returns:
+            True if the index changed
+        """
+        entry = self._entries.get(endpoint_name)
+        if entry is None or entry[1] is None:
+            return False
+        fetched_at, current = entry
+        new_sites = frozenset(s for s in sites if s) - current
+        if not new_sites:
+            return False
+        self._entries[endpoint_name] = (fetched_at, current | new_sites)
+        return True
+
+    def remove_site(self, endpoint_name: str, site: str) -> bool:
+        """Record that all documents for site were deleted from an endpoint. Returns True if the index changed."""
+        entry = self._entries.get(endpoint_name)
+        if entry is None or entry[1] is None or site not in entry[1]:
+            return False
+        fetched_at, current = entry
+        self._entries[endpoint_name] = (fetched_at, current - {site})
+        return True
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __contains__(self, endpoint_name: str) -> bool:
+        return endpoint_name in self._entries
@@ -0,0 +1,135 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Size-bounded key-value table in a SQLite file, shared by the on-disk caches
+(LLM responses, ingest embeddings).
+
+Rows are evicted least recently accessed first once the table grows past
+max_entries, and optionally expire. The file uses WAL so several processes
+can share it. All methods block; async callers run them with asyncio.to_thread.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# SQLite limits the number of bound parameters per statement
+_MAX_QUERY_KEYS = 500
+
+
+class SQLiteLRUStore:
+    """
+    Table of key -> value columns with a last_access time, and an expires_at
+    time if expiring is set.
+
+    Args:
+        path: SQLite file, created with its directory if missing
+        table: Table name
+        columns: Value column definitions in order, e.g. {"value": "TEXT NOT NULL"}
+        max_entries: Rows kept; the least recently accessed are pruned beyond it
+        expiring: Add an expires_at column; expired rows are never returned
+    """
+
+    def __init__(self, path: str, table: str, columns: Dict[str, str], max_entries: int,
+                 expiring: bool = False):
+        self.path = path
+        self.table = table
+        self.columns = list(columns)
+        self.max_entries = max(1, max_entries)
+        self.expiring = expiring
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        definitions = [f" {name} {definition}" for name, definition in columns.items()]
+        if expiring:
+            definitions.append(" expires_at REAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY," + ",".join(definitions) + ","
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_access ON {table}(last_access)")
+        self._conn.commit()
+        self._selected = ", ".join(self.columns + (["expires_at"] if expiring else []))
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, Tuple]:
+        """
+        Rows found for keys, as tuples of the value columns (followed by expires_at
+        for expiring tables), and mark them as accessed.
+        """
+        found: Dict[str, Tuple] = {}
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), _MAX_QUERY_KEYS):
+                chunk = list(keys[i:i + _MAX_QUERY_KEYS])
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, {self._selected} FROM {self.table} WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, *values in rows:
+                    if self.expiring and values[-1] is not None and values[-1] < now:
+                        continue
+                    found[key] = tuple(values)
+                hit_keys = [key for key in chunk if key in found]
+                if hit_keys:
+                    self._conn.execute(
+                        f"UPDATE {self.table} SET last_access = ? WHERE key IN ({','.join('?' * len(hit_keys))})",
+                        [now, *hit_keys]
+                    )
+            self._conn.commit()
+        return found
+
+    def put_many(self, rows: Dict[str, Tuple], expires_at: Optional[float] = None) -> None:
+        """Insert or replace rows of value columns, pruning the table every max_entries / 100 writes."""
+        if not rows:
+            return
+        now = time.time()
+        names = ["key"] + self.columns + (["expires_at"] if self.expiring else []) + ["last_access"]
+        params: List[Tuple] = []
+        for key, values in rows.items():
+            params.append((key, *values, *((expires_at,) if self.expiring else ()), now))
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                params
+            )
+            self._writes_since_prune += len(params)
+            # Pruning counts the table, so only do it every so often
+            if self._writes_since_prune >= max(1, self.max_entries // 100):
+                self._prune_locked(now)
+            self._conn.commit()
+
+    def _prune_locked(self, now: float) -> None:
+        self._writes_since_prune = 0
+        if self.expiring:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        count = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += overflow
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
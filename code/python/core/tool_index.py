@@ -0,0 +1,176 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Embedding index of the tools in tools.xml, for preselecting tools before the
+LLM scores them.
+
+ToolSelector asks the LLM to score every tool for the item type, one call per
+tool, on every query. Most queries are plain searches. The index embeds each
+tool's description (its prompt, without the variables and scoring instructions)
+and its examples once, and scores a query against a tool by the best cosine
+similarity over those texts. ToolSelector then either skips LLM scoring when
+search wins by a margin, or sends only a short list of tools to the LLM.
+
+The settings are in the tool_preselection block of config_nlweb.yaml.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import asyncio
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.embedding import batch_get_embeddings, get_embedding
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("tool_index")
+
+SEARCH_TOOL = "search"
+MAX_DESCRIPTION_CHARS = 1000
+
+_VARIABLE_PATTERN = re.compile(r"\{[^{}]*\}")
+_SCORING_PATTERN = re.compile(r"\bscor(e|es|ed|ing)\b", re.IGNORECASE)
+
+_index: Optional["ToolEmbeddingIndex"] = None
+_index_tools: Optional[Sequence] = None
+_index_lock: Optional[asyncio.Lock] = None
+
+
+def tool_key(tool) -> Tuple[str, str]:
+    return tool.schema_type, tool.name
+
+
+def tool_description(tool) -> str:
+    """The tool's name and what its prompt says it is for, without variables and scoring instructions."""
+    lines = [line.strip() for line in (tool.prompt or "").splitlines()]
+    lines = [line for line in lines if line and not _VARIABLE_PATTERN.search(line)
+             and not _SCORING_PATTERN.search(line)]
+    description = " ".join([tool.name.replace("_", " ") + ":"] + lines)
+    return description[:MAX_DESCRIPTION_CHARS]
+
+
+def tool_texts(tool) -> List[str]:
+    """The texts a query is matched against for a tool: its description and each example."""
+    return [tool_description(tool)] + list(tool.examples)
+
+
+def _normalize(vectors) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[np.newaxis, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class ToolEmbeddingIndex:
+    """Unit vectors of every tool's texts, with the rows that belong to each tool."""
+
+    def __init__(self, tools: Sequence, vectors):
+        self.matrix = _normalize(vectors)
+        self._rows: Dict[Tuple[str, str], List[int]] = {}
+        row = 0
+        for tool in tools:
+            count = len(tool_texts(tool))
+            self._rows[tool_key(tool)] = list(range(row, row + count))
+            row += count
+        if row != len(self.matrix):
+            raise ValueError(f"Expected {row} tool vectors, got {len(self.matrix)}")
+
+    @classmethod
+    async def build(cls, tools: Sequence) -> "ToolEmbeddingIndex":
+        texts = [text for tool in tools for text in tool_texts(tool)]
+        vectors = await batch_get_embeddings(texts) if texts else []
+        logger.info(f"Embedded {len(texts)} descriptions and examples of {len(tools)} tools")
+        return cls(tools, vectors) if texts else cls([], np.zeros((0, 1)))
+
+    def similarities(self, query_vector, tools: Sequence) -> Dict[Tuple[str, str], float]:
+        """Best cosine similarity between the query and each tool's texts; tools not in the index get none."""
+        query = _normalize(query_vector)[0]
+        if len(self.matrix) == 0 or query.shape[0] != self.matrix.shape[1]:
+            return {}
+        scores = self.matrix @ query
+        return {tool_key(tool): float(scores[self._rows[tool_key(tool)]].max())
+                for tool in tools if self._rows.get(tool_key(tool))}
+
+    def shortlist(self, query_vector, tools: Sequence, top_k: int, search_margin: float):
+        """
+        Preselect tools for a query.
+
+        Returns (tools, skip_llm). When search is the most similar tool and beats
+        the runner-up by at least search_margin, the list is just search and
+        skip_llm is True. Otherwise it holds the top_k most similar tools, with
+        search always included so there is something to fall back to. If the
+        index cannot score the tools, all of them are returned.
+        """
+        similarities = self.similarities(query_vector, tools)
+        if len(similarities) < len(tools):
+            return list(tools), False
+        ranked = sorted(tools, key=lambda tool: similarities[tool_key(tool)], reverse=True)
+        if ranked[0].name == SEARCH_TOOL:
+            runner_up = similarities[tool_key(ranked[1])] if len(ranked) > 1 else -1.0
+            if similarities[tool_key(ranked[0])] - runner_up >= search_margin:
+                return [ranked[0]], True
+        shortlist = ranked[:max(top_k, 1)]
+        search = next((tool for tool in ranked if tool.name == SEARCH_TOOL), None)
+        if search is not None and search not in shortlist:
+            shortlist.append(search)
+        return shortlist, False
+
+
+async def get_tool_index(tools: Sequence) -> ToolEmbeddingIndex:
+    """The index of the loaded tools, built on first use and rebuilt when the tools are reloaded."""
+    global _index, _index_tools, _index_lock
+    if _index is not None and _index_tools is tools:
+        return _index
+    if _index_lock is None:
+        _index_lock = asyncio.Lock()
+    async with _index_lock:
+        if _index is None or _index_tools is not tools:
+            _index = await ToolEmbeddingIndex.build(tools)
+            _index_tools = tools
+    return _index
+
+
+def warm_tool_index(tools: Sequence) -> Optional[asyncio.Task]:
+    """Start embedding the tools in the background, if an event loop is running."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+    async def warm():
+        try:
+            await get_tool_index(tools)
+        except Exception as e:
+            logger.warning(f"Could not embed tools at startup, will retry on the first query: {e}")
+
+    return loop.create_task(warm())
+
+
+async def preselect_tools(query: str, tools: Sequence, all_tools: Sequence, top_k: int,
+                          search_margin: float, query_params=None):
+    """
+    Shortlist the tools for a query by embedding similarity.
+
+    Args:
+        query: The (decontextualized) query
+        tools: The tools for the query's item type
+        all_tools: Every loaded tool; the index is built over these and shared by all types
+        top_k: Tools kept for LLM scoring, besides search
+        search_margin: Similarity lead over every other tool at which search is chosen without the LLM
+
+    Returns (tools, skip_llm) as ToolEmbeddingIndex.shortlist does, or all the
+    tools and False if the tools or the query cannot be embedded.
+    """
+    try:
+        index = await get_tool_index(all_tools)
+        query_vector = await get_embedding(query, query_params=query_params)
+    except Exception as e:
+        logger.warning(f"Tool preselection failed, scoring all tools: {e}")
+        return list(tools), False
+    return index.shortlist(query_vector, tools, top_k, search_margin)
@@ -0,0 +1,91 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Rolling latency statistics for backends (retrieval endpoints, LLM calls).
+
+Each key keeps an exponentially weighted moving average plus a bounded window of
+recent samples, from which percentiles are read. Used to order replicas, pick
+hedge delays and size adaptive timeouts.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import math
+from collections import deque
+from typing import Any, Dict, Hashable, Optional
+
+
+class LatencyStats:
+    """EWMA and recent-sample window for a single key."""
+
+    __slots__ = ("alpha", "ewma", "count", "samples")
+
+    def __init__(self, window: int = 256, alpha: float = 0.2):
+        self.alpha = alpha
+        self.ewma: Optional[float] = None
+        self.count = 0
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.samples.append(seconds)
+        if self.ewma is None:
+            self.ewma = seconds
+        else:
+            self.ewma += self.alpha * (seconds - self.ewma)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile over the sample window, or None with no samples."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+        return ordered[min(rank, len(ordered)) - 1]
+
+
+class LatencyTracker:
+    """Latency statistics keyed by endpoint name, (provider, model, prompt) tuple, etc."""
+
+    def __init__(self, window: int = 256, alpha: float = 0.2):
+        self.window = window
+        self.alpha = alpha
+        self._stats: Dict[Hashable, LatencyStats] = {}
+
+    def record(self, key: Hashable, seconds: float) -> None:
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = LatencyStats(self.window, self.alpha)
+        stats.record(seconds)
+
+    def get(self, key: Hashable) -> Optional[LatencyStats]:
+        return self._stats.get(key)
+
+    def ewma(self, key: Hashable) -> Optional[float]:
+        stats = self._stats.get(key)
+        return stats.ewma if stats else None
+
+    def percentile(self, key: Hashable, pct: float, min_samples: int = 1) -> Optional[float]:
+        """Return the pct percentile for key, or None if fewer than min_samples were recorded."""
+        stats = self._stats.get(key)
+        if stats is None or len(stats.samples) < max(1, min_samples):
+            return None
+        return stats.percentile(pct)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary per key, for the metrics endpoint."""
+        result = {}
+        for key, stats in self._stats.items():
+            name = ":".join(str(k) for k in key) if isinstance(key, tuple) else str(key)
+            result[name] = {
+                "count": stats.count,
+                "ewma_ms": round(stats.ewma * 1000, 1) if stats.ewma is not None else None,
+                "p50_ms": round(stats.percentile(50) * 1000, 1),
+                "p95_ms": round(stats.percentile(95) * 1000, 1),
+                "p99_ms": round(stats.percentile(99) * 1000, 1),
+            }
+        return result
+
+    def clear(self) -> None:
+        self._stats.clear()
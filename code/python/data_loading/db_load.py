@@ -22,9 +22,19 @@ from core.config import CONFIG
 from core.embedding import batch_get_embeddings
 from data_loading.db_load_utils import (
     read_file_lines,
+    iter_file_lines,
+    detect_file_encoding,
+    process_line,
     prepare_documents_from_json,
     documents_from_csv_line,
 )
+from data_loading.load_pipeline import LoadCheckpoint, run_load_pipeline
+from data_loading.parallel_parse import iter_documents_parallel
+from data_loading.embedding_store import EmbeddingStore, EmbeddingStoreWriter, store_exists, VECTORS_SUFFIX
+from core.ingest_embedding_cache import EmbeddingDedupCache
+
+# Leave one core for the event loop driving the embed and upload stages
+DEFAULT_PARSE_WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))
 
 # Import vector database client directly
 from core.retriever import get_vector_db_client, upload_documents, delete_documents_by_site
@@ -32,50 +42,54 @@ from core.retriever import get_vector_db_client, upload_documents, delete_docume
 # Import RSS to Schema converter
 import data_loading.rss2schema as rss2schema
 
-# Define URL extractor function since json_url_extractor module is not available
-def process_line(line):
+_embedding_cache = None
+
+def get_ingest_embedding_cache() -> Optional[EmbeddingDedupCache]:
+    """Return the content-hash embedding cache, or None if it is disabled in config_embedding.yaml."""
+    global _embedding_cache
+    config = getattr(CONFIG, "embedding_dedup", None)
+    if config is None or not config.enabled:
+        return None
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingDedupCache(config.path, config.max_entries)
+    return _embedding_cache
+
+async def compute_embeddings(texts: List[str], provider: str, model: str) -> List[List[float]]:
     """
-    Process a line from a file to extract URL and JSON data.
-    
-    Handles two formats:
-    1. Two columns per row, separated by tabs: URL and JSON
-    2. One column: JSON only (URL will be extracted from the JSON)
+    Embed texts for ingestion. Texts whose (provider, model, content) was embedded
+    before are answered from the dedup cache; only the rest go to the provider.
+    """
+    cache = get_ingest_embedding_cache()
+    if cache is None:
+        return await batch_get_embeddings(texts, provider, model)
+    return await cache.embed(texts, lambda missing: batch_get_embeddings(missing, provider, model), provider, model)
+
+def iter_documents_from_lines(file_path: str, site: str, start_line: int = 0):
+    """
+    Stream documents from a URL/JSON lines file.
     
     Args:
-        line: Line from the file
+        file_path: Path to the file
+        site: Site identifier
+        start_line: Skip lines up to and including this line number (for resuming)
         
-    Returns:
-        Tuple of (url, json_data)
+    Yields:
+        (line_number, documents) for every line that produced documents
     """
-    parts = line.strip().split('\t')
-    
-    if len(parts) >= 2:
-        # Format: URL and JSON 
-        url = parts[0]
-        json_data = parts[1]
-        return url, json_data
-    elif len(parts) == 1:
-        # Format: JSON only, extract URL from within the JSON
-        json_data = parts[0]
+    for line_number, line in iter_file_lines(file_path, start_line):
         try:
-            json_obj = json.loads(json_data)
+            # Process the line, handling JSON-only format if needed
+            url, json_data = process_line(line)
             
-            # Try to extract URL from common fields
-            url = None
-            for field in ["url", "@id", "identifier"]:
-                if field in json_obj and json_obj[field]:
-                    url = json_obj[field]
-                    break
-                    
-            if not url:
-                return None, None
-                
-            return url, json_data
+            if url is None or json_data is None:
+                continue
+            
+            documents, _ = prepare_documents_from_json(url, json_data, site)
+            if documents:
+                yield line_number, documents
         except Exception as e:
-            print(f"Error extracting URL from JSON: {str(e)}")
-            return None, None
-    else:
-        return None, None
+            print(f"Error processing line {line_number}: {str(e)}")
+            continue
 
 def get_embeddings_file_path(file_path: str) -> str:
     """
@@ -557,6 +571,44 @@ async def process_rss_feed(file_path: str, site: str) -> List[Dict[str, Any]]:
         traceback.print_exc()
         return []
 
+async def loadEmbeddingStoreToDB(store_path: str, site: str, batch_size: int = 100, delete_existing: bool = False, database: str = None):
+    """
+    Load a binary embeddings store (see data_loading/embedding_store.py) into the database.
+    
+    The vectors are memory-mapped and documents are read by offset, so nothing is
+    parsed from text. This is also how a site is re-targeted to another database.
+    
+    Args:
+        store_path: Base path of the store (the embeddings file path in json_with_embeddings)
+        site: Site identifier
+        batch_size: Number of documents to upload in each batch
+        delete_existing: Whether to delete existing entries for this site before loading
+        database: Specific database endpoint to use (if None, uses preferred endpoint)
+    """
+    endpoint_name = database or CONFIG.write_endpoint
+    store = EmbeddingStore(store_path)
+    total_rows = len(store)
+    print(f"Loading {total_rows} embeddings from store {store_path} for site {site} using database endpoint '{endpoint_name}'")
+    
+    if delete_existing:
+        await delete_site_from_database(site, endpoint_name)
+    
+    # Use query_params for development mode override
+    query_params = {"db": database} if database else None
+    
+    total_documents = 0
+    total_batches = (total_rows + batch_size - 1) // batch_size
+    for batch_idx, documents in enumerate(store.iter_batches(site, batch_size)):
+        try:
+            print(f"Uploading batch {batch_idx+1} of {total_batches} ({len(documents)} documents)")
+            await upload_documents(documents, query_params=query_params)
+            total_documents += len(documents)
+        except Exception as e:
+            print(f"Error uploading batch {batch_idx+1}: {str(e)}")
+    
+    print(f"Loading completed. Added {total_documents} documents to the database.")
+    return total_documents
+
 async def loadJsonWithEmbeddingsToDB(file_path: str, site: str, batch_size: int = 100, delete_existing: bool = False, database: str = None):
     """
     Load data from a file with precomputed embeddings into the database.
@@ -582,6 +634,11 @@ async def loadJsonWithEmbeddingsToDB(file_path: str, site: str, batch_size: int
         file_path = temp_path
     print(f"file_path: {file_path}")
     try:
+        # Binary embeddings stores are memory-mapped instead of parsed
+        for store_path in (file_path, get_embeddings_file_path(file_path)):
+            if store_exists(store_path):
+                return await loadEmbeddingStoreToDB(store_path, site, batch_size, delete_existing, database)
+        
         resolved_path = None
         
         # First, check if the file exists at the given path
@@ -680,7 +737,9 @@ async def loadJsonWithEmbeddingsToDB(file_path: str, site: str, batch_size: int
             except Exception:
                 pass
 
-async def loadJsonToDB(file_path: str, site: str, batch_size: int = 100, delete_existing: bool = False, force_recompute: bool = False, database: str = None):
+async def loadJsonToDB(file_path: str, site: str, batch_size: int = 100, delete_existing: bool = False, force_recompute: bool = False, database: str = None,
+                      embed_concurrency: int = 4, upload_concurrency: int = 2, resume: bool = True,
+                      parse_workers: int = DEFAULT_PARSE_WORKERS, embedding_dtype: str = "float32"):
     """
     Load data from a file, compute embeddings, and store in the database.
     
@@ -698,6 +757,16 @@ async def loadJsonToDB(file_path: str, site: str, batch_size: int = 100, delete_
         delete_existing: Whether to delete existing entries for this site before loading
         force_recompute: Whether to force recomputation of embeddings
         database: Specific database endpoint to use (if None, uses preferred endpoint)
+        embed_concurrency: Number of embedding batches computed concurrently
+        upload_concurrency: Number of batches uploaded concurrently
+        resume: Continue an interrupted load from its checkpoint file, if there is one
+        parse_workers: Worker processes parsing JSON lines input (1 parses in this process)
+        embedding_dtype: "float32" or "float16" for the saved embeddings store
+    
+    Documents are streamed through a parse -> embed -> upload pipeline (see
+    data_loading/load_pipeline.py), so memory use does not grow with the file size.
+    The embeddings are saved as a binary store (data_loading/embedding_store.py)
+    in the json_with_embeddings folder for fast reloading.
     """
     # Check if this is a URL
     is_url_path = await is_url(file_path)
@@ -741,8 +810,11 @@ async def loadJsonToDB(file_path: str, site: str, batch_size: int = 100, delete_
         
         # Check for existing embeddings file if not forcing recomputation
         embeddings_path = get_embeddings_file_path(os.path.basename(original_path))
+        checkpoint_path = f"{embeddings_path}.checkpoint"
         
-        if os.path.exists(embeddings_path) and not force_recompute:
+        # A checkpoint means the embeddings file is from an interrupted load, so don't offer to reuse it
+        has_existing = store_exists(embeddings_path) or os.path.exists(embeddings_path)
+        if has_existing and not force_recompute and not (resume and os.path.exists(checkpoint_path)):
             # In interactive mode, ask the user what to do
             if sys.stdin.isatty():
                 response = input(f"A file with embeddings already exists at {embeddings_path}. Use it? (y/n): ")
@@ -760,10 +832,6 @@ async def loadJsonToDB(file_path: str, site: str, batch_size: int = 100, delete_
         
         # If we get here, we need to process the file based on its type and compute embeddings
         
-        # Delete existing entries for this site if requested
-        if delete_existing:
-            await delete_site_from_database(site, endpoint_name)
-        
         # Use query_params for development mode override
         query_params = {"db": database} if database else None
         
@@ -774,9 +842,6 @@ async def loadJsonToDB(file_path: str, site: str, batch_size: int = 100, delete_
         
         print(f"Using embedding provider: {provider}, model: {model}")
         
-        # Initialize documents list
-        all_documents = []
-        
         # IMPORTANT FIX:
         # For XML files with RSS-like content, force it to be processed as RSS
         # even if it wasn't explicitly detected as RSS
@@ -789,119 +854,95 @@ async def loadJsonToDB(file_path: str, site: str, batch_size: int = 100, delete_
             print("XML file from URL looks like it might be an RSS feed. Processing as RSS...")
             file_type = 'rss'
         
-        # Process based on file type
+        is_rss = file_type == 'rss' or (file_type == 'xml' and ('/feed' in original_path.lower() or '/rss' in original_path.lower()))
+        
+        # JSON lines files are parsed in worker processes, split by byte range. UTF-16 files
+        # can't be split on raw newline bytes, so they are parsed in this process.
+        parallel_parse = False
+        if file_type != 'csv' and not is_rss and parse_workers > 1:
+            encoding = detect_file_encoding(resolved_path)
+            parallel_parse = encoding != 'utf-16'
+        
+        # Resume from the checkpoint of an interrupted load of the same input. Positions are
+        # byte offsets for parallel parsing and line/item numbers otherwise.
+        checkpoint = LoadCheckpoint(checkpoint_path, {
+            "input": original_path,
+            "size": os.path.getsize(resolved_path),
+            "site": site,
+            "file_type": file_type,
+            "position": "byte" if parallel_parse else "item",
+        })
+        start_position = checkpoint.load() if resume else 0
+        if start_position:
+            print(f"Resuming from checkpoint: {checkpoint.documents} documents already loaded, "
+                  f"continuing after position {start_position}")
+        
+        # Delete existing entries for this site if requested. A resumed load already did
+        # this before uploading the documents its checkpoint counts.
+        if delete_existing and not start_position:
+            await delete_site_from_database(site, endpoint_name)
+        
+        # Process based on file type. Items are (position, documents) pairs; CSV and RSS
+        # are parsed up front, JSON lines are parsed as the pipeline pulls them.
         if file_type == 'csv':
             # Process standard CSV file
             all_documents = await process_csv_file(resolved_path, site)
-        elif file_type == 'rss' or (file_type == 'xml' and ('/feed' in original_path.lower() or '/rss' in original_path.lower())):
+            items = ((i, [doc]) for i, doc in enumerate(all_documents, 1) if i > start_position)
+        elif is_rss:
             # Process RSS/Atom feed
             print("Processing as RSS feed...")
             all_documents = await process_rss_feed(resolved_path, site)
+            items = ((i, [doc]) for i, doc in enumerate(all_documents, 1) if i > start_position)
+        elif parallel_parse:
+            print(f"Parsing with {parse_workers} worker processes")
+            items = iter_documents_parallel(resolved_path, site, start_position, parse_workers, encoding)
         else:
-            # Default to JSON processing
-            # Read all lines from the file
-            lines = await read_file_lines(resolved_path)
-            total_lines = len(lines)
-            
-            print(f"Found {total_lines} lines in the file")
-            
-            # Check the first few lines to detect if this is a JSON-only file
-            sample_lines = lines[:min(5, len(lines))]
-            json_only_format = True
-            
-            for line in sample_lines:
-                parts = line.strip().split('\t')
-                if len(parts) >= 2:
-                    json_only_format = False
-                    break
-            
-            if json_only_format:
-                print("Detected JSON-only format. URLs will be extracted from within the JSON data.")
-            
-            # Process each line to extract documents
-            for line in lines:
-                try:
-                    # Process the line, handling JSON-only format if needed
-                    url, json_data = process_line(line)
-                    
-                    if url is None or json_data is None:
-                        continue
-                    
-                    # Prepare documents
-                    documents, _ = prepare_documents_from_json(url, json_data, site)
-                    all_documents.extend(documents)
-                except Exception as e:
-                    print(f"Error processing line: {str(e)}")
-                    continue
+            # Default to JSON processing, one line at a time
+            items = iter_documents_from_lines(resolved_path, site, start_position)
         
-        # If we have documents to process
-        if all_documents:
-            # Ensure the directory exists for the embeddings file
-            os.makedirs(os.path.dirname(embeddings_path), exist_ok=True)
-            
-            # Open file to write documents with embeddings
-            with open(embeddings_path, 'w', encoding='utf-8') as embed_file:
-                # Extract texts for embedding
-                texts = [doc["schema_json"] for doc in all_documents]
-                
-                # Process in batches
-                total_documents = 0
-                
-                for i in range(0, len(all_documents), batch_size):
-                    batch_docs = all_documents[i:i+batch_size]
-                    batch_texts = texts[i:i+batch_size]
-                    
-                    if batch_docs and batch_texts:
-                        try:
-                            print(f"Computing embeddings for batch of {len(batch_texts)} texts")
-                            
-                            # Compute embeddings for the batch
-                            embeddings = await batch_get_embeddings(batch_texts, provider, model)
-                            
-                            # Add embeddings to documents
-                            docs_with_embeddings = []
-                            
-                            for j, embedding in enumerate(embeddings):
-                                if j < len(batch_docs):
-                                    doc = batch_docs[j].copy()  # Create a copy of the document
-                                    
-                                    # Add embedding to document
-                                    doc["embedding"] = embedding
-                                    
-                                    # Format embedding as string - ensure no newlines
-                                    embedding_str = str(embedding).replace(' ', '').replace('\n', '')
-                                    
-                                    # Ensure JSON has no newlines
-                                    doc_json = doc['schema_json'].replace('\n', ' ')
-                                    
-                                    # Write to embeddings file
-                                    embed_file.write(f"{doc['url']}\t{doc_json}\t{embedding_str}\n")
-                                    
-                                    docs_with_embeddings.append(doc)
-                            
-                            # Upload batch using the client directly
-                            batch_idx = i // batch_size
-                            total_batches = (len(all_documents) + batch_size - 1) // batch_size
-                            
-                            print(f"Uploading batch {batch_idx+1} of {total_batches} ({len(docs_with_embeddings)} documents)")
-                            await upload_documents(docs_with_embeddings, query_params=query_params)
-                            print(f"Successfully uploaded batch {batch_idx+1}")
-                            
-                            total_documents += len(docs_with_embeddings)
-                        except Exception as e:
-                            print(f"Error processing batch: {str(e)}")
-                            traceback.print_exc()
-                    
-                    # Print progress
-                    print(f"Processed {min(i+batch_size, len(all_documents))}/{len(all_documents)} documents")
-            
-            print(f"Loading completed. Added {total_documents} documents to the database.")
-            print(f"Saved file with embeddings to {embeddings_path}")
-            
-            return total_documents
+        # Ensure the directory exists for the embeddings store
+        os.makedirs(os.path.dirname(embeddings_path), exist_ok=True)
+
+        cache = get_ingest_embedding_cache()
+        cache_start = cache.stats() if cache is not None else None
+
+        # Append to the embeddings store when resuming, otherwise start a new one. The store
+        # gets batches in checkpoint order, so it is cut back to the checkpointed documents.
+        with EmbeddingStoreWriter(embeddings_path, dtype=embedding_dtype, append=bool(start_position),
+                                  max_rows=checkpoint.documents if start_position else None) as store:
+            stats = await run_load_pipeline(
+                items,
+                embed_batch=lambda texts: compute_embeddings(texts, provider, model),
+                upload_batch=lambda docs: upload_documents(docs, query_params=query_params),
+                batch_size=batch_size,
+                embed_concurrency=embed_concurrency,
+                upload_concurrency=upload_concurrency,
+                checkpoint=checkpoint,
+                on_uploaded=store.add,
+            )
+        
+        if stats.failed_batches:
+            print(f"{stats.failed_batches} batches failed. Run the same command again to retry from the checkpoint.")
         else:
-            print("No documents were extracted from the file.")
+            checkpoint.remove()
+        
+        total_documents = checkpoint.documents
+        if not total_documents:
+            if not stats.failed_batches:
+                print("No documents were extracted from the file.")
             return 0
+        
+        rate = stats.documents / stats.elapsed if stats.elapsed else 0.0
+        print(f"Loading completed. Added {stats.documents} documents to the database "
+              f"in {stats.elapsed:.1f}s ({rate:.1f} docs/s).")
+        print(f"Per-stage throughput:\n{stats.summary()}")
+        if cache is not None:
+            cache_stats = cache.stats()
+            print(f"Embedding cache: {cache_stats['hits'] - cache_start['hits']} reused, "
+                  f"{cache_stats['misses'] - cache_start['misses']} computed")
+        print(f"Saved embeddings to {embeddings_path}{VECTORS_SUFFIX} ({store.rows} rows)")
+        
+        return total_documents
     finally:
         # Clean up temporary file if needed
         if temp_path and os.path.exists(temp_path):
@@ -1007,7 +1048,7 @@ async def loadUrlListToDB(file_path: str, site: str, batch_size: int = 100, dele
                                 batch_texts = [doc["schema_json"] for doc in batch_docs]
                                 
                                 # Compute embeddings
-                                embeddings = await batch_get_embeddings(batch_texts, provider, model)
+                                embeddings = await compute_embeddings(batch_texts, provider, model)
                                 
                                 # Add embeddings to documents
                                 docs_with_embeddings = []
@@ -1074,9 +1115,11 @@ async def delete_site(site: str, database: str = None):
     count = await delete_site_from_database(site, database)
     print(f"Deleted {count} entries for site '{site}'")
 
-async def process_normal_path(input_file_path: str, site: str, batch_size: int = 100, delete_site: bool = False, force_recompute: bool = False, database: str = None):
+async def process_normal_path(input_file_path: str, site: str, batch_size: int = 100, delete_site: bool = False, force_recompute: bool = False, database: str = None,
+                              embed_concurrency: int = 4, upload_concurrency: int = 2, resume: bool = True,
+                              parse_workers: int = DEFAULT_PARSE_WORKERS, embedding_dtype: str = "float32"):
     # Check if file exists at the specified path
-    if not await is_url(input_file_path) and not os.path.exists(input_file_path):
+    if not await is_url(input_file_path) and not os.path.exists(input_file_path) and not store_exists(input_file_path):
         print(f"Warning: File not found at '{input_file_path}'. Will try to resolve or download it.")
     
     # Determine if the file is a URL
@@ -1091,8 +1134,12 @@ async def process_normal_path(input_file_path: str, site: str, batch_size: int =
         file_path = temp_path
     
     try:
+        # A binary embeddings store is addressed by its base path, which is not itself a file
+        if store_exists(file_path) and not force_recompute:
+            print("Path is an embeddings store, loading directly...")
+            await loadEmbeddingStoreToDB(file_path, site, batch_size, delete_site, database)
         # Detect file type and if it contains embeddings
-        if os.path.exists(file_path):
+        elif os.path.exists(file_path):
             file_type, has_embeddings = await detect_file_type(file_path)
             print(f"Detected file type: {file_type}, contains embeddings: {'Yes' if has_embeddings else 'No'}")
             
@@ -1102,7 +1149,8 @@ async def process_normal_path(input_file_path: str, site: str, batch_size: int =
                 await loadJsonWithEmbeddingsToDB(file_path, site, batch_size, delete_site, database)
             else:
                 print("Computing embeddings for file...")
-                await loadJsonToDB(file_path, site, batch_size, delete_site, force_recompute, database)
+                await loadJsonToDB(file_path, site, batch_size, delete_site, force_recompute, database,
+                                   embed_concurrency, upload_concurrency, resume, parse_workers, embedding_dtype)
         else:
             print(f"Error: File not found at '{file_path}'")
             sys.exit(1)
@@ -1149,9 +1197,24 @@ async def main():
                         help="Batch size for processing and uploading")
     parser.add_argument("--database", type=str, default=None,
                         help="Specific database endpoint to use (from config_retrieval.yaml)")
+    parser.add_argument("--embed-concurrency", type=int, default=4,
+                        help="Number of embedding batches computed concurrently")
+    parser.add_argument("--upload-concurrency", type=int, default=2,
+                        help="Number of batches uploaded to the database concurrently")
+    parser.add_argument("--parse-workers", type=int, default=DEFAULT_PARSE_WORKERS,
+                        help="Worker processes parsing JSON lines input (1 parses in the main process)")
+    parser.add_argument("--embedding-dtype", choices=["float32", "float16"], default="float32",
+                        help="Precision of the saved embeddings store (float16 halves its size)")
+    parser.add_argument("--no-embedding-cache", action="store_true",
+                        help="Embed every document even if an identical one was embedded before")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Ignore the checkpoint of an interrupted load and start from the beginning")
     
     args = parser.parse_args()
     
+    if args.no_embedding_cache:
+        CONFIG.embedding_dedup.enabled = False
+    
     # Validate database if specified
     if args.database and args.database not in CONFIG.retrieval_endpoints:
         parser.error(f"Database endpoint '{args.database}' not found in configuration. Available options: {', '.join(CONFIG.retrieval_endpoints.keys())}")
@@ -1190,11 +1253,15 @@ async def main():
             if os.path.isfile(file_path):
                 # The downside of this approach is that we aren't taking advantage of the batch functionality
                 print(f"Processing file: {file_path}")
-                await process_normal_path(file_path, args.site, args.batch_size, args.delete_site, args.force_recompute, args.database)
+                await process_normal_path(file_path, args.site, args.batch_size, args.delete_site, args.force_recompute, args.database,
+                                          args.embed_concurrency, args.upload_concurrency, not args.no_resume,
+                                          args.parse_workers, args.embedding_dtype)
         return
     
     # Normal processing mode
-    await process_normal_path(args.file_path, args.site, args.batch_size, args.delete_site, args.force_recompute, args.database)
+    await process_normal_path(args.file_path, args.site, args.batch_size, args.delete_site, args.force_recompute, args.database,
+                              args.embed_concurrency, args.upload_concurrency, not args.no_resume,
+                              args.parse_workers, args.embedding_dtype)
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
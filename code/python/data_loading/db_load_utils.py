@@ -7,7 +7,7 @@ import os
 import json
 import asyncio
 import numpy as np
-from typing import List, Dict, Any, Optional, Tuple, Union
+from typing import Iterator, List, Dict, Any, Optional, Tuple, Union
 from core.config import CONFIG
 from core.utils.trim_schema_json import trim_schema_json
 
@@ -54,6 +54,88 @@ async def read_file_lines(file_path: str) -> List[str]:
     
     raise ValueError(f"Could not read file {file_path} with any of the attempted encodings")
 
+def detect_file_encoding(file_path: str) -> str:
+    """
+    Return the first of the encodings tried by read_file_lines that decodes the
+    whole file. The file is read in chunks, so memory use stays small.
+    """
+    for encoding in ['utf-8', 'latin-1', 'utf-16']:
+        try:
+            with open(file_path, 'r', encoding=encoding) as file:
+                while file.read(1 << 20):
+                    pass
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"Could not read file {file_path} with any of the attempted encodings")
+
+def iter_file_lines(file_path: str, start_line: int = 0) -> Iterator[Tuple[int, str]]:
+    """
+    Stream the non-empty lines of a file without loading it into memory.
+
+    The encoding is picked by detect_file_encoding, which is a streaming pass of its own.
+    
+    Args:
+        file_path: Path to the file
+        start_line: Skip lines up to and including this 1-based line number
+        
+    Yields:
+        (line_number, stripped_line) pairs; line numbers count every line, including empty ones
+    """
+    encoding = detect_file_encoding(file_path)
+
+    with open(file_path, 'r', encoding=encoding) as file:
+        for line_number, line in enumerate(file, 1):
+            if line_number <= start_line:
+                continue
+            line = line.strip()
+            if line:
+                yield line_number, line
+
+def process_line(line):
+    """
+    Process a line from a file to extract URL and JSON data.
+    
+    Handles two formats:
+    1. Two columns per row, separated by tabs: URL and JSON
+    2. One column: JSON only (URL will be extracted from the JSON)
+    
+    Args:
+        line: Line from the file
+        
+    Returns:
+        Tuple of (url, json_data)
+    """
+    parts = line.strip().split('\t')
+    
+    if len(parts) >= 2:
+        # Format: URL and JSON 
+        url = parts[0]
+        json_data = parts[1]
+        return url, json_data
+    elif len(parts) == 1:
+        # Format: JSON only, extract URL from within the JSON
+        json_data = parts[0]
+        try:
+            json_obj = json.loads(json_data)
+            
+            # Try to extract URL from common fields
+            url = None
+            for field in ["url", "@id", "identifier"]:
+                if field in json_obj and json_obj[field]:
+                    url = json_obj[field]
+                    break
+                    
+            if not url:
+                return None, None
+                
+            return url, json_data
+        except Exception as e:
+            print(f"Error extracting URL from JSON: {str(e)}")
+            return None, None
+    else:
+        return None, None
+
 def int64_hash(string):
     """
     Compute a hash value for a string, ensuring it fits within int64 range.
@@ -0,0 +1,230 @@
+"""
+Binary embeddings store written by the data loader.
+
+A store with base path P (the old embeddings file path) is three files:
+
+    P.vectors.npy   float32 or float16 matrix, one row per document
+    P.offsets.npy   int64 byte offsets into the sidecar, one more than there are rows
+    P.docs.tsv      sidecar, one line per document: id, url, name, schema_json
+
+Both .npy files are standard NumPy arrays, so reloading a site or re-targeting it
+to another vector database memory-maps the vectors instead of parsing floats from
+text, and reads document rows by offset.
+
+The writer appends rows as batches are uploaded and rewrites the .npy headers
+after each batch, so the files are always loadable and an interrupted load can
+reopen the store and keep appending.
+"""
+
+import os
+import struct
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+VECTORS_SUFFIX = ".vectors.npy"
+OFFSETS_SUFFIX = ".offsets.npy"
+DOCS_SUFFIX = ".docs.tsv"
+
+# Fixed .npy header size, so the header can be rewritten in place as rows are added
+_NPY_HEADER_BYTES = 128
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+
+
+def store_exists(base_path: str) -> bool:
+    return os.path.exists(base_path + VECTORS_SUFFIX) and os.path.exists(base_path + OFFSETS_SUFFIX)
+
+
+def remove_store(base_path: str) -> None:
+    for suffix in (VECTORS_SUFFIX, OFFSETS_SUFFIX, DOCS_SUFFIX):
+        if os.path.exists(base_path + suffix):
+            os.unlink(base_path + suffix)
+
+
+def _npy_header(dtype: np.dtype, shape: tuple) -> bytes:
+    header = "{'descr': %r, 'fortran_order': False, 'shape': %r, }" % (dtype.str, tuple(shape))
+    body_length = _NPY_HEADER_BYTES - len(_NPY_MAGIC) - 2
+    if len(header) + 1 > body_length:
+        raise ValueError(f"Array shape {shape} does not fit in the .npy header")
+    return _NPY_MAGIC + struct.pack("<H", body_length) + (header.ljust(body_length - 1) + "\n").encode("latin1")
+
+
+class _NpyAppender:
+    """Append-only writer for a .npy file whose first dimension grows."""
+
+    def __init__(self, path: str, dtype, row_shape: tuple, rows: int = 0):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        self.rows = rows
+        row_bytes = self.dtype.itemsize * int(np.prod(self.row_shape, dtype=np.int64))
+        mode = "r+b" if rows and os.path.exists(path) else "w+b"
+        self._file = open(path, mode)
+        self._file.truncate(_NPY_HEADER_BYTES + rows * row_bytes)
+        self._write_header()
+        self._file.seek(0, os.SEEK_END)
+
+    def _write_header(self) -> None:
+        self._file.seek(0)
+        self._file.write(_npy_header(self.dtype, (self.rows,) + self.row_shape))
+
+    def append(self, rows: np.ndarray) -> None:
+        rows = np.ascontiguousarray(rows, dtype=self.dtype).reshape((-1,) + self.row_shape)
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(rows.tobytes())
+        self.rows += len(rows)
+
+    def flush(self) -> None:
+        self._write_header()
+        self._file.flush()
+        self._file.seek(0, os.SEEK_END)
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+
+def _npy_rows(path: str) -> int:
+    """Rows recorded in a .npy header, or 0 if the file is missing or unreadable."""
+    try:
+        with open(path, "rb") as f:
+            np.lib.format.read_magic(f)
+            shape, _, _ = np.lib.format.read_array_header_1_0(f)
+        return shape[0]
+    except Exception:
+        return 0
+
+
+def _clean_field(value: Any) -> str:
+    return str(value or "").replace("\t", " ").replace("\n", " ").replace("\r", " ")
+
+
+class EmbeddingStoreWriter:
+    """
+    Appends documents and their embeddings to a store.
+
+    Args:
+        base_path: Store base path
+        dtype: "float32" or "float16" for the vectors
+        append: Keep the rows of an existing store (resuming an interrupted load)
+        max_rows: When appending, keep at most this many of them: the rows covered by
+                  the load checkpoint, dropping any written after it was last saved
+    """
+
+    def __init__(self, base_path: str, dtype: str = "float32", append: bool = False,
+                 max_rows: Optional[int] = None):
+        self.base_path = base_path
+        self.dtype = np.dtype(dtype)
+        self._vectors: Optional[_NpyAppender] = None
+        rows = 0
+        if append and store_exists(base_path):
+            # The three files are written in order; keep only the rows all of them have
+            rows = min(_npy_rows(base_path + VECTORS_SUFFIX), max(0, _npy_rows(base_path + OFFSETS_SUFFIX) - 1))
+            if max_rows is not None:
+                rows = min(rows, max_rows)
+            offsets = np.load(base_path + OFFSETS_SUFFIX, mmap_mode="r")
+            docs_end = int(offsets[rows]) if len(offsets) > rows else 0
+            del offsets
+            vectors = np.load(base_path + VECTORS_SUFFIX, mmap_mode="r")
+            self.dtype, dim = vectors.dtype, vectors.shape[1]
+            del vectors
+            self._vectors = _NpyAppender(base_path + VECTORS_SUFFIX, self.dtype, (dim,), rows)
+        else:
+            remove_store(base_path)
+            docs_end = 0
+        if rows:
+            self._offsets = _NpyAppender(base_path + OFFSETS_SUFFIX, np.int64, (), rows + 1)
+        else:
+            self._offsets = _NpyAppender(base_path + OFFSETS_SUFFIX, np.int64, ())
+            self._offsets.append(np.zeros(1, dtype=np.int64))
+        self._docs = open(base_path + DOCS_SUFFIX, "r+b" if rows else "wb")
+        self._docs.truncate(docs_end)
+        self._docs.seek(docs_end)
+        self._docs_end = docs_end
+        self.rows = rows
+
+    def add(self, documents: List[Dict[str, Any]]) -> None:
+        """Append documents that carry an "embedding" field."""
+        if not documents:
+            return
+        vectors = np.asarray([doc["embedding"] for doc in documents], dtype=np.float32)
+        if self._vectors is None:
+            self._vectors = _NpyAppender(self.base_path + VECTORS_SUFFIX, self.dtype, (vectors.shape[1],))
+        offsets = np.empty(len(documents), dtype=np.int64)
+        for i, doc in enumerate(documents):
+            line = "\t".join((
+                _clean_field(doc.get("id")),
+                _clean_field(doc.get("url")),
+                _clean_field(doc.get("name")),
+                doc["schema_json"].replace("\n", " "),
+            )).encode("utf-8") + b"\n"
+            self._docs.write(line)
+            self._docs_end += len(line)
+            offsets[i] = self._docs_end
+        self._docs.flush()
+        self._vectors.append(vectors)
+        self._offsets.append(offsets)
+        # Headers are rewritten after the data, so a crash never leaves a header pointing past it
+        self._vectors.flush()
+        self._offsets.flush()
+        self.rows += len(documents)
+
+    def close(self) -> None:
+        if self._vectors is not None:
+            self._vectors.close()
+        self._offsets.close()
+        self._docs.close()
+
+    def __enter__(self) -> "EmbeddingStoreWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class EmbeddingStore:
+    """
+    Read-only view of a store; vectors and offsets are memory-mapped. The sidecar
+    is opened once, so the view keeps reading the files it was opened on even if
+    they are replaced on disk.
+    """
+
+    def __init__(self, base_path: str):
+        self.base_path = base_path
+        self.vectors = np.load(base_path + VECTORS_SUFFIX, mmap_mode="r")
+        self.offsets = np.load(base_path + OFFSETS_SUFFIX, mmap_mode="r")
+        self._count = min(len(self.vectors), len(self.offsets) - 1)
+        self._docs = open(base_path + DOCS_SUFFIX, "rb")
+        self._docs_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def documents(self, start: int, stop: int, site: str) -> List[Dict[str, Any]]:
+        """Document rows [start, stop) without embeddings."""
+        stop = min(stop, self._count)
+        if start >= stop:
+            return []
+        begin, end = int(self.offsets[start]), int(self.offsets[stop])
+        with self._docs_lock:
+            self._docs.seek(begin)
+            data = self._docs.read(end - begin)
+        documents = []
+        for line in data.decode("utf-8").split("\n")[: stop - start]:
+            doc_id, url, name, schema_json = line.split("\t", 3)
+            documents.append({"id": doc_id, "url": url, "name": name or "Unnamed Item",
+                              "schema_json": schema_json, "site": site})
+        return documents
+
+    def iter_batches(self, site: str, batch_size: int = 100, start: int = 0) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield documents with embeddings in batches. Each batch's vectors are converted
+        to Python floats in one vectorized call, since providers serialize lists.
+        """
+        for i in range(start, self._count, batch_size):
+            documents = self.documents(i, i + batch_size, site)
+            vectors = np.asarray(self.vectors[i:i + len(documents)], dtype=np.float32).tolist()
+            for doc, vector in zip(documents, vectors):
+                doc["embedding"] = vector
+            yield documents
@@ -0,0 +1,290 @@
+"""
+Streaming embed-and-upload pipeline for the data loader.
+
+Documents flow through three stages connected by bounded queues:
+
+    parse (one producer) -> embed (N workers) -> upload (M workers)
+
+The parse stage is either a plain iterator or an async iterator fed by worker
+processes (see parallel_parse.py). Only a few batches are in memory at any time, no matter how large the input is.
+Progress is recorded in a checkpoint file as the input position up to which every
+batch has been uploaded, so an interrupted load resumes from there. Batches past
+that position that had already been uploaded are sent again on resume, which is
+harmless because documents are upserted by id. Uploaded batches are handed to
+on_uploaded (the embeddings store) in input order as that position advances, so
+the store holds exactly the checkpointed documents and never gets a batch twice.
+"""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+
+@dataclass
+class StageStats:
+    workers: int = 1
+    documents: int = 0
+    busy: float = 0.0  # Seconds spent working (or, for parse, waiting for input), summed over workers
+
+    def rate(self) -> float:
+        """Documents per busy second of one worker."""
+        return self.documents / self.busy if self.busy else 0.0
+
+    def utilization(self, elapsed: float) -> float:
+        """Fraction of the run the stage's workers were busy; the highest one is the bottleneck."""
+        return self.busy / (elapsed * self.workers) if elapsed else 0.0
+
+
+@dataclass
+class PipelineStats:
+    documents: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+    elapsed: float = 0.0
+    parse: StageStats = field(default_factory=StageStats)
+    embed: StageStats = field(default_factory=StageStats)
+    upload: StageStats = field(default_factory=StageStats)
+
+    def summary(self) -> str:
+        lines = []
+        for name in ("parse", "embed", "upload"):
+            stage = getattr(self, name)
+            lines.append(f"  {name:<6} {stage.documents:>9} docs  {stage.rate():>9.1f} docs/s per worker  "
+                         f"x{stage.workers:<3} {stage.utilization(self.elapsed):>6.1%} busy")
+        return "\n".join(lines)
+
+
+@dataclass
+class _Batch:
+    seq: int
+    position: int  # Input position (line number) of the last item in the batch
+    documents: List[Dict[str, Any]]
+    embeddings: Optional[List[List[float]]] = None
+
+
+class LoadCheckpoint:
+    """
+    Input position up to which all batches have been uploaded, persisted as JSON.
+
+    Batches finish out of order; the position only advances over a contiguous run
+    of finished batches, and never past a batch that failed.
+    """
+
+    def __init__(self, path: str, source: Dict[str, Any]):
+        self.path = path
+        self.source = source
+        self.position = 0
+        self.documents = 0
+        self._next_seq = 0
+        self._finished: Dict[int, Tuple[int, int]] = {}
+
+    def load(self) -> int:
+        """Return the position to resume from, or 0 if there is no checkpoint for this source."""
+        if not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return 0
+        if data.get("source") != self.source:
+            print(f"Checkpoint {self.path} is for a different input, starting from the beginning")
+            return 0
+        self.position = int(data.get("position", 0))
+        self.documents = int(data.get("documents", 0))
+        return self.position
+
+    def mark_done(self, seq: int, position: int, documents: int) -> None:
+        self._finished[seq] = (position, documents)
+        advanced = False
+        while self._next_seq in self._finished:
+            position, documents = self._finished.pop(self._next_seq)
+            self.position = max(self.position, position)
+            self.documents += documents
+            self._next_seq += 1
+            advanced = True
+        if advanced:
+            self.save()
+
+    def save(self) -> None:
+        data = {"source": self.source, "position": self.position, "documents": self.documents}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Failed to save checkpoint {self.path}: {e}")
+
+    def remove(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+async def run_load_pipeline(
+    items: Union[Iterable[Tuple[int, List[Dict[str, Any]]]], AsyncIterable[Tuple[int, List[Dict[str, Any]]]]],
+    embed_batch: Callable[[List[str]], Awaitable[List[List[float]]]],
+    upload_batch: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+    batch_size: int = 100,
+    embed_concurrency: int = 4,
+    upload_concurrency: int = 2,
+    queue_size: int = 4,
+    checkpoint: Optional[LoadCheckpoint] = None,
+    on_uploaded: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+) -> PipelineStats:
+    """
+    Embed and upload documents with bounded concurrency and memory.
+
+    Args:
+        items: (position, documents) pairs in input order, e.g. one per input line; a plain
+               or async iterable
+        embed_batch: Coroutine returning one embedding per text (batch_get_embeddings)
+        upload_batch: Coroutine uploading documents that carry an "embedding" field
+        batch_size: Documents per embed/upload batch
+        embed_concurrency: Embedding batches in flight
+        upload_concurrency: Upload batches in flight
+        queue_size: Batches buffered between stages
+        checkpoint: Records progress after each contiguous run of uploaded batches
+        on_uploaded: Called with each uploaded batch, e.g. to append to the embeddings file.
+                     Batches are passed in input order, before the checkpoint advances over
+                     them; batches after a failed one are not passed at all
+
+    Returns:
+        PipelineStats with per-stage throughput. A batch that fails to embed or upload
+        is reported and counted in failed_batches; the checkpoint does not advance past it.
+    """
+    embed_concurrency = max(1, embed_concurrency)
+    upload_concurrency = max(1, upload_concurrency)
+    stats = PipelineStats(
+        parse=StageStats(workers=1),
+        embed=StageStats(workers=embed_concurrency),
+        upload=StageStats(workers=upload_concurrency),
+    )
+    start = time.perf_counter()
+    embed_queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+    upload_queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+    # Uploaded batches waiting for the ones before them, and the first batch that failed
+    uploaded: Dict[int, List[Dict[str, Any]]] = {}
+    next_seq = 0
+    first_failed: Optional[int] = None
+
+    def release_uploaded(seq: int, documents: List[Dict[str, Any]]):
+        nonlocal next_seq
+        if first_failed is not None and seq > first_failed:
+            return  # Never released; the rerun from the checkpoint uploads it again
+        uploaded[seq] = documents
+        while next_seq in uploaded:
+            on_uploaded(uploaded.pop(next_seq))
+            next_seq += 1
+
+    async def iterate_items():
+        # Time spent waiting for the next item is the cost of the parse stage as seen by the pipeline
+        if hasattr(items, "__aiter__"):
+            iterator = items.__aiter__()
+            while True:
+                wait_start = time.perf_counter()
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    stats.parse.busy += time.perf_counter() - wait_start
+                yield item
+        else:
+            iterator = iter(items)
+            while True:
+                wait_start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    stats.parse.busy += time.perf_counter() - wait_start
+                yield item
+
+    async def produce():
+        seq = 0
+        pending: List[Dict[str, Any]] = []
+        position = 0
+        async for position, documents in iterate_items():
+            stats.parse.documents += len(documents)
+            pending.extend(documents)
+            if len(pending) >= batch_size:
+                await embed_queue.put(_Batch(seq, position, pending))
+                seq += 1
+                pending = []
+        if pending:
+            await embed_queue.put(_Batch(seq, position, pending))
+        for _ in range(embed_concurrency):
+            await embed_queue.put(None)
+
+    def batch_failed(batch: _Batch, stage: str, error: Exception):
+        nonlocal first_failed
+        stats.failed_batches += 1
+        if first_failed is None or batch.seq < first_failed:
+            first_failed = batch.seq
+            for seq in [seq for seq in uploaded if seq > batch.seq]:
+                del uploaded[seq]
+        print(f"Error in {stage} for batch {batch.seq + 1} ({len(batch.documents)} documents): {error}")
+
+    async def embed_worker():
+        while True:
+            batch = await embed_queue.get()
+            if batch is None:
+                return
+            work_start = time.perf_counter()
+            try:
+                batch.embeddings = await embed_batch([doc["schema_json"] for doc in batch.documents])
+            except Exception as e:
+                batch_failed(batch, "embedding", e)
+                continue
+            finally:
+                stats.embed.busy += time.perf_counter() - work_start
+            stats.embed.documents += len(batch.documents)
+            await upload_queue.put(batch)
+
+    async def upload_worker():
+        while True:
+            batch = await upload_queue.get()
+            if batch is None:
+                return
+            documents = []
+            for doc, embedding in zip(batch.documents, batch.embeddings):
+                doc = doc.copy()
+                doc["embedding"] = embedding
+                documents.append(doc)
+            work_start = time.perf_counter()
+            try:
+                await upload_batch(documents)
+            except Exception as e:
+                batch_failed(batch, "upload", e)
+                continue
+            finally:
+                stats.upload.busy += time.perf_counter() - work_start
+            stats.upload.documents += len(documents)
+            if on_uploaded is not None:
+                release_uploaded(batch.seq, documents)
+            stats.batches += 1
+            stats.documents += len(documents)
+            if checkpoint is not None:
+                checkpoint.mark_done(batch.seq, batch.position, len(documents))
+            print(f"Uploaded batch {batch.seq + 1} ({len(documents)} documents, {stats.documents} total)")
+
+    embed_tasks = [asyncio.ensure_future(embed_worker()) for _ in range(embed_concurrency)]
+    upload_tasks = [asyncio.ensure_future(upload_worker()) for _ in range(upload_concurrency)]
+    try:
+        await produce()
+        await asyncio.gather(*embed_tasks)
+        for _ in upload_tasks:
+            await upload_queue.put(None)
+        await asyncio.gather(*upload_tasks)
+    finally:
+        for task in embed_tasks + upload_tasks:
+            task.cancel()
+
+    stats.elapsed = time.perf_counter() - start
+    return stats
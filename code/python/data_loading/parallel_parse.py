@@ -0,0 +1,116 @@
+"""
+Multi-process parsing stage for bulk ingestion.
+
+Parsing a line (process_line, json.loads, trim_schema_json) is CPU bound and,
+for multi-GB TSV dumps, slower than the embedding API. This module splits the
+input into byte ranges aligned to line boundaries, parses the ranges in a process
+pool, and hands the documents to the async embed/upload pipeline in input order.
+
+Positions are byte offsets of the end of each line, so a load checkpoint can seek
+straight back to where it stopped.
+"""
+
+import asyncio
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterator, List, Tuple
+
+from data_loading.db_load_utils import process_line, prepare_documents_from_json
+
+# Fields carried back from the workers, in order. Sending tuples instead of dicts
+# keeps the pickled results small; the site is added back in the parent.
+_RECORD_FIELDS = ("id", "url", "name", "schema_json")
+
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+
+
+def byte_ranges(file_path: str, start: int = 0, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> Iterator[Tuple[int, int]]:
+    """
+    Yield (start, end) byte ranges of about chunk_bytes covering the file from start,
+    each ending just after a newline (or at the end of the file). start must itself
+    be at the beginning of a line.
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        position = start
+        while position < size:
+            f.seek(min(position + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            yield position, end
+            position = end
+
+
+def parse_byte_range(file_path: str, start: int, end: int, site: str, encoding: str = "utf-8") -> List[Tuple[int, List[tuple]]]:
+    """
+    Parse the lines in [start, end) of a URL/JSON file. Runs in a worker process.
+
+    Returns:
+        (end_offset_of_line, [record, ...]) for every line that produced documents,
+        where each record is a tuple of _RECORD_FIELDS
+    """
+    results = []
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        offset = start
+        while offset < end:
+            raw = f.readline()
+            if not raw:
+                break
+            offset += len(raw)
+            line = raw.decode(encoding, errors="replace").strip()
+            if not line:
+                continue
+            try:
+                url, json_data = process_line(line)
+                if url is None or json_data is None:
+                    continue
+                documents, _ = prepare_documents_from_json(url, json_data, site)
+            except Exception as e:
+                print(f"Error processing line ending at byte {offset}: {str(e)}")
+                continue
+            if documents:
+                results.append((offset, [tuple(doc[field] for field in _RECORD_FIELDS) for doc in documents]))
+    return results
+
+
+async def iter_documents_parallel(
+    file_path: str,
+    site: str,
+    start: int = 0,
+    workers: int = 4,
+    encoding: str = "utf-8",
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    Parse a URL/JSON file in a pool of worker processes.
+
+    At most 2 * workers byte ranges are parsed or waiting at a time, so memory stays
+    bounded. Results are yielded in file order.
+
+    Yields:
+        (end_offset_of_line, documents) for every line that produced documents
+    """
+    loop = asyncio.get_running_loop()
+    ranges = byte_ranges(file_path, start, chunk_bytes)
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+
+    def submit_next() -> None:
+        chunk = next(ranges, None)
+        if chunk is not None:
+            pending.append(loop.run_in_executor(pool, parse_byte_range, file_path, chunk[0], chunk[1], site, encoding))
+
+    try:
+        for _ in range(2 * workers):
+            submit_next()
+        while pending:
+            records = await pending.popleft()
+            submit_next()
+            for offset, rows in records:
+                yield offset, [dict(zip(_RECORD_FIELDS, row), site=site) for row in rows]
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
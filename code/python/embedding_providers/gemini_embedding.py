@@ -12,7 +12,6 @@ import os
 import asyncio
 import threading
 from typing import List, Optional
-import time
 
 from google import genai
 from google.genai import types
@@ -128,7 +127,7 @@ async def get_gemini_embeddings(
             error_message = str(e)
             if "429" in error_message:
                 error_message = "Rate limit exceeded. Please try again later."
-                time.sleep(5)  # Wait before retrying
+                await asyncio.sleep(5)  # Wait before retrying without blocking the event loop
             else:
                 logger.exception("Error generating Gemini embedding")
                 logger.log_with_context(
@@ -153,14 +152,15 @@ async def get_gemini_batch_embeddings(
     """
     Generate embeddings for multiple texts using Google GenAI.
     
-    Note: Gemini API processes embeddings one at a time, so this function
-    makes multiple sequential calls for batch processing.
+    All texts are sent in a single embed_content request (the API accepts up to
+    100 per request). Splitting larger inputs, running requests concurrently and
+    retrying on rate limits is done by core.embedding.batch_get_embeddings.
     
     Args:
         texts: List of texts to embed
         model: Optional model ID to use, defaults to provider's configured
                model
-        timeout: Maximum time to wait for each embedding response in seconds
+        timeout: Maximum time to wait for the embedding response in seconds
         task_type: The task type for the embedding (e.g.,
                   "SEMANTIC_SIMILARITY", "RETRIEVAL_QUERY", etc.)
         
@@ -181,60 +181,40 @@ async def get_gemini_batch_embeddings(
     
     # Get the GenAI client
     client = get_client()
-    embeddings = []
 
     # Create embedding config
     config = types.EmbedContentConfig(task_type=task_type)
     
-    # Process each text individually
-    for i, text in enumerate(texts):
-        logger.debug(f"Processing text {i+1}/{len(texts)}")
-        
+    try:
         # Use asyncio.to_thread to make the synchronous GenAI call
         # non-blocking
-        while True:
-            try:
-                # Attempt to get the embedding
-                result = await asyncio.wait_for(
-                    asyncio.to_thread(
-                        lambda t=text: client.models.embed_content(
-                            model=model,
-                            contents=t,
-                            config=config
-                        )
-                    ),
-                    timeout=timeout
+        result = await asyncio.wait_for(
+            asyncio.to_thread(
+                lambda: client.models.embed_content(
+                    model=model,
+                    contents=list(texts),
+                    config=config
                 )
+            ),
+            timeout=timeout
+        )
+    except Exception as e:
+        if "429" not in str(e):
+            logger.exception("Error generating Gemini batch embeddings")
+            logger.log_with_context(
+                LogLevel.ERROR,
+                "Gemini batch embedding generation failed",
+                {
+                    "model": model,
+                    "batch_size": len(texts),
+                    "error_type": type(e).__name__,
+                    "error_message": str(e)
+                }
+            )
+        raise
 
-                # Extract the embedding values from the response
-                embedding = result.embeddings[0].values
-                embeddings.append(embedding)
-                break
-            except Exception as e:
-                error_message = str(e)
-                if "429" in error_message:
-                    error_message = "Rate limit exceeded. Retrying..."
-                    time.sleep(5)
-                else:
-                    logger.exception("Error generating Gemini batch embedding in batch")
-                    logger.log_with_context(
-                        LogLevel.ERROR,
-                        "Gemini batch embedding generation failed",
-                        {
-                            "model": model,
-                            "batch_size": len(texts),
-                            "text_length": len(text),
-                            "error_type": type(e).__name__,
-                            "error_message": error_message
-                        }
-                    )
-                    raise
-        
+    embeddings = [embedding.values for embedding in result.embeddings]
     logger.debug(
         f"Gemini batch embeddings generated, count: {len(embeddings)}"
     )
     return embeddings
-
-
-# Note: The GenAI client handles single embeddings efficiently.
-# Batch processing can be implemented by making multiple calls if needed.
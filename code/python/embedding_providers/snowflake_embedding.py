@@ -14,10 +14,10 @@ Backwards compatibility is not guaranteed at this time.
 """
 
 import logging
-import httpx
 from typing import List
 
 from core.config import CONFIG
+from core.http_pool import get_http_client
 from core.utils import snowflake
 
 logger = logging.getLogger(__name__)
@@ -30,7 +30,7 @@ async def cortex_embed(text: str, model: str|None = None) -> List[float]:
     See: https://docs.snowflake.com/en/user-guide/snowflake-cortex/cortex-llm-rest-api#label-cortex-llm-embed-function
     """
     cfg = CONFIG.get_embedding_provider("snowflake")
-    async with httpx.AsyncClient() as client:
+    async with get_http_client() as client:
         response = await client.post(
             snowflake.get_account_url(cfg) + "/api/v2/cortex/inference:embed",
             json={
@@ -61,7 +61,7 @@ async def get_snowflake_batch_embeddings(texts: List[str], model: str|None = Non
         List of embedding vectors, each a list of floats
     """
     cfg = CONFIG.get_embedding_provider("snowflake")
-    async with httpx.AsyncClient() as client:
+    async with get_http_client() as client:
         response = await client.post(
             snowflake.get_account_url(cfg) + "/api/v2/cortex/inference:embed",
             json={
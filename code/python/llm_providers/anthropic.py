@@ -20,6 +20,7 @@ from core.config import CONFIG
 import threading
 
 from llm_providers.llm_provider import LLMProvider
+from core.prompt_cache import record_usage, split_prompt
 
 logger = logging.getLogger(__name__)
 
@@ -60,10 +61,20 @@ class AnthropicProvider(LLMProvider):
         return cls._client
 
     @classmethod
-    def _build_messages(cls, prompt: str, schema: Dict[str, Any]) -> List[Dict[str, str]]:
+    def _build_messages(cls, prompt: str, schema: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Construct the message sequence for JSON-schema enforcement.
+        A prompt with a shared prefix is sent as two blocks, with the prefix
+        marked for prompt caching.
         """
+        prefix, suffix = split_prompt(prompt)
+        if prefix and suffix:
+            content = [
+                {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": suffix}
+            ]
+        else:
+            content = str(prompt)
         return [
             {
                 "role": "assistant",
@@ -71,7 +82,7 @@ class AnthropicProvider(LLMProvider):
             },
             {
                 "role": "user",
-                "content": prompt
+                "content": content
             }
         ]
 
@@ -124,6 +135,13 @@ class AnthropicProvider(LLMProvider):
             logger.error("Completion request timed out after %s seconds", timeout)
             return {}
 
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            # input_tokens excludes the tokens read from or written to the prompt cache
+            cached = getattr(usage, "cache_read_input_tokens", 0) or 0
+            written = getattr(usage, "cache_creation_input_tokens", 0) or 0
+            record_usage("anthropic", model, (usage.input_tokens or 0) + cached + written, cached, written)
+
         # Extract the response content
         content = response.content[0].text
         return self.clean_response(content)
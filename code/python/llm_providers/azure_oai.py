@@ -16,6 +16,7 @@ import threading
 from typing import Dict, Any, Optional
 
 from llm_providers.llm_provider import LLMProvider
+from core.prompt_cache import record_usage
 from misc.logger.logging_config_helper import get_configured_logger, LogLevel
 logger = get_configured_logger("azure_oai")
 
@@ -209,6 +210,13 @@ class AzureOpenAIProvider(LLMProvider):
             if not response or not hasattr(response, 'choices') or not response.choices:
                 logger.error("Invalid or empty response from Azure OpenAI")
                 return {}
+
+            # Prompt prefixes are cached automatically; report how much of the input was served from cache
+            usage = getattr(response, 'usage', None)
+            if usage is not None:
+                details = getattr(usage, 'prompt_tokens_details', None)
+                record_usage("azure_openai", model_to_use, getattr(usage, 'prompt_tokens', 0),
+                             getattr(details, 'cached_tokens', 0) if details is not None else 0)
                 
             # Check if message and content exist
             if not hasattr(response.choices[0], 'message') or not hasattr(response.choices[0].message, 'content'):
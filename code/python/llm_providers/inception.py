@@ -12,12 +12,12 @@ import os
 import requests
 import json
 import re
-import aiohttp
 import asyncio
 import threading
 from typing import Dict, Any, Optional
 
 from llm_providers.llm_provider import LLMProvider
+from core.http_pool import get_aiohttp_session
 
 
 class ConfigurationError(RuntimeError):
@@ -115,21 +115,21 @@ class InceptionProvider(LLMProvider):
             payload["diffusing"] = True
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.API_URL, 
-                    headers=HEADERS, 
-                    json=payload, 
-                    timeout=timeout
-                ) as resp:
-                    resp.raise_for_status()
-                    data = await resp.json()
-                    content = data["choices"][0]["message"]["content"]
-                    
-                    # If schema was provided, parse the response as JSON
-                    if schema:
-                        return self.clean_response(content)
-                    return content
+            session = get_aiohttp_session()
+            async with session.post(
+                self.API_URL, 
+                headers=HEADERS, 
+                json=payload, 
+                timeout=timeout
+            ) as resp:
+                resp.raise_for_status()
+                data = await resp.json()
+                content = data["choices"][0]["message"]["content"]
+                
+                # If schema was provided, parse the response as JSON
+                if schema:
+                    return self.clean_response(content)
+                return content
         except Exception as e:
             # Log the error and return empty response
             import logging
@@ -23,6 +23,7 @@ from misc.logger.logger import LogLevel
 
 
 from llm_providers.llm_provider import LLMProvider
+from core.prompt_cache import record_usage
 
 from misc.logger.logging_config_helper import get_configured_logger, LogLevel
 logger = get_configured_logger("llm")
@@ -79,6 +80,16 @@ class OpenAIProvider(LLMProvider):
             {"role": "user", "content": prompt}
         ]
 
+    @classmethod
+    def record_cache_usage(cls, provider_name: str, model: str, response) -> None:
+        """Report input and cached prompt tokens from the response usage."""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        record_usage(provider_name, model, getattr(usage, "prompt_tokens", 0),
+                     getattr(details, "cached_tokens", 0) if details is not None else 0)
+
     @classmethod
     def clean_response(cls, content: str) -> Dict[str, Any]:
         """
@@ -112,6 +123,8 @@ class OpenAIProvider(LLMProvider):
         
         client = self.get_client()
         messages = self._build_messages(prompt, schema)
+        # Prefix caching is automatic; the cache key keeps calls sharing a prefix on the same cache
+        extra_body = {"prompt_cache_key": prompt.cache_key()} if getattr(prompt, "prefix_length", 0) else None
 
         try:
             response = await asyncio.wait_for(
@@ -120,12 +133,14 @@ class OpenAIProvider(LLMProvider):
                     messages=messages,
                     temperature=temperature,
                     max_tokens=max_tokens,
+                    extra_body=extra_body,
                 ),
                 timeout
             )
         except asyncio.TimeoutError:
             logger.error("Completion request timed out after %s seconds", timeout)
             return {}
+        self.record_cache_usage("openai", model, response)
 
         try:
             return self.clean_response(response.choices[0].message.content)
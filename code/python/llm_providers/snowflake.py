@@ -16,10 +16,10 @@ Backwards compatibility is not guaranteed at this time.
 import json
 import re
 import logging
-import httpx
 from typing import Dict, Any, List, Optional
 
 from core.config import CONFIG
+from core.http_pool import get_http_client
 from llm_providers.llm_provider import LLMProvider
 from core.utils import snowflake
 
@@ -124,7 +124,7 @@ async def cortex_complete(
 
 async def post(api: str, request: dict, timeout: float) -> dict:
     cfg = CONFIG.llm_endpoints.get("snowflake")
-    async with httpx.AsyncClient() as client:
+    async with get_http_client() as client:
         response =  await client.post(
             snowflake.get_account_url(cfg) + api,
             json=request,
@@ -14,7 +14,7 @@ from core.baseHandler import NLWebHandler
 from core.llm import ask_llm
 from core.prompts import PromptRunner
 from core.retriever import search
-from core.prompts import find_prompt, fill_prompt
+from core.prompts import find_prompt, fill_prompt_with_prefix
 from core.utils.json_utils import trim_json, trim_json_hard
 from misc.logger.logging_config_helper import get_configured_logger
 from core.utils.utils import log
@@ -92,9 +92,10 @@ class GenerateAnswer(NLWebHandler):
             logger.debug(f"Ranking item: {name} from {site}")
             prompt_str, ans_struc = find_prompt(site, self.item_type, self.RANKING_PROMPT_NAME)
             description = trim_json_hard(json_str)
-            prompt = fill_prompt(prompt_str, self, {"item.description": description})
+            prompt = fill_prompt_with_prefix(prompt_str, self, {"item.description": description}, "item.description")
             logger.debug(f"Sending ranking request to LLM for item: {name}")
-            ranking = await ask_llm(prompt, ans_struc, level="low", query_params=self.query_params)
+            ranking = await ask_llm(prompt, ans_struc, level="low", query_params=self.query_params, call_class="ranking",
+                                   prompt_name=self.RANKING_PROMPT_NAME)
             logger.debug(f"Received ranking score: {ranking.get('score', 'N/A')} for item: {name}")
             ansr = {
                 'url': url,
@@ -146,7 +147,7 @@ class GenerateAnswer(NLWebHandler):
     async def getDescription(self, url, json_str, query, answer, name, site):
         try:
             logger.debug(f"Getting description for item: {name}")
-            description = await PromptRunner(self).run_prompt(self.DESCRIPTION_PROMPT_NAME)
+            description = await PromptRunner(self).run_prompt(self.DESCRIPTION_PROMPT_NAME, call_class="summarization")
             logger.debug(f"Got description for item: {name}")
             return (url, name, site, description["description"], json_str)
         except Exception as e:
@@ -173,7 +174,8 @@ class GenerateAnswer(NLWebHandler):
                 await self.send_message(message)
                 return
                 
-            response = await PromptRunner(self).run_prompt(self.SYNTHESIZE_PROMPT_NAME, timeout=100, verbose=True)
+            response = await PromptRunner(self).run_prompt(self.SYNTHESIZE_PROMPT_NAME, timeout=100, verbose=True,
+                                                           call_class="summarization")
             logger.debug(f"Synthesis response received")
             
             json_results = []
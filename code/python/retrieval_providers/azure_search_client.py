@@ -30,6 +30,7 @@ from azure.search.documents.indexes.models import (
 
 from core.config import CONFIG
 from core.embedding import get_embedding
+from core.search_result import SearchResult
 from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
 
@@ -388,7 +389,7 @@ class AzureSearchClient:
     
     async def search(self, query: str, site: Union[str, List[str]], 
                    num_results: int = 50, index_name: Optional[str] = None, 
-                   query_params: Optional[Dict[str, Any]] = None, **kwargs) -> List[List[str]]:
+                   query_params: Optional[Dict[str, Any]] = None, query_embedding: Optional[List[float]] = None, **kwargs) -> List[List[str]]:
         """
         Search the Azure AI Search index for records filtered by site and ranked by vector similarity
         
@@ -398,6 +399,7 @@ class AzureSearchClient:
             num_results: Maximum number of results to return
             index_name: Optional index name (defaults to configured index name)
             query_params: Additional query parameters
+            query_embedding: Precomputed query vector; skips embedding the query here
             
         Returns:
             List[List[str]]: List of search results
@@ -406,7 +408,7 @@ class AzureSearchClient:
         
         # Get embedding for the query
         start_embed = time.time()
-        embedding = await get_embedding(query, query_params=query_params)
+        embedding = query_embedding or await get_embedding(query, query_params=query_params)
         embed_time = time.time() - start_embed
         
         # Perform the search
@@ -481,7 +483,8 @@ class AzureSearchClient:
             # Process results into a more convenient format
             processed_results = []
             for result in results:
-                processed_result = [result["url"], result["schema_json"], result["name"], result["site"]]
+                processed_result = SearchResult(result["url"], result["schema_json"], result["name"], result["site"],
+                                                score=result.get("@search.score"))
                 processed_results.append(processed_result)
             
             logger.debug(f"Retrieved {len(processed_results)} results")
@@ -555,7 +558,7 @@ class AzureSearchClient:
     
     async def search_all_sites(self, query: str, num_results: int = 50, 
                              index_name: Optional[str] = None,
-                             query_params: Optional[Dict[str, Any]] = None, **kwargs) -> List[List[str]]:
+                             query_params: Optional[Dict[str, Any]] = None, query_embedding: Optional[List[float]] = None, **kwargs) -> List[List[str]]:
         """
         Search across all sites using vector similarity
         
@@ -564,6 +567,7 @@ class AzureSearchClient:
             num_results: Maximum number of results to return
             index_name: Optional index name (defaults to configured index name)
             query_params: Additional query parameters
+            query_embedding: Precomputed query vector; skips embedding the query here
             
         Returns:
             List[List[str]]: List of search results
@@ -573,7 +577,7 @@ class AzureSearchClient:
         logger.debug(f"Query: {query}")
         
         try:
-            query_embedding = await get_embedding(query, query_params=query_params)
+            query_embedding = query_embedding or await get_embedding(query, query_params=query_params)
             logger.debug(f"Generated embedding with dimension: {len(query_embedding)}")
             
             # Validate embedding dimension
@@ -607,7 +611,8 @@ class AzureSearchClient:
             # Process results into a more convenient format
             processed_results = []
             for result in results:
-                processed_result = [result["url"], result["schema_json"], result["name"], result["site"]]
+                processed_result = SearchResult(result["url"], result["schema_json"], result["name"], result["site"],
+                                                score=result.get("@search.score"))
                 processed_results.append(processed_result)
             
             logger.info(f"Global search completed, found {len(processed_results)} results")
@@ -14,6 +14,7 @@ from elasticsearch import AsyncElasticsearch
 from elasticsearch.helpers import async_bulk
 from core.config import CONFIG
 from core.embedding import get_embedding
+from core.search_result import SearchResult
 from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
 
@@ -369,7 +370,7 @@ class ElasticsearchClient:
             schema_json = source.get('schema_json', '{}')
             name = source.get('name', '')
             site_name = source.get('site', '')
-            processed_results.append([url, schema_json, name, site_name])
+            processed_results.append(SearchResult(url, schema_json, name, site_name, score=hit.get('_score')))
             
         return processed_results
     
@@ -416,7 +417,7 @@ class ElasticsearchClient:
             raise
         
     async def search(self, query: str, site: Union[str, List[str]], 
-                    num_results: int = 50, query_params: Optional[Dict[str, Any]] = None, **kwargs) -> List[List[str]]:
+                    num_results: int = 50, query_params: Optional[Dict[str, Any]] = None, query_embedding: Optional[List[float]] = None, **kwargs) -> List[List[str]]:
         """
         Search for documents matching the query and site using vector similarity.
         
@@ -425,6 +426,7 @@ class ElasticsearchClient:
             site: Site identifier or list of sites
             num_results: Maximum number of results to return
             query_params: Query parameters for embedding generation
+            query_embedding: Precomputed query vector; skips embedding the query here
             **kwargs: Additional parameters
             
         Returns:
@@ -434,7 +436,7 @@ class ElasticsearchClient:
         logger.info(f"Starting Elasticsearch - query: '{query[:50]}...', site: {site}, index: {index_name}")
         
         start_embed = time.time()
-        embedding = await get_embedding(query, query_params=query_params)
+        embedding = query_embedding or await get_embedding(query, query_params=query_params)
         embed_time = time.time() - start_embed
         logger.debug(f"Embedding generated in {embed_time:.2f}s, dimension: {len(embedding)}")
         
@@ -522,7 +524,7 @@ class ElasticsearchClient:
             )
             raise
     
-    async def search_all_sites(self, query: str, num_results: int = 50, query_params: Optional[Dict[str, Any]] = None, **kwargs) -> List[List[str]]:
+    async def search_all_sites(self, query: str, num_results: int = 50, query_params: Optional[Dict[str, Any]] = None, query_embedding: Optional[List[float]] = None, **kwargs) -> List[List[str]]:
         """
         Search across all sites using vector similarity
         
@@ -530,6 +532,7 @@ class ElasticsearchClient:
             query: The search query to embed and search with
             num_results: Maximum number of results to return (default 50)
             query_params: Optional parameters for embedding generation
+            query_embedding: Precomputed query vector; skips embedding the query here
             **kwargs: Additional parameters
             
         Returns:
@@ -541,7 +544,7 @@ class ElasticsearchClient:
         
         try:
             start_embed = time.time()
-            embedding = await get_embedding(query, query_params=query_params)
+            embedding = query_embedding or await get_embedding(query, query_params=query_params)
             embed_time = time.time() - start_embed
             logger.debug(f"Embedding generated in {embed_time:.2f}s, dimension: {len(embedding)}")
             
@@ -0,0 +1,595 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+In-process vector index - serves retrieval from memory-mapped embedding matrices,
+with no database server and no network hop.
+
+Each site is a partition under database_path/index_name/, stored in the data
+loader's binary embeddings format (see data_loading/embedding_store.py): a float32
+.npy matrix of unit-length vectors plus a sidecar file of document rows.
+
+- Partitions below ann_threshold rows are searched exactly, with one vectorized
+  dot product over the memory-mapped matrix.
+- Larger partitions are searched through an approximate index built over the same
+  matrix: IVF (k-means lists, computed with NumPy) or, with ann_method "hnsw" and
+  hnswlib installed, HNSW. The index is built in the background and saved next to
+  the partition; until it is ready, and for rows added after it was built, the
+  partition is scanned exactly.
+
+Uploading a document id that already exists supersedes the earlier row. Partitions
+are compacted once a quarter of their rows have been superseded.
+"""
+
+import asyncio
+import os
+import shutil
+import threading
+import time
+from typing import List, Dict, Union, Optional, Any, NamedTuple, Tuple
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from core.config import CONFIG
+from core.embedding import get_embedding
+from core.search_result import SearchResult
+from data_loading.embedding_store import (
+    DOCS_SUFFIX, OFFSETS_SUFFIX, VECTORS_SUFFIX,
+    EmbeddingStore, EmbeddingStoreWriter, store_exists,
+)
+from misc.logger.logging_config_helper import get_configured_logger
+from misc.logger.logger import LogLevel
+
+logger = get_configured_logger("local_index_client")
+
+DEFAULT_ANN_THRESHOLD = 50000
+
+# Searches over fewer rows than this run on the event loop; a worker thread costs more
+_INLINE_SEARCH_ROWS = 20000
+_PARTITION_NAME = "partition"
+_IVF_SUFFIX = ".ivf.npz"
+_HNSW_SUFFIX = ".hnsw"
+# Rebuild the approximate index once this fraction of rows was added after it was built
+_REBUILD_FRACTION = 0.1
+# Compact a partition once this fraction of its rows is superseded
+_COMPACT_FRACTION = 0.25
+_COMPACT_MIN_ROWS = 1000
+_IVF_MIN_PROBES = 16
+_IVF_TRAINING_ROWS_PER_LIST = 64
+_IVF_ITERATIONS = 10
+_HNSW_EF = 200
+_ASSIGN_CHUNK_ROWS = 65536
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest finite scores, best first."""
+    if k < len(scores):
+        top = np.argpartition(-scores, k)[:k]
+    else:
+        top = np.arange(len(scores))
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return top[np.isfinite(scores[top])]
+
+
+class _IVFIndex:
+    """Inverted-file index: rows grouped by nearest k-means centroid; a search scans the closest lists."""
+
+    def __init__(self, centroids: np.ndarray, order: np.ndarray, list_starts: np.ndarray, rows: int):
+        self.centroids = centroids
+        self.order = order
+        self.list_starts = list_starts
+        self.rows = rows
+        self.probes = min(len(centroids), max(_IVF_MIN_PROBES, len(centroids) // 10))
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, rows: int) -> "_IVFIndex":
+        rng = np.random.default_rng(0)
+        lists = max(1, int(np.sqrt(rows)))
+        sample_rows = np.sort(rng.choice(rows, min(rows, lists * _IVF_TRAINING_ROWS_PER_LIST), replace=False))
+        sample = np.asarray(vectors[sample_rows], dtype=np.float32)
+        centroids = sample[rng.choice(len(sample), lists, replace=False)].copy()
+        for _ in range(_IVF_ITERATIONS):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=lists)
+            # Empty lists keep their previous centroid
+            filled = counts > 0
+            centroids[filled] = _normalize(sums[filled])
+
+        assignment = np.empty(rows, dtype=np.int32)
+        for start in range(0, rows, _ASSIGN_CHUNK_ROWS):
+            chunk = np.asarray(vectors[start:start + _ASSIGN_CHUNK_ROWS], dtype=np.float32)
+            assignment[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        list_starts = np.searchsorted(assignment[order], np.arange(lists + 1))
+        return cls(centroids, order, list_starts, rows)
+
+    def candidates(self, query: np.ndarray, k: int) -> np.ndarray:
+        nearest = _top_k(self.centroids @ query, self.probes)
+        return np.concatenate([self.order[self.list_starts[c]:self.list_starts[c + 1]] for c in nearest])
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, centroids=self.centroids, order=self.order, list_starts=self.list_starts,
+                     rows=np.int64(self.rows))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "_IVFIndex":
+        with np.load(path) as data:
+            return cls(data["centroids"], data["order"], data["list_starts"], int(data["rows"]))
+
+
+class _HNSWIndex:
+    """Graph index from hnswlib over inner product (cosine, since rows are unit length)."""
+
+    def __init__(self, index, rows: int):
+        self.index = index
+        self.rows = rows
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, rows: int) -> "_HNSWIndex":
+        import hnswlib
+        index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        index.init_index(max_elements=rows, ef_construction=200, M=16)
+        for start in range(0, rows, _ASSIGN_CHUNK_ROWS):
+            chunk = np.asarray(vectors[start:min(rows, start + _ASSIGN_CHUNK_ROWS)], dtype=np.float32)
+            index.add_items(chunk, np.arange(start, start + len(chunk)))
+        index.set_ef(_HNSW_EF)
+        return cls(index, rows)
+
+    def candidates(self, query: np.ndarray, k: int) -> np.ndarray:
+        labels, _ = self.index.knn_query(query, k=min(self.rows, _HNSW_EF, 2 * k))
+        return labels[0].astype(np.int64)
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp"
+        self.index.save_index(tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, dim: int) -> "_HNSWIndex":
+        import hnswlib
+        index = hnswlib.Index(space="ip", dim=dim)
+        index.load_index(path)
+        index.set_ef(_HNSW_EF)
+        return cls(index, index.get_current_count())
+
+
+class _Snapshot(NamedTuple):
+    """
+    What a search reads of a partition. It is replaced as a whole, never modified,
+    so a search sees one consistent set of rows even while the partition is
+    compacted. Between compactions row_of_url only gains entries; a row it names
+    may be newer than the snapshot, so readers check it against alive.
+    """
+    store: Optional[EmbeddingStore]
+    vectors: np.ndarray
+    alive: np.ndarray
+    row_of_url: Dict[str, int]
+    ann: Any
+
+
+def _track(row_of_id: Dict[str, int], row_of_url: Dict[str, int], alive: np.ndarray,
+           row: int, doc_id: str, url: str) -> None:
+    previous = row_of_id.get(doc_id)
+    if previous is not None:
+        alive[previous] = False
+    row_of_id[doc_id] = row
+    row_of_url[url] = row
+
+
+class _Partition:
+    """
+    The documents of one site. Writers hold the lock and publish each change as a
+    new snapshot; searches read the current snapshot without it.
+    """
+
+    def __init__(self, directory: str, site: str, ann_method: str, ann_threshold: int):
+        self.directory = directory
+        self.site = site
+        self.base_path = os.path.join(directory, _PARTITION_NAME)
+        self.ann_method = ann_method
+        self.ann_threshold = ann_threshold
+        self.lock = threading.Lock()
+        self._building = False
+        # Bumped whenever rows are renumbered, so an index built before then is discarded
+        self._generation = 0
+        self.load()
+
+    def load(self) -> None:
+        """Read the partition from disk and publish it. Callers hold the lock, except __init__."""
+        row_of_id: Dict[str, int] = {}
+        row_of_url: Dict[str, int] = {}
+        if not store_exists(self.base_path):
+            snapshot = _Snapshot(None, np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=bool), row_of_url, None)
+        else:
+            store = EmbeddingStore(self.base_path)
+            rows = len(store)
+            alive = np.ones(rows, dtype=bool)
+            with open(self.base_path + DOCS_SUFFIX, "rb") as f:
+                for row in range(rows):
+                    doc_id, url, _ = f.readline().decode("utf-8").split("\t", 2)
+                    _track(row_of_id, row_of_url, alive, row, doc_id, url)
+            vectors = store.vectors[:rows]
+            snapshot = _Snapshot(store, vectors, alive, row_of_url, self._load_ann(vectors))
+        self._generation += 1
+        self.row_of_id = row_of_id
+        self.snapshot = snapshot
+
+    @property
+    def live_rows(self) -> int:
+        return int(self.snapshot.alive.sum())
+
+    def add(self, documents: List[Dict[str, Any]]) -> int:
+        """Append documents that carry an "embedding" field. Runs in a worker thread."""
+        # The id is what a re-upload supersedes by; fall back to the url like the other providers
+        documents = [dict(doc, id=str(doc.get("id") or doc.get("url"))) for doc in documents
+                     if doc.get("embedding") is not None and len(doc["embedding"])]
+        if not documents:
+            return 0
+        vectors = _normalize(np.asarray([doc["embedding"] for doc in documents], dtype=np.float32))
+        with self.lock:
+            snapshot = self.snapshot
+            if len(snapshot.alive) and vectors.shape[1] != snapshot.vectors.shape[1]:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match "
+                                 f"{snapshot.vectors.shape[1]} for site {self.site}")
+            os.makedirs(self.directory, exist_ok=True)
+            with EmbeddingStoreWriter(self.base_path, dtype="float32", append=True) as writer:
+                writer.add([dict(doc, embedding=vector) for doc, vector in zip(documents, vectors)])
+            first_row = len(snapshot.alive)
+            alive = np.concatenate([snapshot.alive, np.ones(len(documents), dtype=bool)])
+            new_urls: Dict[str, int] = {}
+            for row, doc in enumerate(documents, first_row):
+                _track(self.row_of_id, new_urls, alive, row, doc["id"], doc.get("url") or "")
+            store = EmbeddingStore(self.base_path)
+            self.snapshot = snapshot._replace(store=store, vectors=store.vectors[:len(store)], alive=alive)
+            snapshot.row_of_url.update(new_urls)
+            superseded = len(alive) - int(alive.sum())
+            if len(alive) >= _COMPACT_MIN_ROWS and superseded > _COMPACT_FRACTION * len(alive):
+                self._compact_locked()
+        return len(documents)
+
+    def _compact_locked(self) -> None:
+        """Rewrite the partition without superseded rows."""
+        snapshot = self.snapshot
+        compact_path = self.base_path + ".compact"
+        with EmbeddingStoreWriter(compact_path, dtype="float32") as writer:
+            for start in range(0, len(snapshot.alive), 1000):
+                documents = snapshot.store.documents(start, start + 1000, self.site)
+                writer.add([dict(doc, embedding=snapshot.vectors[row])
+                            for row, doc in enumerate(documents, start) if snapshot.alive[row]])
+        # Searches still on the old snapshot keep reading the replaced files through their open store
+        for suffix in (VECTORS_SUFFIX, OFFSETS_SUFFIX, DOCS_SUFFIX):
+            os.replace(compact_path + suffix, self.base_path + suffix)
+        for suffix in (_IVF_SUFFIX, _HNSW_SUFFIX):
+            if os.path.exists(self.base_path + suffix):
+                os.unlink(self.base_path + suffix)
+        logger.info(f"Compacted local index partition for {self.site}")
+        self.load()
+
+    def _use_hnsw(self) -> bool:
+        if self.ann_method != "hnsw":
+            return False
+        try:
+            import hnswlib  # noqa: F401
+            return True
+        except ImportError:
+            logger.warning("ann_method is hnsw but hnswlib is not installed; using IVF")
+            self.ann_method = "ivf"
+            return False
+
+    def _load_ann(self, vectors: np.ndarray):
+        try:
+            index = None
+            if self._use_hnsw() and os.path.exists(self.base_path + _HNSW_SUFFIX):
+                index = _HNSWIndex.load(self.base_path + _HNSW_SUFFIX, vectors.shape[1])
+            elif os.path.exists(self.base_path + _IVF_SUFFIX):
+                index = _IVFIndex.load(self.base_path + _IVF_SUFFIX)
+            # An index over more rows than the partition has is left over from before a compaction
+            return index if index is not None and index.rows <= len(vectors) else None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable approximate index for {self.site}: {e}")
+        return None
+
+    def build_ann(self) -> None:
+        """Build and save the approximate index over the current rows."""
+        with self.lock:
+            generation = self._generation
+            vectors = self.snapshot.vectors
+        rows = len(vectors)
+        start = time.time()
+        use_hnsw = self._use_hnsw()
+        index = _HNSWIndex.build(vectors, rows) if use_hnsw else _IVFIndex.build(vectors, rows)
+        with self.lock:
+            if generation != self._generation:
+                logger.info(f"Discarded approximate index for {self.site}: the partition was rewritten")
+                return
+            index.save(self.base_path + (_HNSW_SUFFIX if use_hnsw else _IVF_SUFFIX))
+            self.snapshot = self.snapshot._replace(ann=index)
+        logger.info(f"Built {type(index).__name__} for {self.site} over {rows} rows in {time.time() - start:.1f}s")
+
+    def _build_in_background(self) -> None:
+        try:
+            self.build_ann()
+        except Exception as e:
+            logger.exception(f"Failed to build approximate index for {self.site}: {e}")
+        finally:
+            self._building = False
+
+    def _current_ann(self, snapshot: _Snapshot, rows: int):
+        """The approximate index to search with, starting a (re)build when it is missing or stale."""
+        if self.ann_method == "exact" or rows < self.ann_threshold:
+            return None
+        ann = snapshot.ann
+        stale = ann is None or rows - ann.rows > _REBUILD_FRACTION * rows
+        if stale and not self._building:
+            self._building = True
+            threading.Thread(target=self._build_in_background, daemon=True).start()
+        return ann
+
+    def search(self, snapshot: _Snapshot, query: np.ndarray, k: int) -> List[Tuple[float, int]]:
+        """(score, row) of the k best live rows of snapshot."""
+        vectors, alive = snapshot.vectors, snapshot.alive
+        rows = min(len(vectors), len(alive))
+        if rows == 0:
+            return []
+        ann = self._current_ann(snapshot, rows)
+        if ann is None:
+            scores = np.asarray(vectors[:rows] @ query, dtype=np.float32)
+            scores[~alive[:rows]] = -np.inf
+            top = _top_k(scores, k)
+            return [(float(scores[row]), int(row)) for row in top]
+
+        # Rows added after the index was built are scanned exactly
+        candidates = np.concatenate([ann.candidates(query, k), np.arange(ann.rows, rows)])
+        candidates = np.unique(candidates[(candidates >= 0) & (candidates < rows)])
+        candidates = candidates[alive[candidates]]
+        scores = np.asarray(vectors[candidates] @ query, dtype=np.float32)
+        top = _top_k(scores, k)
+        return [(float(scores[i]), int(candidates[i])) for i in top]
+
+    def find_url(self, url: str) -> Optional[SearchResult]:
+        snapshot = self.snapshot
+        row = snapshot.row_of_url.get(url)
+        if row is None or row >= len(snapshot.alive) or not snapshot.alive[row]:
+            return None
+        return self.result(snapshot, row)
+
+    def remove(self) -> int:
+        """Delete the partition's files; returns the number of documents it held."""
+        with self.lock:
+            count = self.live_rows
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.load()
+        return count
+
+    def result(self, snapshot: _Snapshot, row: int, score: Optional[float] = None) -> SearchResult:
+        doc = snapshot.store.documents(row, row + 1, self.site)[0]
+        return SearchResult(doc["url"], doc["schema_json"], doc["name"], self.site, score=score)
+
+
+class LocalVectorIndexClient:
+    """
+    Client for the in-process vector index, providing the same interface as the
+    database-backed retrieval providers.
+    """
+
+    def __init__(self, endpoint_name: Optional[str] = None):
+        """
+        Initialize the local index client.
+
+        Args:
+            endpoint_name: Name of the endpoint to use (defaults to preferred endpoint in CONFIG)
+        """
+        self.endpoint_name = endpoint_name or CONFIG.write_endpoint
+        self.endpoint_config = self._get_endpoint_config()
+        database_path = CONFIG._resolve_path(self.endpoint_config.database_path)
+        self.root = os.path.join(database_path, self.endpoint_config.index_name or "nlweb_collection")
+        self.ann_method = (self.endpoint_config.ann_method or "ivf").lower()
+        self.ann_threshold = self.endpoint_config.ann_threshold or DEFAULT_ANN_THRESHOLD
+        self._partitions: Dict[str, _Partition] = {}
+        self._partitions_lock = threading.Lock()
+        self._loaded = False
+
+        logger.info(f"Initialized LocalVectorIndexClient for endpoint {self.endpoint_name} at {self.root} "
+                    f"(ann_method: {self.ann_method}, ann_threshold: {self.ann_threshold})")
+
+    def _get_endpoint_config(self):
+        """Get the local index endpoint configuration from CONFIG"""
+        endpoint_config = CONFIG.retrieval_endpoints.get(self.endpoint_name)
+        if not endpoint_config:
+            error_msg = f"No configuration found for endpoint {self.endpoint_name}"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+        if endpoint_config.db_type != "local_index":
+            error_msg = f"Endpoint {self.endpoint_name} is not a local index endpoint (type: {endpoint_config.db_type})"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+        if not endpoint_config.database_path:
+            error_msg = f"Endpoint {self.endpoint_name} needs a database_path"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+        return endpoint_config
+
+    def _new_partition(self, site: str) -> _Partition:
+        directory = os.path.join(self.root, quote(site, safe=""))
+        return _Partition(directory, site, self.ann_method, self.ann_threshold)
+
+    def _load_partitions(self) -> None:
+        """Open every partition on disk. Runs once, in a worker thread."""
+        with self._partitions_lock:
+            if self._loaded:
+                return
+            if os.path.isdir(self.root):
+                for entry in sorted(os.listdir(self.root)):
+                    site = unquote(entry)
+                    if site not in self._partitions and os.path.isdir(os.path.join(self.root, entry)):
+                        self._partitions[site] = self._new_partition(site)
+            self._loaded = True
+            logger.info(f"Loaded {len(self._partitions)} local index partitions from {self.root}")
+
+    async def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            await asyncio.to_thread(self._load_partitions)
+
+    def _partition_for_write(self, site: str) -> _Partition:
+        with self._partitions_lock:
+            partition = self._partitions.get(site)
+            if partition is None:
+                partition = self._partitions[site] = self._new_partition(site)
+            return partition
+
+    def _select_partitions(self, site: Union[str, List[str]]) -> List[_Partition]:
+        if site == "all":
+            return list(self._partitions.values())
+        sites = site if isinstance(site, list) else [site]
+        return [self._partitions[s] for s in sites if s in self._partitions]
+
+    async def delete_documents_by_site(self, site: str, **kwargs) -> int:
+        """
+        Delete the partition of a site.
+
+        Args:
+            site: Site to delete
+
+        Returns:
+            int: Number of documents deleted
+        """
+        await self._ensure_loaded()
+        with self._partitions_lock:
+            partition = self._partitions.pop(site, None)
+        if partition is None:
+            return 0
+        count = await asyncio.to_thread(partition.remove)
+        logger.info(f"Deleted {count} documents for site {site}")
+        return count
+
+    async def upload_documents(self, documents: List[Dict[str, Any]], **kwargs) -> int:
+        """
+        Upload documents, grouped into their sites' partitions.
+
+        Args:
+            documents: List of document objects with embedding, schema_json, etc.
+
+        Returns:
+            int: Number of documents uploaded
+        """
+        if not documents:
+            logger.info("No documents to upload")
+            return 0
+        await self._ensure_loaded()
+        by_site: Dict[str, List[Dict[str, Any]]] = {}
+        for doc in documents:
+            by_site.setdefault(doc.get("site") or "", []).append(doc)
+        uploaded = 0
+        for site, site_documents in by_site.items():
+            partition = self._partition_for_write(site)
+            uploaded += await asyncio.to_thread(partition.add, site_documents)
+        logger.info(f"Uploaded {uploaded} documents to local index {self.root}")
+        return uploaded
+
+    def _search_blocking(self, partitions: List[_Partition], query: np.ndarray, num_results: int) -> List[List[str]]:
+        hits = []
+        for partition in partitions:
+            # Rows are numbered within a snapshot, so results are read from the one that was searched
+            snapshot = partition.snapshot
+            hits.extend((score, row, partition, snapshot)
+                        for score, row in partition.search(snapshot, query, num_results))
+        hits.sort(key=lambda hit: hit[0], reverse=True)
+        return [partition.result(snapshot, row, score) for score, row, partition, snapshot in hits[:num_results]]
+
+    async def search(self, query: str, site: Union[str, List[str]],
+                     num_results: int = 50, query_params: Optional[Dict[str, Any]] = None,
+                     query_embedding: Optional[List[float]] = None, **kwargs) -> List[List[str]]:
+        """
+        Search the partitions of the given sites by vector similarity.
+
+        Args:
+            query: The search query to embed and search with
+            site: Site to filter by (string, list of strings, or "all")
+            num_results: Maximum number of results to return
+            query_params: Additional query parameters
+            query_embedding: Precomputed query vector; skips embedding the query here
+
+        Returns:
+            List[List[str]]: List of search results in format [url, text_json, name, site]
+        """
+        start_embed = time.time()
+        embedding = query_embedding or await get_embedding(query, query_params=query_params)
+        embed_time = time.time() - start_embed
+
+        start_retrieve = time.time()
+        await self._ensure_loaded()
+        partitions = self._select_partitions(site)
+        vector = _normalize(np.asarray(embedding, dtype=np.float32))
+        if sum(len(p.snapshot.alive) for p in partitions) <= _INLINE_SEARCH_ROWS:
+            results = self._search_blocking(partitions, vector, num_results)
+        else:
+            results = await asyncio.to_thread(self._search_blocking, partitions, vector, num_results)
+        retrieve_time = time.time() - start_retrieve
+
+        logger.log_with_context(
+            LogLevel.INFO,
+            "Local index search completed",
+            {
+                "embedding_time": f"{embed_time:.2f}s",
+                "retrieval_time": f"{retrieve_time * 1000:.2f}ms",
+                "partitions": len(partitions),
+                "results_count": len(results),
+            }
+        )
+        return results
+
+    async def search_all_sites(self, query: str, num_results: int = 50,
+                               query_params: Optional[Dict[str, Any]] = None,
+                               query_embedding: Optional[List[float]] = None, **kwargs) -> List[List[str]]:
+        """
+        Search across all sites using vector similarity.
+
+        Args:
+            query: The search query to embed and search with
+            num_results: Maximum number of results to return
+            query_params: Additional query parameters
+            query_embedding: Precomputed query vector; skips embedding the query here
+
+        Returns:
+            List[List[str]]: List of search results
+        """
+        return await self.search(query, "all", num_results, query_params, query_embedding=query_embedding)
+
+    async def search_by_url(self, url: str, **kwargs) -> Optional[List[str]]:
+        """
+        Retrieve a specific item by URL.
+
+        Args:
+            url: URL to search for
+
+        Returns:
+            Optional[List[str]]: Search result or None if not found
+        """
+        await self._ensure_loaded()
+        for partition in list(self._partitions.values()):
+            result = partition.find_url(url)
+            if result is not None:
+                return result
+        logger.warning(f"No item found for URL: {url}")
+        return None
+
+    async def get_sites(self, **kwargs) -> List[str]:
+        """
+        Get the sites that have documents in the index.
+
+        Returns:
+            List[str]: Sorted list of site names
+        """
+        await self._ensure_loaded()
+        return sorted(site for site, partition in list(self._partitions.items()) if partition.live_rows)
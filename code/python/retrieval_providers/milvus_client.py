@@ -307,7 +307,7 @@ class MilvusVectorClient:
     
     async def search(self, query: str, site: Union[str, List[str]], 
                    num_results: int = 50, collection_name: Optional[str] = None,
-                   query_params: Optional[Dict[str, Any]] = None, **kwargs) -> List[List[str]]:
+                   query_params: Optional[Dict[str, Any]] = None, query_embedding: Optional[List[float]] = None, **kwargs) -> List[List[str]]:
         """
         Search the Milvus collection for records filtered by site and ranked by vector similarity.
         
@@ -317,6 +317,7 @@ class MilvusVectorClient:
             num_results: Maximum number of results to return
             collection_name: Optional collection name (defaults to configured name)
             query_params: Additional query parameters
+            query_embedding: Precomputed query vector; skips embedding the query here
             
         Returns:
             List[List[str]]: List of search results in format [url, text_json, name, site]
@@ -327,7 +328,7 @@ class MilvusVectorClient:
         
         try:
             # Generate embedding for the query
-            embedding = await get_embedding(query, query_params=query_params)
+            embedding = query_embedding or await get_embedding(query, query_params=query_params)
             logger.debug(f"Generated embedding with dimension: {len(embedding)}")
             
             # Run the search operation asynchronously
@@ -473,7 +474,7 @@ class MilvusVectorClient:
     
     async def search_all_sites(self, query: str, num_results: int = 50, 
                              collection_name: Optional[str] = None,
-                             query_params: Optional[Dict[str, Any]] = None, **kwargs) -> List[List[str]]:
+                             query_params: Optional[Dict[str, Any]] = None, query_embedding: Optional[List[float]] = None, **kwargs) -> List[List[str]]:
         """
         Search across all sites using vector similarity.
         
@@ -482,12 +483,13 @@ class MilvusVectorClient:
             num_results: Maximum number of results to return
             collection_name: Optional collection name (defaults to configured name)
             query_params: Additional query parameters
+            query_embedding: Precomputed query vector; skips embedding the query here
             
         Returns:
             List[List[str]]: List of search results
         """
         # This is just a convenience wrapper around the regular search method with site="all"
-        return await self.search(query, "all", num_results, collection_name, query_params)
+        return await self.search(query, "all", num_results, collection_name, query_params, query_embedding=query_embedding)
     
     async def get_sites(self, collection_name: Optional[str] = None,
                        embedding_size: str = "small") -> List[str]:
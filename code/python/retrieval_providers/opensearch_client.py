@@ -10,10 +10,11 @@ import threading
 import base64
 import json
 from typing import List, Dict, Union, Optional, Any
-import httpx
 
 from core.config import CONFIG
+from core.http_pool import get_http_client
 from core.embedding import get_embedding
+from core.search_result import SearchResult
 from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
 
@@ -114,7 +115,7 @@ class OpenSearchClient:
         
         # Check if index already exists
         try:
-            async with httpx.AsyncClient() as client:
+            async with get_http_client() as client:
                 response = await client.head(
                     f"{self.api_endpoint}/{index_name}",
                     headers=self._get_auth_headers(),
@@ -208,7 +209,7 @@ class OpenSearchClient:
             }
         
         try:
-            async with httpx.AsyncClient() as client:
+            async with get_http_client() as client:
                 response = await client.put(
                     f"{self.api_endpoint}/{index_name}",
                     json=index_mapping,
@@ -253,7 +254,7 @@ class OpenSearchClient:
         index_name = index_name or self.default_index_name
         
         try:
-            async with httpx.AsyncClient() as client:
+            async with get_http_client() as client:
                 response = await client.delete(
                     f"{self.api_endpoint}/{index_name}",
                     headers=self._get_auth_headers(),
@@ -327,7 +328,7 @@ class OpenSearchClient:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
+            async with get_http_client() as client:
                 response = await client.post(
                     f"{self.api_endpoint}/{index_name}/_delete_by_query",
                     json=delete_query,
@@ -409,7 +410,7 @@ class OpenSearchClient:
             headers = self._get_auth_headers()
             headers["Content-Type"] = "application/x-ndjson"
             
-            async with httpx.AsyncClient() as client:
+            async with get_http_client() as client:
                 response = await client.post(
                     f"{self.api_endpoint}/_bulk",
                     content=bulk_data,
@@ -453,7 +454,7 @@ class OpenSearchClient:
             raise
     
     async def search(self, query: str, site: Union[str, List[str]], 
-                    num_results: int = 50, query_params: Optional[Dict[str, Any]] = None, **kwargs) -> List[List[str]]:
+                    num_results: int = 50, query_params: Optional[Dict[str, Any]] = None, query_embedding: Optional[List[float]] = None, **kwargs) -> List[List[str]]:
         """
         Search for documents matching the query and site using vector similarity.
         
@@ -461,6 +462,7 @@ class OpenSearchClient:
             query: Search query string
             site: Site identifier or list of sites
             num_results: Maximum number of results to return
+            query_embedding: Precomputed query vector; skips embedding the query here
             **kwargs: Additional parameters
             
         Returns:
@@ -470,7 +472,7 @@ class OpenSearchClient:
         logger.info(f"Starting OpenSearch - query: '{query[:50]}...', site: {site}, index: {index_name}")
         
         start_embed = time.time()
-        embedding = await get_embedding(query, query_params=query_params)
+        embedding = query_embedding or await get_embedding(query, query_params=query_params)
         embed_time = time.time() - start_embed
         logger.debug(f"Embedding generated in {embed_time:.2f}s, dimension: {len(embedding)}")
         
@@ -509,7 +511,7 @@ class OpenSearchClient:
         
         start_retrieve = time.time()
         try:
-            async with httpx.AsyncClient() as client:
+            async with get_http_client() as client:
                 response = await client.post(
                     f"{self.api_endpoint}/{index_name}/_search",
                     json=search_query,
@@ -530,7 +532,7 @@ class OpenSearchClient:
                     name = source.get('name', '')
                     site_name = source.get('site', '')
                     
-                    processed_result = [url, schema_json, name, site_name]
+                    processed_result = SearchResult(url, schema_json, name, site_name, score=hit.get('_score'))
                     processed_results.append(processed_result)
                 
                 retrieve_time = time.time() - start_retrieve
@@ -645,7 +647,7 @@ class OpenSearchClient:
             }
         
         try:
-            async with httpx.AsyncClient() as client:
+            async with get_http_client() as client:
                 response = await client.post(
                     f"{self.api_endpoint}/{index_name}/_search",
                     json=search_query,
@@ -666,7 +668,7 @@ class OpenSearchClient:
                     name = source.get('name', '')
                     site = source.get('site', '')
                     
-                    processed_result = [url, schema_json, name, site]
+                    processed_result = SearchResult(url, schema_json, name, site, score=hit.get('_score'))
                     processed_results.append(processed_result)
                 
                 logger.debug(f"Retrieved {len(processed_results)} results")
@@ -713,7 +715,7 @@ class OpenSearchClient:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
+            async with get_http_client() as client:
                 response = await client.post(
                     f"{self.api_endpoint}/{index_name}/_search",
                     json=search_query,
@@ -752,7 +754,7 @@ class OpenSearchClient:
             raise
     
     async def search_all_sites(self, query: str, top_n: int = 10, 
-                             index_name: Optional[str] = None, query_params: Optional[Dict[str, Any]] = None, **kwargs) -> List[List[str]]:
+                             index_name: Optional[str] = None, query_params: Optional[Dict[str, Any]] = None, query_embedding: Optional[List[float]] = None, **kwargs) -> List[List[str]]:
         """
         Search across all sites using vector similarity
         
@@ -760,6 +762,7 @@ class OpenSearchClient:
             query: The search query to embed and search with
             top_n: Maximum number of results to return
             index_name: Optional index name (defaults to configured index name)
+            query_embedding: Precomputed query vector; skips embedding the query here
             
         Returns:
             List[List[str]]: List of search results
@@ -769,7 +772,7 @@ class OpenSearchClient:
         logger.debug(f"Query: {query}")
         
         try:
-            query_embedding = await get_embedding(query, query_params=query_params)
+            query_embedding = query_embedding or await get_embedding(query, query_params=query_params)
             logger.debug(f"Generated embedding with dimension: {len(query_embedding)}")
             
             # Build OpenSearch query based on k-NN availability (no site filter)
@@ -817,7 +820,7 @@ class OpenSearchClient:
                     }
                 }
             
-            async with httpx.AsyncClient() as client:
+            async with get_http_client() as client:
                 response = await client.post(
                     f"{self.api_endpoint}/{index_name}/_search",
                     json=search_query,
@@ -833,12 +836,13 @@ class OpenSearchClient:
                 processed_results = []
                 for hit in hits:
                     source = hit.get('_source', {})
-                    processed_result = [
+                    processed_result = SearchResult(
                         source.get('url', ''),
                         source.get('schema_json', '{}'),
                         source.get('name', ''),
-                        source.get('site', '')
-                    ]
+                        source.get('site', ''),
+                        score=hit.get('_score')
+                    )
                     processed_results.append(processed_result)
                 
                 logger.info(f"Global search completed, found {len(processed_results)} results")
@@ -884,7 +888,7 @@ class OpenSearchClient:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
+            async with get_http_client() as client:
                 response = await client.post(
                     f"{self.api_endpoint}/{index_name}/_search",
                     json=aggregation_query,
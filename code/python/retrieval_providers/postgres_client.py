@@ -23,6 +23,7 @@ import pgvector.psycopg
 
 from core.config import CONFIG
 from core.embedding import get_embedding
+from core.search_result import SearchResult
 from misc.logger.logging_config_helper  import get_configured_logger
 from misc.logger.logger import LogLevel
 
@@ -394,7 +395,7 @@ class PgVectorClient:
         return inserted_count
     
     async def search(self, query: str, site: Union[str, List[str]], 
-                    num_results: int = 50, query_params: Optional[Dict[str, Any]] = None, **kwargs) -> List[List[str]]:
+                    num_results: int = 50, query_params: Optional[Dict[str, Any]] = None, query_embedding: Optional[List[float]] = None, **kwargs) -> List[List[str]]:
         """
         Search for documents matching the query and site.
         
@@ -402,6 +403,7 @@ class PgVectorClient:
             query: Search query string
             site: Site identifier or list of sites
             num_results: Maximum number of results to return
+            query_embedding: Precomputed query vector; skips embedding the query here
             **kwargs: Additional parameters (e.g., similarity_metric)
             
         Returns:
@@ -413,7 +415,7 @@ class PgVectorClient:
         
         # Get vector embedding for the query
         try:
-            query_embedding = await get_embedding(query, query_params=query_params)
+            query_embedding = query_embedding or await get_embedding(query, query_params=query_params)
             logger.debug(f"Query embedding generated, dimensions: {len(query_embedding)}")
         except Exception as e:
             logger.exception(f"Error generating embedding for query: {e}")
@@ -469,12 +471,17 @@ class PgVectorClient:
                 # Format results
                 results = []
                 for row in rows:
-                    result = [
+                    # Distances sort ascending; report a score where higher is better
+                    distance = row["similarity_score"]
+                    score = None if distance is None else (
+                        1.0 - distance if similarity_func == "<=>" else -distance)
+                    result = SearchResult(
                         row["url"],
                         json.dumps(row["schema_json"], indent=4),
                         row["name"],
                         row["site"],
-                    ]
+                        score=score,
+                    )
                     results.append(result)
                 
                 return results
@@ -530,13 +537,14 @@ class PgVectorClient:
             logger.exception(f"Error retrieving item with URL: {url}")
             raise
     
-    async def search_all_sites(self, query: str, num_results: int = 50, **kwargs) -> List[List[str]]:
+    async def search_all_sites(self, query: str, num_results: int = 50, query_embedding: Optional[List[float]] = None, **kwargs) -> List[List[str]]:
         """
         Search across all sites.
         
         Args:
             query: Search query string
             num_results: Maximum number of results to return
+            query_embedding: Precomputed query vector; skips embedding the query here
             **kwargs: Additional parameters
             
         Returns:
@@ -545,7 +553,7 @@ class PgVectorClient:
         logger.info(f"Searching across all sites for '{query[:50]}...', num_results: {num_results}")
         
         # This just calls search with no site filter
-        return await self.search(query, site=[], num_results=num_results, **kwargs)
+        return await self.search(query, site=[], num_results=num_results, query_embedding=query_embedding, **kwargs)
         
     async def test_connection(self) -> Dict[str, Any]:
         """
@@ -19,6 +19,7 @@ from qdrant_client.http.exceptions import UnexpectedResponse
 
 from core.config import CONFIG
 from core.embedding import get_embedding
+from core.search_result import SearchResult
 from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
 
@@ -492,9 +493,10 @@ class QdrantVectorClient:
             must=[models.FieldCondition(key="site", match=models.MatchAny(any=sites))]
         )
     
-    def _format_results(self, search_result: List[models.ScoredPoint]) -> List[List[str]]:
+    def _format_results(self, search_result: List[models.ScoredPoint]) -> List[SearchResult]:
         """
-        Format Qdrant search results to match expected API: [url, text_json, name, site].
+        Format Qdrant search results to match expected API: [url, text_json, name, site],
+        carrying the similarity score.
         
         Args:
             search_result: Qdrant search results
@@ -510,13 +512,13 @@ class QdrantVectorClient:
             name = payload.get("name", "")
             site_name = payload.get("site", "")
 
-            results.append([url, schema, name, site_name])
+            results.append(SearchResult(url, schema, name, site_name, score=item.score))
 
         return results
     
     async def search(self, query: str, site: Union[str, List[str]], 
                    num_results: int = 50, collection_name: Optional[str] = None,
-                   query_params: Optional[Dict[str, Any]] = None, **kwargs) -> List[List[str]]:
+                   query_params: Optional[Dict[str, Any]] = None, query_embedding: Optional[List[float]] = None, **kwargs) -> List[List[str]]:
         """
         Search the Qdrant collection for records filtered by site and ranked by vector similarity.
         
@@ -526,6 +528,7 @@ class QdrantVectorClient:
             num_results: Maximum number of results to return
             collection_name: Optional collection name (defaults to configured name)
             query_params: Additional query parameters
+            query_embedding: Precomputed query vector; skips embedding the query here
             
         Returns:
             List[List[str]]: List of search results in format [url, text_json, name, site]
@@ -536,7 +539,7 @@ class QdrantVectorClient:
         
         try:
             start_embed = time.time()
-            embedding = await get_embedding(query, query_params=query_params)
+            embedding = query_embedding or await get_embedding(query, query_params=query_params)
             embed_time = time.time() - start_embed
             logger.debug(f"Generated embedding with dimension: {len(embedding)} in {embed_time:.2f}s")
             
@@ -693,7 +696,7 @@ class QdrantVectorClient:
     
     async def search_all_sites(self, query: str, num_results: int = 50, 
                              collection_name: Optional[str] = None,
-                             query_params: Optional[Dict[str, Any]] = None, **kwargs) -> List[List[str]]:
+                             query_params: Optional[Dict[str, Any]] = None, query_embedding: Optional[List[float]] = None, **kwargs) -> List[List[str]]:
         """
         Search across all sites using vector similarity.
         
@@ -702,12 +705,13 @@ class QdrantVectorClient:
             num_results: Maximum number of results to return
             collection_name: Optional collection name (defaults to configured name)
             query_params: Additional query parameters
+            query_embedding: Precomputed query vector; skips embedding the query here
             
         Returns:
             List[List[str]]: List of search results
         """
         # This is just a convenience wrapper around the regular search method with site="all"
-        return await self.search(query, "all", num_results, collection_name, query_params)
+        return await self.search(query, "all", num_results, collection_name, query_params, query_embedding=query_embedding)
     
     async def get_sites(self, collection_name: Optional[str] = None) -> List[str]:
         """
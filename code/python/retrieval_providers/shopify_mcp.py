@@ -13,6 +13,7 @@ import asyncio
 from typing import List, Dict, Optional, Any, Union
 
 from core.config import CONFIG
+from core.http_pool import get_aiohttp_session
 from misc.logger.logging_config_helper import get_configured_logger
 
 logger = get_configured_logger("shopify_mcp")
@@ -83,61 +84,61 @@ class ShopifyMCPClient:
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                logger.debug(f"Sending request to: {endpoint}")
-                logger.debug(f"Request headers: {headers}")
-                logger.debug(f"Request body: {json.dumps(mcp_request, indent=2)}")
+            session = get_aiohttp_session()
+            logger.debug(f"Sending request to: {endpoint}")
+            logger.debug(f"Request headers: {headers}")
+            logger.debug(f"Request body: {json.dumps(mcp_request, indent=2)}")
+            
+            async with session.post(
+                endpoint,
+                json=mcp_request,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                logger.debug(f"Response status: {response.status}")
+                logger.debug(f"Response headers: {dict(response.headers)}")
+                
+                if response.status != 200:
+                    logger.error(f"Shopify MCP request failed with status {response.status}")
+                    return []
+                
+                # Check content type (but be lenient since some servers misconfigure this)
+                content_type = response.headers.get('Content-Type', '')
+                
+                # Try to parse as JSON regardless of content type
+                # Some Shopify MCP endpoints incorrectly return text/html for JSON responses
+                try:
+                    result = await response.json(content_type=None)  # Force JSON parsing
+                except Exception as json_error:
+                    # If JSON parsing fails, then it's really not JSON
+                    text = await response.text()
+                    logger.error(f"Failed to parse response as JSON. Content-Type: {content_type}")
+                    logger.debug(f"Response text (first 500 chars): {text[:500]}")
+                    return []
+                
+                # Check for JSON-RPC error
+                if 'error' in result:
+                    logger.error(f"Shopify MCP error: {result['error']}")
+                    return []
+                
+                # Extract search results
+                # Handle different response formats
+                mcp_result = result.get('result', {})
+                
+                # Check if result is wrapped in content array (some MCP implementations do this)
+                if 'content' in mcp_result and isinstance(mcp_result['content'], list):
+                    for content_item in mcp_result['content']:
+                        if content_item.get('type') == 'text' and 'text' in content_item:
+                            try:
+                                # Parse the text as JSON
+                                search_data = json.loads(content_item['text'])
+                                return self._format_results(search_data, site)
+                            except json.JSONDecodeError:
+                                logger.error(f"Failed to parse search results from content text")
+                
+                # Otherwise try direct format
+                return self._format_results(mcp_result, site)
                 
-                async with session.post(
-                    endpoint,
-                    json=mcp_request,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    logger.debug(f"Response status: {response.status}")
-                    logger.debug(f"Response headers: {dict(response.headers)}")
-                    
-                    if response.status != 200:
-                        logger.error(f"Shopify MCP request failed with status {response.status}")
-                        return []
-                    
-                    # Check content type (but be lenient since some servers misconfigure this)
-                    content_type = response.headers.get('Content-Type', '')
-                    
-                    # Try to parse as JSON regardless of content type
-                    # Some Shopify MCP endpoints incorrectly return text/html for JSON responses
-                    try:
-                        result = await response.json(content_type=None)  # Force JSON parsing
-                    except Exception as json_error:
-                        # If JSON parsing fails, then it's really not JSON
-                        text = await response.text()
-                        logger.error(f"Failed to parse response as JSON. Content-Type: {content_type}")
-                        logger.debug(f"Response text (first 500 chars): {text[:500]}")
-                        return []
-                    
-                    # Check for JSON-RPC error
-                    if 'error' in result:
-                        logger.error(f"Shopify MCP error: {result['error']}")
-                        return []
-                    
-                    # Extract search results
-                    # Handle different response formats
-                    mcp_result = result.get('result', {})
-                    
-                    # Check if result is wrapped in content array (some MCP implementations do this)
-                    if 'content' in mcp_result and isinstance(mcp_result['content'], list):
-                        for content_item in mcp_result['content']:
-                            if content_item.get('type') == 'text' and 'text' in content_item:
-                                try:
-                                    # Parse the text as JSON
-                                    search_data = json.loads(content_item['text'])
-                                    return self._format_results(search_data, site)
-                                except json.JSONDecodeError:
-                                    logger.error(f"Failed to parse search results from content text")
-                    
-                    # Otherwise try direct format
-                    return self._format_results(mcp_result, site)
-                    
         except asyncio.TimeoutError:
             logger.error("Shopify MCP request timed out")
             return []
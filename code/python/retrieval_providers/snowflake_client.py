@@ -1,6 +1,6 @@
-import httpx
 import json
 from core.config import CONFIG, RetrievalProviderConfig
+from core.http_pool import get_http_client
 from typing import Any, Dict, List, Optional, Tuple, Union
 from core.utils import snowflake
 
@@ -78,7 +78,7 @@ async def search(query: str, site: str|List[str]|None=None, url: str|None=None,
         }
 
     (database, schema, service) = get_cortex_search_service(cfg)
-    async with httpx.AsyncClient() as client:
+    async with get_http_client() as client:
         response =  await client.post(
             snowflake.get_account_url(cfg) + f"/api/v2/databases/{database}/schemas/{schema}/cortex-search-services/{service}:query",
             json={
@@ -132,7 +132,7 @@ async def get_unique_sites(cfg: RetrievalProviderConfig) -> List[str]:
     # Use CORTEX_SEARCH_DATA_SCAN as recommended by sfc-gh-ashankar
     query = f"SELECT DISTINCT site FROM TABLE(CORTEX_SEARCH_DATA_SCAN(SERVICE_NAME=>'{database}.{schema}.{service}')) ORDER BY site"
     
-    async with httpx.AsyncClient() as client:
+    async with get_http_client() as client:
         response = await client.post(
             snowflake.get_account_url(cfg) + "/api/v2/statements",
             json={
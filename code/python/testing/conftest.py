@@ -0,0 +1,33 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def make_handler():
+    """
+    Factory for a fake request handler with the attributes that prompt filling,
+    ranking and tool selection read. Messages it sends are kept in handler.messages;
+    keyword arguments override any attribute.
+    """
+    def make(query="vegan cake", **attributes):
+        messages = []
+
+        async def noop(*args):
+            pass
+
+        async def send_message(message):
+            messages.append(message)
+
+        state = SimpleNamespace(start_precheck_step=lambda step: None, precheck_step_done=noop,
+                                wait_for_decontextualization=noop, is_decontextualization_done=lambda: False)
+        handler = SimpleNamespace(site="example", item_type="Item", query=query, decontextualized_query=None,
+                                  prev_queries=[], query_params={}, state=state, init_time=time.time(),
+                                  abort_fast_track_event=asyncio.Event(), send_message=send_message,
+                                  generate_mode="list", messages=messages)
+        vars(handler).update(attributes)
+        return handler
+
+    return make
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+import core.embedding as embedding
+from core.config import EmbeddingBatchConfig
+
+
+def test_plan_batches_respects_size_and_token_budget():
+    texts = ["a" * 40] * 5 + ["b" * 400] + ["c"]
+    # 40 chars is ~11 tokens, 400 chars ~101 tokens
+    batches = embedding._plan_batches(texts, max_batch_size=3, max_batch_tokens=50)
+    assert batches == [[0, 1, 2], [3, 4], [5], [6]]
+    assert [i for batch in batches for i in batch] == list(range(len(texts)))
+
+
+async def test_embed_in_batches_runs_concurrently_and_keeps_order():
+    in_flight = 0
+    peak = 0
+
+    async def embed_batch(batch):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return [[float(text)] for text in batch]
+
+    texts = [str(i) for i in range(20)]
+    config = EmbeddingBatchConfig(max_batch_size=3, concurrency=2)
+    result = await embedding._embed_in_batches(texts, embed_batch, config, timeout=5, provider="fake")
+    assert result == [[float(i)] for i in range(20)]
+    assert peak == 2
+
+
+async def test_embed_in_batches_retries_rate_limits():
+    attempts = []
+
+    async def embed_batch(batch):
+        attempts.append(list(batch))
+        if len(attempts) < 3:
+            raise RuntimeError("429 RESOURCE_EXHAUSTED")
+        return [[1.0] for _ in batch]
+
+    config = EmbeddingBatchConfig(max_retries=3, retry_base_delay=0.001)
+    result = await embedding._embed_in_batches(["x", "y"], embed_batch, config, timeout=5, provider="fake")
+    assert result == [[1.0], [1.0]]
+    assert len(attempts) == 3
+
+
+async def test_embed_in_batches_gives_up_on_other_errors():
+    async def embed_batch(batch):
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        await embedding._embed_in_batches(["x"], embed_batch, EmbeddingBatchConfig(), timeout=5, provider="fake")
@@ -0,0 +1,38 @@
+import asyncio
+
+import core.embedding as embedding
+
+
+async def test_concurrent_queries_share_one_embedding_call(monkeypatch):
+    calls = []
+
+    async def fake_compute(text, provider, model_id, timeout):
+        calls.append(text)
+        await asyncio.sleep(0.01)
+        return [0.1, 0.2, 0.3]
+
+    monkeypatch.setattr(embedding, "_compute_embedding", fake_compute)
+    monkeypatch.setattr(embedding, "_query_embedding_cache", embedding.OrderedDict())
+
+    results = await asyncio.gather(*(embedding.get_embedding("spicy tofu") for _ in range(5)))
+    assert calls == ["spicy tofu"]
+    assert all(r == [0.1, 0.2, 0.3] for r in results)
+
+    # Later calls are served from the LRU, and callers get their own list
+    again = await embedding.get_embedding("spicy tofu")
+    again.append(1.0)
+    assert await embedding.get_embedding("spicy tofu") == [0.1, 0.2, 0.3]
+    assert calls == ["spicy tofu"]
+
+
+async def test_query_embedding_cache_is_bounded(monkeypatch):
+    async def fake_compute(text, provider, model_id, timeout):
+        return [float(len(text))]
+
+    monkeypatch.setattr(embedding, "_compute_embedding", fake_compute)
+    monkeypatch.setattr(embedding, "_query_embedding_cache", embedding.OrderedDict())
+    monkeypatch.setattr(embedding, "_query_embedding_cache_size", 2)
+
+    for text in ("a", "bb", "ccc"):
+        await embedding.get_embedding(text)
+    assert len(embedding._query_embedding_cache) == 2
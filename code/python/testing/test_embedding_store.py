@@ -0,0 +1,78 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from data_loading.embedding_store import (
+    DOCS_SUFFIX, OFFSETS_SUFFIX, VECTORS_SUFFIX, EmbeddingStore, EmbeddingStoreWriter, store_exists,
+)
+
+
+def make_docs(start, count, dim=4):
+    return [{"id": str(i), "url": f"https://example.com/{i}", "name": f"Item\t{i}",
+             "schema_json": f'{{"name": "Item {i}"}}', "embedding": [float(i)] * dim}
+            for i in range(start, start + count)]
+
+
+def test_store_round_trip(tmp_path):
+    base = str(tmp_path / "site.tsv")
+    with EmbeddingStoreWriter(base) as writer:
+        writer.add(make_docs(0, 3))
+        writer.add(make_docs(3, 2))
+    assert store_exists(base)
+
+    # Standard .npy files, loadable without this module
+    vectors = np.load(base + VECTORS_SUFFIX)
+    assert vectors.shape == (5, 4) and vectors.dtype == np.float32
+    assert np.load(base + OFFSETS_SUFFIX)[0] == 0
+
+    store = EmbeddingStore(base)
+    assert len(store) == 5
+    assert isinstance(store.vectors, np.memmap)
+    docs = store.documents(1, 3, "example")
+    assert [d["url"] for d in docs] == ["https://example.com/1", "https://example.com/2"]
+    assert docs[0]["name"] == "Item 1" and docs[0]["site"] == "example"
+    batches = list(store.iter_batches("example", batch_size=2))
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert batches[2][0]["embedding"] == [4.0] * 4
+
+
+def test_float16_store(tmp_path):
+    base = str(tmp_path / "site.tsv")
+    with EmbeddingStoreWriter(base, dtype="float16") as writer:
+        writer.add(make_docs(0, 2))
+    store = EmbeddingStore(base)
+    assert store.vectors.dtype == np.float16
+    assert next(store.iter_batches("example"))[1]["embedding"] == [1.0] * 4
+
+
+def test_append_resumes_after_interrupted_write(tmp_path):
+    base = str(tmp_path / "site.tsv")
+    writer = EmbeddingStoreWriter(base)
+    writer.add(make_docs(0, 3))
+    # Simulate a crash mid-batch: a partial sidecar row and vector bytes past the headers
+    writer._docs.write(b"partial row")
+    writer._docs.flush()
+    writer._vectors._file.write(b"\x00" * 6)
+    writer._vectors._file.flush()
+
+    with EmbeddingStoreWriter(base, append=True) as resumed:
+        assert resumed.rows == 3
+        resumed.add(make_docs(3, 2))
+
+    store = EmbeddingStore(base)
+    assert len(store) == 5
+    assert [d["id"] for d in store.documents(0, 5, "example")] == ["0", "1", "2", "3", "4"]
+    assert store.vectors[4].tolist() == [4.0] * 4
+
+    # Rows written after the checkpoint was last saved are dropped on resume
+    with EmbeddingStoreWriter(base, append=True, max_rows=4) as resumed:
+        assert resumed.rows == 4
+        resumed.add(make_docs(4, 1))
+    store = EmbeddingStore(base)
+    assert len(store) == 5 and [d["id"] for d in store.documents(3, 5, "example")] == ["3", "4"]
+
+    # Without append an existing store is replaced
+    with EmbeddingStoreWriter(base) as writer:
+        writer.add(make_docs(10, 1))
+    assert len(EmbeddingStore(base)) == 1
+    assert (tmp_path / ("site.tsv" + DOCS_SUFFIX)).read_bytes().count(b"\n") == 1
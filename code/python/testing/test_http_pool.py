@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+import core.http_pool as http_pool
+
+
+async def test_pooled_client_caps_requests_per_host():
+    in_flight = {"now": 0, "peak": 0}
+
+    async def handler(request):
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return httpx.Response(200, json={"host": request.url.host})
+
+    client = http_pool.PooledHTTPClient(httpx.AsyncClient(transport=httpx.MockTransport(handler)), per_host_limit=2)
+    before = http_pool.get_http_pool_stats()["requests"]
+    async with client as borrowed:
+        responses = await asyncio.gather(*(borrowed.post("https://search.example/q", json={}) for _ in range(6)))
+    assert all(r.json() == {"host": "search.example"} for r in responses)
+    assert in_flight["peak"] == 2
+    assert http_pool.get_http_pool_stats()["requests"] == before + 6
+    # Leaving the async with block must not close the shared client
+    assert (await client.get("https://search.example/again")).status_code == 200
+    await client.aclose()
+
+
+async def test_shared_client_is_reused_within_a_loop():
+    await http_pool.close_http_pool()
+    first = http_pool.get_http_client()
+    assert http_pool.get_http_client() is first
+    await http_pool.close_http_pool()
+    assert http_pool.get_http_client() is not first
+    await http_pool.close_http_pool()
@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from core.ingest_embedding_cache import EmbeddingDedupCache
+
+
+def counting_embedder(calls):
+    async def embed_batch(texts):
+        calls.append(list(texts))
+        return [[float(len(text)), 0.5] for text in texts]
+    return embed_batch
+
+
+async def test_only_changed_texts_are_embedded(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    calls = []
+    cache = EmbeddingDedupCache(path)
+    first = await cache.embed(["a", "bb", "a"], counting_embedder(calls), "openai", "small")
+    assert first == [[1.0, 0.5], [2.0, 0.5], [1.0, 0.5]]
+    assert calls == [["a", "bb"]]
+    cache.close()
+
+    # A new process (new cache object) reuses the stored vectors
+    cache = EmbeddingDedupCache(path)
+    second = await cache.embed(["bb", "ccc", "a"], counting_embedder(calls), "openai", "small")
+    assert second == [[2.0, 0.5], [3.0, 0.5], [1.0, 0.5]]
+    assert calls[1] == ["ccc"]
+    assert cache.stats() == {"hits": 2, "misses": 1}
+
+    # The model is part of the key
+    await cache.embed(["a"], counting_embedder(calls), "openai", "large")
+    assert calls[2] == ["a"]
+    cache.close()
+
+
+async def test_cache_is_bounded(tmp_path):
+    cache = EmbeddingDedupCache(str(tmp_path / "cache.sqlite"), max_entries=5)
+    calls = []
+    for i in range(12):
+        await cache.embed([f"text {i}"], counting_embedder(calls), "openai", "small")
+    count = cache._store.count()
+    assert count <= 5
+    cache.close()
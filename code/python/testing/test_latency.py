@@ -0,0 +1,21 @@
+from core.utils.latency import LatencyTracker
+
+
+def test_tracker_reports_ewma_and_percentiles():
+    tracker = LatencyTracker(window=100, alpha=0.5)
+    for ms in range(1, 101):
+        tracker.record("azure_ai_search", ms / 1000)
+    assert tracker.percentile("azure_ai_search", 95) == 0.095
+    assert tracker.percentile("azure_ai_search", 50) == 0.05
+    assert 0.09 < tracker.ewma("azure_ai_search") < 0.1
+    assert tracker.snapshot()["azure_ai_search"]["count"] == 100
+
+
+def test_percentile_needs_min_samples_and_window_is_bounded():
+    tracker = LatencyTracker(window=3)
+    tracker.record(("openai", "gpt-4.1", "RankingPrompt"), 1.0)
+    assert tracker.percentile(("openai", "gpt-4.1", "RankingPrompt"), 95, min_samples=2) is None
+    for seconds in (5.0, 0.1, 0.2, 0.3):
+        tracker.record(("openai", "gpt-4.1", "RankingPrompt"), seconds)
+    assert tracker.percentile(("openai", "gpt-4.1", "RankingPrompt"), 100) == 0.3
+    assert "openai:gpt-4.1:RankingPrompt" in tracker.snapshot()
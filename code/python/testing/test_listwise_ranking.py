@@ -0,0 +1,76 @@
+import asyncio
+from types import SimpleNamespace
+
+import core.ranking as ranking
+from core.config import CONFIG, RankingEarlyStopConfig, RankingPrefilterConfig
+from core.ranking import Ranking
+
+
+def make_ranker(monkeypatch, responses):
+    """A REGULAR_TRACK Ranking whose LLM answers listwise calls from responses and pointwise calls with 60."""
+    monkeypatch.setattr(CONFIG.nlweb, "ranking_early_stop", RankingEarlyStopConfig(enabled=False))
+    monkeypatch.setattr(CONFIG.nlweb, "ranking_prefilter", RankingPrefilterConfig(enabled=False))
+    calls = []
+
+    async def fake_ask_llm(prompt, schema, **kwargs):
+        calls.append(kwargs["prompt_name"])
+        if kwargs["prompt_name"] == Ranking.LISTWISE_RANKING_PROMPT_NAME:
+            return responses.pop(0)
+        return {"score": 60, "description": "pointwise"}
+
+    monkeypatch.setattr(ranking, "ask_llm", fake_ask_llm)
+    monkeypatch.setattr(Ranking, "get_ranking_prompt", lambda self: ("{item.description}", {"score": "int"}))
+    monkeypatch.setattr(Ranking, "get_listwise_ranking_prompt", lambda self: ("{items.description}", {"items": []}))
+
+    async def send_message(message):
+        pass
+
+    alive, prechecks = asyncio.Event(), asyncio.Event()
+    alive.set()
+    prechecks.set()
+    handler = SimpleNamespace(site="example", item_type="Thing", query="q", decontextualized_query="",
+                              query_params={}, connection_alive_event=alive, pre_checks_done_event=prechecks,
+                              required_item_type=None, query_id="1", send_message=send_message, state=None)
+    return Ranking(handler, [], Ranking.REGULAR_TRACK), calls
+
+
+def make_batch(count):
+    return [(f"https://example.com/{i}", '{"@type": "Thing", "name": "%d"}' % i, str(i), "example")
+            for i in range(1, count + 1)]
+
+
+def test_parser_skips_bad_ids_and_scores(monkeypatch):
+    ranker, _ = make_ranker(monkeypatch, [])
+    response = {"items": [
+        {"id": 1, "score": 80, "description": "one"},
+        {"id": "2", "score": "70"},                 # numeric strings are accepted
+        {"id": 0, "score": 90},                     # out of range
+        {"id": 4, "score": 90},                     # out of range
+        {"score": 90},                              # missing id
+        {"id": 3, "score": "high"},                 # non-int score
+        {"id": 1, "score": 10},                     # duplicate id, first answer wins
+        "not an entry",
+    ]}
+    assert ranker.parseListwiseRankings(response, 3) == {
+        1: {"score": 80, "description": "one"},
+        2: {"score": 70, "description": ""},
+    }
+    assert ranker.parseListwiseRankings({"items": "none"}, 3) == {}
+    assert ranker.parseListwiseRankings(None, 3) == {}
+
+
+async def test_items_the_llm_omits_are_ranked_individually(monkeypatch):
+    response = {"items": [{"id": 1, "score": 90, "description": "a"}, {"id": 3, "score": 40, "description": "c"}]}
+    ranker, calls = make_ranker(monkeypatch, [response])
+    await ranker.rankBatch(make_batch(3))
+    scores = {answer["name"]: answer["ranking"]["score"] for answer in ranker.rankedAnswers}
+    assert scores == {"1": 90, "2": 60, "3": 40}
+    assert calls == [Ranking.LISTWISE_RANKING_PROMPT_NAME, Ranking.RANKING_PROMPT_NAME]
+
+
+async def test_empty_batch_response_falls_back_to_pointwise(monkeypatch):
+    ranker, calls = make_ranker(monkeypatch, [{}])
+    await ranker.rankBatch(make_batch(4))
+    assert sorted(answer["name"] for answer in ranker.rankedAnswers) == ["1", "2", "3", "4"]
+    assert all(answer["ranking"]["score"] == 60 for answer in ranker.rankedAnswers)
+    assert calls.count(Ranking.RANKING_PROMPT_NAME) == 4
@@ -0,0 +1,57 @@
+import time
+
+from core.llm_cache import MemoryLRUCache, SQLiteCache, TieredLLMCache, make_cache_key
+
+
+def test_cache_key_depends_on_prompt_schema_and_model():
+    schema = {"score": "integer between 0 and 100"}
+    key = make_cache_key("rank this", schema, "openai:gpt-4.1-mini")
+    assert key == make_cache_key("rank this", dict(schema), "openai:gpt-4.1-mini")
+    assert key != make_cache_key("rank that", schema, "openai:gpt-4.1-mini")
+    assert key != make_cache_key("rank this", {"score": "int"}, "openai:gpt-4.1-mini")
+    assert key != make_cache_key("rank this", schema, "openai:gpt-4.1")
+
+
+async def test_memory_lru_evicts_least_recently_used():
+    cache = MemoryLRUCache(max_entries=2, ttl_seconds=None)
+    await cache.set("a", {"score": 1})
+    await cache.set("b", {"score": 2})
+    assert await cache.get("a") == {"score": 1}
+    await cache.set("c", {"score": 3})
+    assert await cache.get("b") is None
+    assert await cache.get("a") == {"score": 1}
+    assert cache.stats()["evictions"] == 1
+
+
+async def test_memory_ttl_expires_entries():
+    cache = MemoryLRUCache(max_entries=10, ttl_seconds=60)
+    cache.set_sync("a", {"score": 1}, expires_at=time.time() - 1)
+    assert await cache.get("a") is None
+    assert cache.stats()["misses"] == 1
+
+
+async def test_tiered_cache_survives_restart_and_counts_hits(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite")
+    cache = TieredLLMCache(MemoryLRUCache(10), SQLiteCache(path, max_entries=10))
+    assert await cache.get("k") is None
+    await cache.set("k", {"score": 90, "description": "cached"})
+    cache.close()
+
+    reopened = TieredLLMCache(MemoryLRUCache(10), SQLiteCache(path, max_entries=10))
+    assert await reopened.get("k") == {"score": 90, "description": "cached"}
+    # Second read is served from the memory tier
+    assert await reopened.get("k") == {"score": 90, "description": "cached"}
+    stats = reopened.stats()
+    assert stats["hits"] == 2
+    assert stats["disk"]["hits"] == 1
+    reopened.close()
+
+
+async def test_sqlite_cache_is_size_bounded(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "llm_cache.sqlite"), max_entries=5)
+    for i in range(20):
+        await cache.set(f"k{i}", {"i": i})
+    count = cache._store.count()
+    assert count <= 5
+    assert await cache.get("k19") == {"i": 19}
+    cache.close()
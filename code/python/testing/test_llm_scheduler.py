@@ -0,0 +1,57 @@
+import asyncio
+
+from core.llm_scheduler import LLMScheduler, TokenBucket
+
+
+def test_token_bucket_refills_at_the_configured_rate():
+    bucket = TokenBucket(60)
+    bucket.take(60, now=bucket.updated)
+    assert bucket.wait_time(1, now=bucket.updated) == 1.0
+    assert bucket.wait_time(1, now=bucket.updated + 1.0) == 0.0
+    # Requests larger than the bucket wait for a full bucket instead of forever
+    assert bucket.wait_time(1000, now=bucket.updated + 60.0) == 0.0
+
+
+async def test_waiting_calls_are_granted_by_priority():
+    scheduler = LLMScheduler(max_concurrency=1)
+    order = []
+
+    async def call(call_class):
+        async with scheduler.slot("openai", call_class=call_class):
+            order.append(call_class)
+            await asyncio.sleep(0)
+
+    await scheduler.acquire("openai")
+    tasks = [asyncio.create_task(call(c)) for c in ["summarization", "ranking", "ranking", "decontextualize"]]
+    await asyncio.sleep(0)
+    stats = scheduler.stats()["endpoints"]["openai"]
+    assert stats["queued"] == 4 and stats["queued_by_class"]["ranking"] == 2
+    scheduler.release("openai")
+    await asyncio.gather(*tasks)
+    assert order == ["decontextualize", "ranking", "ranking", "summarization"]
+    assert scheduler.in_flight == 0
+
+
+async def test_rate_limited_endpoint_does_not_block_others():
+    scheduler = LLMScheduler({"slow": (60, None)})
+    for _ in range(60):
+        await scheduler.acquire("slow")
+        scheduler.release("slow")
+    blocked = asyncio.create_task(scheduler.acquire("slow", call_class="ranking"))
+    await asyncio.wait_for(scheduler.acquire("fast", call_class="summarization"), timeout=0.1)
+    await asyncio.sleep(0)
+    assert not blocked.done()
+    assert scheduler.stats()["endpoints"]["slow"]["queued"] == 1
+    await asyncio.wait_for(blocked, timeout=2)
+
+
+async def test_cancelled_waiters_release_their_place():
+    scheduler = LLMScheduler(max_concurrency=1)
+    await scheduler.acquire("openai")
+    waiter = asyncio.create_task(scheduler.acquire("openai"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    scheduler.release("openai")
+    await asyncio.wait_for(scheduler.acquire("openai"), timeout=0.1)
+    assert scheduler.stats()["endpoints"]["openai"]["queued"] == 0
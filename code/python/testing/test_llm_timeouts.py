@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+import core.llm as llm
+from core.config import CONFIG, LLMProviderConfig, LLMTimeoutConfig, ModelConfig
+from core.llm_cache import MemoryLRUCache, make_cache_key
+from core.utils.latency import LatencyTracker
+
+
+class FakeProvider:
+    def __init__(self, delays):
+        self.delays = delays
+        self.calls = []
+
+    async def get_completion(self, prompt, schema, model=None, timeout=None, max_tokens=None):
+        self.calls.append((model, timeout))
+        delay = self.delays.get(model, 0)
+        await asyncio.sleep(delay)
+        return {"model": model}
+
+
+@pytest.fixture
+def endpoints(monkeypatch):
+    monkeypatch.setattr(CONFIG, "llm_endpoints", {
+        "primary": LLMProviderConfig(llm_type="fake", models=ModelConfig(high="p-high", low="p-low")),
+        "backup": LLMProviderConfig(llm_type="fake", models=ModelConfig(high="b-high", low="b-low")),
+    })
+    monkeypatch.setattr(CONFIG, "preferred_llm_endpoint", "primary")
+    monkeypatch.setattr(llm, "_llm_latency", LatencyTracker())
+    for name, value in [("_llm_cache", None), ("_llm_cache_initialized", True),
+                        ("_llm_scheduler", None), ("_llm_scheduler_initialized", True)]:
+        monkeypatch.setattr(llm, name, value)
+    provider = FakeProvider({})
+    monkeypatch.setattr(llm, "_get_provider", lambda llm_type: provider)
+    return provider
+
+
+def configure(monkeypatch, **kwargs):
+    monkeypatch.setattr(CONFIG, "llm_timeouts", LLMTimeoutConfig(**kwargs))
+
+
+async def test_timeout_follows_observed_latency(endpoints, monkeypatch):
+    configure(monkeypatch, default_timeout=8, min_samples=5, multiplier=2, min_timeout=0.5)
+    key = ("primary", "p-low", "RankingPrompt")
+    for _ in range(5):
+        llm._llm_latency.record(key, 0.4)
+    await llm.ask_llm("rank", {}, prompt_name="RankingPrompt")
+    await llm.ask_llm("rank", {}, prompt_name="OtherPrompt")
+    assert [timeout for _, timeout in endpoints.calls] == [0.8, 8]
+    assert llm._llm_latency.get(key).count == 6
+
+
+async def test_timed_out_critical_call_is_retried_on_fallback(endpoints, monkeypatch):
+    configure(monkeypatch, default_timeout=0.05, fallback_endpoint="backup", hedge_classes=["decontextualize"])
+    endpoints.delays = {"p-low": 1.0}
+    assert await llm.ask_llm("q", {}, call_class="decontextualize") == {"model": "b-low"}
+
+    # Other classes are made once
+    assert await llm.ask_llm("rank", {}, call_class="ranking") == {}
+    assert [model for model, _ in endpoints.calls] == ["p-low", "b-low", "p-low"]
+
+
+async def test_slow_critical_call_is_hedged(endpoints, monkeypatch):
+    configure(monkeypatch, default_timeout=5, min_samples=3, fallback_endpoint="backup",
+              hedge_classes=["decontextualize"], hedge_percentile=95)
+    for _ in range(3):
+        llm._llm_latency.record(("primary", "p-high", "Decontextualize"), 0.05)
+    endpoints.delays = {"p-high": 2.0}
+    result = await asyncio.wait_for(
+        llm.ask_llm("q", {}, level="high", call_class="decontextualize", prompt_name="Decontextualize"), timeout=1)
+    assert result == {"model": "b-high"}
+
+    # Other classes wait for the primary
+    endpoints.delays = {"p-low": 0.2}
+    result = await llm.ask_llm("q", {}, call_class="ranking", prompt_name="Decontextualize")
+    assert result == {"model": "p-low"}
+
+
+async def test_only_finished_or_timed_out_calls_are_recorded(endpoints, monkeypatch):
+    configure(monkeypatch, default_timeout=5, min_samples=3, fallback_endpoint="backup",
+              hedge_classes=["decontextualize"], hedge_percentile=95)
+    primary = ("primary", "p-high", "Decontextualize")
+    for _ in range(3):
+        llm._llm_latency.record(primary, 0.05)
+    endpoints.delays = {"p-high": 2.0}
+    await asyncio.wait_for(
+        llm.ask_llm("q", {}, level="high", call_class="decontextualize", prompt_name="Decontextualize"), timeout=1)
+    # The primary call lost the hedge race and was cancelled
+    assert llm._llm_latency.get(primary).count == 3
+    assert llm._llm_latency.get(("backup", "b-high", "Decontextualize")).count == 1
+
+    configure(monkeypatch, default_timeout=0.05, retries=0)
+    endpoints.delays = {"p-low": 1.0}
+    assert await llm.ask_llm("q", {}, prompt_name="Slow") == {}
+    assert list(llm._llm_latency.get(("primary", "p-low", "Slow")).samples) == [0.05]
+
+
+async def test_no_retry_or_hedge_without_fallback(endpoints, monkeypatch):
+    configure(monkeypatch, default_timeout=5, min_samples=3, retries=1,
+              hedge_classes=["decontextualize"], hedge_percentile=95)
+    for _ in range(3):
+        llm._llm_latency.record(("primary", "p-high", "Decontextualize"), 0.01)
+    endpoints.delays = {"p-high": 0.1}
+    await llm.ask_llm("q", {}, level="high", call_class="decontextualize", prompt_name="Decontextualize")
+    assert len(endpoints.calls) == 1
+
+    endpoints.delays = {"p-high": 1.0}
+    result = await llm.ask_llm("q", {}, level="high", timeout=0.05, call_class="decontextualize")
+    assert result == {} and len(endpoints.calls) == 2
+
+
+async def test_fallback_answer_is_cached_under_the_fallback_model(endpoints, monkeypatch):
+    configure(monkeypatch, default_timeout=0.05, fallback_endpoint="backup", hedge_classes=["decontextualize"])
+    cache = MemoryLRUCache()
+    monkeypatch.setattr(llm, "_llm_cache", cache)
+    endpoints.delays = {"p-low": 1.0}
+    assert await llm.ask_llm("q", {}, call_class="decontextualize") == {"model": "b-low"}
+    assert await cache.get(make_cache_key("q", {}, "fake:p-low", 512)) is None
+    assert await cache.get(make_cache_key("q", {}, "fake:b-low", 512)) == {"model": "b-low"}
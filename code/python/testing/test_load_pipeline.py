@@ -0,0 +1,131 @@
+import asyncio
+import random
+
+from data_loading.load_pipeline import LoadCheckpoint, run_load_pipeline
+
+
+def make_items(count):
+    # One document per input line; positions are 1-based line numbers
+    return [(i, [{"url": f"u{i}", "schema_json": str(i)}]) for i in range(1, count + 1)]
+
+
+async def fake_embed(texts):
+    await asyncio.sleep(random.random() * 0.005)
+    return [[float(t)] for t in texts]
+
+
+async def test_pipeline_embeds_and_uploads_every_document():
+    uploaded = []
+    in_flight = 0
+    peak = 0
+
+    async def upload(docs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.005)
+        in_flight -= 1
+        uploaded.extend(docs)
+
+    stats = await run_load_pipeline(make_items(95), fake_embed, upload, batch_size=10,
+                                    embed_concurrency=3, upload_concurrency=2, queue_size=2)
+    assert stats.documents == 95 and stats.batches == 10 and stats.failed_batches == 0
+    assert sorted(doc["embedding"][0] for doc in uploaded) == [float(i) for i in range(1, 96)]
+    assert peak <= 2
+
+
+async def test_checkpoint_stops_at_first_failed_batch_and_resumes(tmp_path):
+    path = str(tmp_path / "load.checkpoint")
+    source = {"input": "site.jsonl", "size": 123}
+    failed_once = set()
+
+    async def flaky_upload(docs):
+        # Batch holding line 31 fails on the first run
+        if docs[0]["url"] == "u31" and "u31" not in failed_once:
+            failed_once.add("u31")
+            raise RuntimeError("upload failed")
+
+    checkpoint = LoadCheckpoint(path, source)
+    stats = await run_load_pipeline(make_items(50), fake_embed, flaky_upload, batch_size=10,
+                                    embed_concurrency=2, upload_concurrency=2, checkpoint=checkpoint)
+    assert stats.failed_batches == 1
+    assert checkpoint.position == 30
+
+    resumed = LoadCheckpoint(path, source)
+    start = resumed.load()
+    assert start == 30 and resumed.documents == 30
+    items = [item for item in make_items(50) if item[0] > start]
+    stats = await run_load_pipeline(items, fake_embed, flaky_upload, batch_size=10, checkpoint=resumed)
+    assert stats.failed_batches == 0
+    assert resumed.position == 50 and resumed.documents == 50
+
+    # A checkpoint for different input is ignored
+    assert LoadCheckpoint(path, {"input": "other.jsonl", "size": 1}).load() == 0
+
+
+async def test_uploaded_batches_reach_the_store_once_in_input_order(tmp_path):
+    path = str(tmp_path / "load.checkpoint")
+    source = {"input": "site.jsonl", "size": 123}
+    stored = []
+
+    async def upload(docs):
+        # Later batches finish first; the batch holding line 31 fails on the first run
+        await asyncio.sleep(0.02 if docs[0]["url"] == "u1" else 0.001)
+        if docs[0]["url"] == "u31" and not getattr(upload, "failed", False):
+            upload.failed = True
+            raise RuntimeError("upload failed")
+
+    def store(docs):
+        stored.extend(doc["url"] for doc in docs)
+
+    checkpoint = LoadCheckpoint(path, source)
+    await run_load_pipeline(make_items(60), fake_embed, upload, batch_size=10, embed_concurrency=4,
+                            upload_concurrency=4, checkpoint=checkpoint, on_uploaded=store)
+    # Batches after the failed one were uploaded but are left for the rerun
+    assert stored == [f"u{i}" for i in range(1, 31)] and len(stored) == checkpoint.documents
+
+    resumed = LoadCheckpoint(path, source)
+    start = resumed.load()
+    await run_load_pipeline([item for item in make_items(60) if item[0] > start], fake_embed, upload,
+                            batch_size=10, upload_concurrency=4, checkpoint=resumed, on_uploaded=store)
+    assert stored == [f"u{i}" for i in range(1, 61)]
+
+
+async def test_resumed_delete_site_load_keeps_checkpointed_documents(tmp_path, monkeypatch):
+    import data_loading.db_load as db_load
+
+    source = tmp_path / "recipes.txt"
+    source.write_text("".join(f'https://example.com/{i}\t{{"@type": "Recipe", "name": "r{i}"}}\n'
+                              for i in range(1, 9)))
+    database = {}
+    deletes = []
+    fail_after = [4]
+
+    async def delete_site(site, endpoint_name):
+        deletes.append(site)
+        database.clear()
+
+    async def upload(docs, query_params=None):
+        if fail_after[0] is not None and len(database) >= fail_after[0]:
+            raise RuntimeError("endpoint down")
+        database.update((doc["url"], doc) for doc in docs)
+        return len(docs)
+
+    async def embed(texts, provider, model):
+        return [[1.0, 0.0] for _ in texts]
+
+    monkeypatch.setattr(db_load, "delete_site_from_database", delete_site)
+    monkeypatch.setattr(db_load, "upload_documents", upload)
+    monkeypatch.setattr(db_load, "compute_embeddings", embed)
+    monkeypatch.setattr(db_load, "get_ingest_embedding_cache", lambda: None)
+    monkeypatch.setattr(db_load, "get_embeddings_file_path", lambda name: str(tmp_path / "embeddings" / name))
+
+    await db_load.loadJsonToDB(str(source), "example", batch_size=2, delete_existing=True,
+                               upload_concurrency=1, parse_workers=1)
+    assert deletes == ["example"] and len(database) == 4
+
+    # Rerunning the same command resumes without deleting what the checkpoint counts as loaded
+    fail_after[0] = None
+    assert await db_load.loadJsonToDB(str(source), "example", batch_size=2, delete_existing=True,
+                                      upload_concurrency=1, parse_workers=1) == 8
+    assert deletes == ["example"] and len(database) == 8
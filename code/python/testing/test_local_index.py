@@ -0,0 +1,82 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core.config import CONFIG, RetrievalProviderConfig
+import retrieval_providers.local_index_client as local_index_client
+from retrieval_providers.local_index_client import LocalVectorIndexClient
+
+
+def make_client(monkeypatch, tmp_path, **options):
+    endpoints = {"local": RetrievalProviderConfig(
+        database_path=str(tmp_path), db_type="local_index", enabled=True, **options)}
+    monkeypatch.setattr(CONFIG, "retrieval_endpoints", endpoints)
+    return LocalVectorIndexClient("local")
+
+
+def make_docs(site, vectors, prefix="doc"):
+    return [{"id": f"{site}-{prefix}{i}", "url": f"https://{site}/{prefix}{i}", "name": f"{prefix} {i}",
+             "schema_json": f'{{"n": {i}}}', "site": site, "embedding": list(map(float, v))}
+            for i, v in enumerate(vectors)]
+
+
+async def test_exact_search_filters_by_site(monkeypatch, tmp_path):
+    client = make_client(monkeypatch, tmp_path)
+    await client.upload_documents(make_docs("a.com", np.eye(4)) + make_docs("b.com", np.eye(4)))
+
+    results = await client.search("q", "a.com", num_results=2, query_embedding=[0.0, 0.0, 3.0, 1.0])
+    assert [r[0] for r in results] == ["https://a.com/doc2", "https://a.com/doc3"]
+    assert results[0][1:] == ['{"n": 2}', "doc 2", "a.com"]
+
+    both = await client.search("q", ["a.com", "b.com"], num_results=10, query_embedding=[0.0, 0.0, 1.0, 0.0])
+    assert {r[0] for r in both[:2]} == {"https://a.com/doc2", "https://b.com/doc2"}
+    assert await client.get_sites() == ["a.com", "b.com"]
+
+
+async def test_reupload_supersedes_and_persists(monkeypatch, tmp_path):
+    client = make_client(monkeypatch, tmp_path)
+    await client.upload_documents(make_docs("a.com", np.eye(3)))
+    # Same ids, vectors rotated: doc0 now points along the third axis
+    await client.upload_documents(make_docs("a.com", np.roll(np.eye(3), 2, axis=1)))
+
+    reopened = make_client(monkeypatch, tmp_path)
+    results = await reopened.search("q", "all", num_results=5, query_embedding=[0.0, 0.0, 1.0])
+    assert len(results) == 3
+    assert results[0][0] == "https://a.com/doc0"
+    assert (await reopened.search_by_url("https://a.com/doc1"))[3] == "a.com"
+
+    assert await reopened.delete_documents_by_site("a.com") == 3
+    assert await reopened.get_sites() == []
+    assert await reopened.search_by_url("https://a.com/doc1") is None
+
+
+async def test_ivf_index_finds_nearest_rows(monkeypatch, tmp_path):
+    client = make_client(monkeypatch, tmp_path, ann_threshold=100, ann_method="ivf")
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(400, 16))
+    await client.upload_documents(make_docs("big.com", vectors))
+    partition = client._partitions["big.com"]
+    partition.build_ann()
+    # Rows added after the index was built are still found
+    await client.upload_documents(make_docs("big.com", [vectors[7] * 2], prefix="late"))
+
+    results = await client.search("q", "big.com", num_results=2, query_embedding=list(vectors[7]))
+    assert {r[0] for r in results} == {"https://big.com/doc7", "https://big.com/late0"}
+    assert partition.snapshot.ann is not None and partition.snapshot.ann.rows == 400
+
+
+async def test_search_on_a_snapshot_survives_compaction(monkeypatch, tmp_path):
+    monkeypatch.setattr(local_index_client, "_COMPACT_MIN_ROWS", 4)
+    client = make_client(monkeypatch, tmp_path)
+    await client.upload_documents(make_docs("a.com", np.eye(4)))
+    partition = client._partitions["a.com"]
+    before = partition.snapshot
+    # Superseding half the rows compacts the partition, renumbering them
+    await client.upload_documents(make_docs("a.com", np.eye(4)[:2]))
+    assert len(partition.snapshot.alive) == 4 and partition.snapshot is not before
+
+    query = np.array([0.0, 0.0, 0.0, 1.0], dtype=np.float32)
+    [(score, row)] = partition.search(before, query, 1)
+    assert row == 3 and partition.result(before, row, score).url == "https://a.com/doc3"
+    [(_, row)] = partition.search(partition.snapshot, query, 1)
+    assert partition.result(partition.snapshot, row).url == "https://a.com/doc3"
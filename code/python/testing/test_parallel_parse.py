@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from data_loading.parallel_parse import byte_ranges, iter_documents_parallel, parse_byte_range
+
+
+def write_tsv(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            item = {"@type": "Recipe", "name": f"Recipe {i}", "url": f"https://example.com/{i}"}
+            f.write(f"https://example.com/{i}\t{json.dumps(item)}\n")
+            if i % 7 == 0:
+                f.write("\n")
+
+
+def test_byte_ranges_cover_file_on_line_boundaries(tmp_path):
+    path = tmp_path / "site.tsv"
+    write_tsv(path, 200)
+    data = path.read_bytes()
+    ranges = list(byte_ranges(str(path), chunk_bytes=1000))
+    assert len(ranges) > 5
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start and data[end - 1:end] == b"\n"
+
+
+def test_parse_byte_range_matches_whole_file(tmp_path):
+    path = tmp_path / "site.tsv"
+    write_tsv(path, 50)
+    records = []
+    for start, end in byte_ranges(str(path), chunk_bytes=500):
+        records.extend(parse_byte_range(str(path), start, end, "example"))
+    assert [rows[0][1] for _, rows in records] == [f"https://example.com/{i}" for i in range(50)]
+    # Each offset is the end of its line, so resuming from it skips exactly that line
+    offset = records[9][0]
+    resumed = parse_byte_range(str(path), offset, path.stat().st_size, "example")
+    assert resumed[0][1][0][1] == "https://example.com/10"
+
+
+async def test_iter_documents_parallel_preserves_order(tmp_path):
+    path = tmp_path / "site.tsv"
+    write_tsv(path, 300)
+    documents = []
+    async for offset, docs in iter_documents_parallel(str(path), "example", workers=2, chunk_bytes=2000):
+        documents.extend(docs)
+    assert [doc["url"] for doc in documents] == [f"https://example.com/{i}" for i in range(300)]
+    assert set(documents[0]) == {"id", "url", "name", "schema_json", "site"}
+    assert documents[0]["site"] == "example"
@@ -0,0 +1,51 @@
+import pickle
+
+import pytest
+
+from core.prompt_cache import PrefixedPrompt, PromptCacheStats, split_prompt
+from core.prompts import fill_prompt_with_prefix
+
+TEMPLATE = ('Assign a score to the following item. The user\'s question is: "{request.query}". '
+            'The item is "{item.description}". Score it fairly.')
+
+
+def test_items_share_a_byte_identical_prefix(make_handler):
+    handler = make_handler()
+    first = fill_prompt_with_prefix(TEMPLATE, handler, {"item.description": "chocolate cake"}, "item.description")
+    second = fill_prompt_with_prefix(TEMPLATE, handler, {"item.description": "fish"}, "item.description")
+    assert first.prefix == second.prefix
+    assert first.prefix.endswith('"vegan cake". The item is "')
+    assert first.suffix == 'chocolate cake". Score it fairly.'
+    assert first == TEMPLATE.replace("{request.query}", "vegan cake").replace("{item.description}", "chocolate cake")
+    assert first.cache_key() == second.cache_key()
+
+    # Templates without the variable fill to a plain prompt
+    plain = fill_prompt_with_prefix("Question: {request.query}", handler, {}, "item.description")
+    assert split_prompt(plain) == ("", "Question: vegan cake")
+
+
+def test_prefixed_prompt_is_a_plain_string():
+    prompt = PrefixedPrompt("instructions ", "item")
+    assert prompt == "instructions item" and isinstance(prompt, str)
+    assert hash(prompt) == hash("instructions item")
+    clone = pickle.loads(pickle.dumps(prompt))
+    assert clone.prefix_length == prompt.prefix_length
+
+
+def test_stats_report_saved_input_tokens():
+    stats = PromptCacheStats()
+    stats.record("openai", "gpt", 2000, 1536)
+    stats.record("openai", "gpt", 2000, 0)
+    row = stats.snapshot()["openai:gpt"]
+    assert (row["calls"], row["cache_hits"], row["cached_tokens"]) == (2, 1, 1536)
+    assert row["cached_token_ratio"] == 0.384
+
+
+def test_anthropic_marks_the_prefix_for_caching():
+    pytest.importorskip("anthropic")
+    from llm_providers.anthropic import AnthropicProvider
+    messages = AnthropicProvider._build_messages(PrefixedPrompt("shared ", "item"), {"score": "int"})
+    blocks = messages[-1]["content"]
+    assert blocks[0] == {"type": "text", "text": "shared ", "cache_control": {"type": "ephemeral"}}
+    assert blocks[1]["text"] == "item"
+    assert AnthropicProvider._build_messages("plain", {})[-1]["content"] == "plain"
@@ -0,0 +1,66 @@
+import os
+
+import core.prompts as prompts
+from core.config import CONFIG
+
+PROMPTS = """<?xml version="1.0" encoding="UTF-8"?>
+<root xmlns="http://nlweb.ai/base">
+  <Item>
+    <Prompt ref="RankingPrompt"><promptString>generic {{request.query}}</promptString>
+      <returnStruc>{{"score": "integer"}}</returnStruc></Prompt>
+    <Prompt ref="SummaryPrompt"><promptString>{summary}</promptString></Prompt>
+  </Item>
+  <Recipe>
+    <Prompt ref="RankingPrompt"><promptString>recipe {{request.query}}</promptString></Prompt>
+  </Recipe>
+  <VeganRecipe subClassOf="Recipe">
+    <Prompt ref="OtherPrompt"><promptString>vegan</promptString></Prompt>
+  </VeganRecipe>
+  <Site ref="seriouseats">
+    <Item>
+      <Prompt ref="SummaryPrompt"><promptString>seriouseats summary</promptString></Prompt>
+    </Item>
+  </Site>
+</root>
+"""
+
+
+def write_prompts(path, summary="summary"):
+    path.write_text(PROMPTS.format(summary=summary))
+
+
+def setup_index(monkeypatch, tmp_path):
+    write_prompts(tmp_path / "prompts.xml")
+    monkeypatch.setattr(CONFIG, "config_directory", str(tmp_path))
+    monkeypatch.setattr(prompts, "_prompt_index", None)
+    monkeypatch.setattr(prompts, "PROMPT_RELOAD_INTERVAL", 0.0)
+
+
+def test_lookup_walks_type_hierarchy_and_site_overrides(monkeypatch, tmp_path):
+    setup_index(monkeypatch, tmp_path)
+    base = "{http://nlweb.ai/base}"
+    assert prompts.find_prompt("any", base + "Item", "RankingPrompt") == ("generic {request.query}", {"score": "integer"})
+    assert prompts.find_prompt("any", base + "Recipe", "RankingPrompt")[0] == "recipe {request.query}"
+    # VeganRecipe inherits from Recipe, then from Item
+    assert prompts.find_prompt("any", base + "VeganRecipe", "RankingPrompt")[0] == "recipe {request.query}"
+    assert prompts.find_prompt("any", base + "VeganRecipe", "SummaryPrompt")[0] == "summary"
+    # The site name is used whole, also when passed as a list
+    assert prompts.find_prompt("seriouseats", base + "Recipe", "SummaryPrompt")[0] == "seriouseats summary"
+    assert prompts.find_prompt(["seriouseats"], base + "Recipe", "SummaryPrompt")[0] == "seriouseats summary"
+    assert prompts.find_prompt("s", base + "Recipe", "SummaryPrompt")[0] == "summary"
+    assert prompts.find_prompt("any", base + "Item", "MissingPrompt") == (None, None)
+
+
+def test_index_reloads_when_the_file_changes(monkeypatch, tmp_path):
+    setup_index(monkeypatch, tmp_path)
+    path = tmp_path / "prompts.xml"
+    assert prompts.find_prompt("any", "Item", "SummaryPrompt")[0] == "summary"
+
+    write_prompts(path, summary="updated summary")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000_000))
+    assert prompts.find_prompt("any", "Item", "SummaryPrompt")[0] == "updated summary"
+
+    # A broken file keeps the previous prompts
+    path.write_text("<root")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 2_000_000_000))
+    assert prompts.find_prompt("any", "Item", "SummaryPrompt")[0] == "updated summary"
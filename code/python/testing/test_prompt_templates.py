@@ -0,0 +1,41 @@
+import core.prompts as prompts
+from core.prompts import compile_prompt, fill_prompt, get_prompt_variables_from_file
+
+
+def test_compiled_fill_matches_str_replace(make_handler):
+    template = "Rate this {site.itemType} for \"{request.query}\": {item.description}. Raw: {request.rawQuery} { spaced }"
+    expected = (template.replace("{site.itemType}", "Recipe").replace("{request.query}", "vegan cake")
+                .replace("{item.description}", "cake").replace("{request.rawQuery}", "vegan cake"))
+    handler = make_handler(item_type="{http://schema.org/}Recipe")
+    assert fill_prompt(template, handler, {"item.description": "cake"}) == expected
+    assert compile_prompt(template).variables == {"site.itemType", "request.query", "item.description", "request.rawQuery"}
+
+
+def test_bound_prompt_resolves_request_values_once(monkeypatch, make_handler):
+    resolved = []
+    original = prompts.get_prompt_variable_value
+
+    def counting(variable, handler):
+        resolved.append(variable)
+        return original(variable, handler)
+
+    monkeypatch.setattr(prompts, "get_prompt_variable_value", counting)
+    bound = compile_prompt("Q: {request.query} Item: {item.description}").bind(make_handler(), ["item.description"])
+    filled = [bound.fill_with_prefix({"item.description": f"item {i}"}, "item.description") for i in range(100)]
+    assert resolved == ["request.query"]
+    assert filled[7] == "Q: vegan cake Item: item 7" and filled[7].prefix == "Q: vegan cake Item: "
+
+
+def test_values_are_not_rescanned_for_variables(make_handler):
+    filled = fill_prompt("{item.description} / {request.query}", make_handler(), {"item.description": "{request.query}"})
+    assert filled == "{request.query} / vegan cake"
+
+
+def test_variables_are_collected_from_prompt_files(tmp_path):
+    path = tmp_path / "prompts.xml"
+    path.write_text(
+        '<root xmlns="http://nlweb.ai/base"><Thing><Prompt ref="A">'
+        '<promptString>Query {request.query} on {site.itemType}</promptString></Prompt>'
+        '<Prompt ref="B"><promptString>Rate {item.description} for {request.query}</promptString></Prompt>'
+        '</Thing></root>')
+    assert get_prompt_variables_from_file(str(path)) == {"request.query", "site.itemType", "item.description"}
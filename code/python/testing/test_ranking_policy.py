@@ -0,0 +1,79 @@
+import ast
+import asyncio
+from types import SimpleNamespace
+
+import core.ranking as ranking
+from core.config import CONFIG, RankingEarlyStopConfig, RankingPrefilterConfig
+from core.ranking_policy import RankingPolicy
+from core.search_result import SearchResult
+
+
+def test_order_uses_scores_from_a_single_endpoint():
+    items = [SearchResult(f"u{i}", "{}", "n", "s", score=score, endpoint="a") for i, score in enumerate([0.1, 0.9, 0.5])]
+    assert [item.url for item in RankingPolicy.order(items)] == ["u1", "u2", "u0"]
+    items[0].endpoint = "b"
+    assert [item.url for item in RankingPolicy.order(items)] == ["u0", "u1", "u2"]
+
+
+async def test_run_stops_once_quota_is_filled():
+    policy = RankingPolicy(num_results=2, enabled=True, min_score=70, max_in_flight=2)
+    started = []
+
+    def job(i):
+        async def run():
+            started.append(i)
+            await asyncio.sleep(0.01 if i < 2 else 1)
+            policy.record([90])
+        return run
+
+    await asyncio.wait_for(policy.run([job(i) for i in range(10)]), timeout=0.5)
+    assert started == [0, 1]
+    assert policy.quota_filled and policy.skipped == 8
+
+
+async def test_low_scores_do_not_fill_the_quota():
+    policy = RankingPolicy(num_results=1, enabled=True, min_score=70, max_in_flight=0)
+    finished = []
+
+    def job(i):
+        async def run():
+            policy.record([50])
+            finished.append(i)
+        return run
+
+    await policy.run([job(i) for i in range(5)])
+    assert finished == [0, 1, 2, 3, 4] and not policy.quota_filled
+
+
+async def test_ranking_skips_llm_calls_after_quota(monkeypatch):
+    monkeypatch.setattr(CONFIG.nlweb, "ranking_early_stop", RankingEarlyStopConfig(min_score=75, max_in_flight=4))
+    monkeypatch.setattr(CONFIG.nlweb, "ranking_prefilter", RankingPrefilterConfig(enabled=False))
+    calls = []
+
+    async def fake_ask_llm(prompt, schema, **kwargs):
+        calls.append(prompt.suffix)
+        await asyncio.sleep(0.001)
+        return {"score": 90, "description": "good"}
+
+    monkeypatch.setattr(ranking, "ask_llm", fake_ask_llm)
+    monkeypatch.setattr(ranking.Ranking, "get_ranking_prompt", lambda self: ("{item.description}", {"score": "int"}))
+    sent = []
+
+    async def send_message(message):
+        sent.extend(message.get("results", []))
+
+    alive, prechecks = asyncio.Event(), asyncio.Event()
+    alive.set()
+    prechecks.set()
+    handler = SimpleNamespace(
+        site="example", item_type="Thing", query="q", decontextualized_query="", query_params={},
+        connection_alive_event=alive, pre_checks_done_event=prechecks, required_item_type=None,
+        query_id="1", send_message=send_message, state=None)
+    items = [[f"https://example.com/{i}", '{"@type": "Thing", "name": "%d"}' % i, str(i), "example"] for i in range(40)]
+
+    ranker = ranking.Ranking(handler, items, ranking.Ranking.REGULAR_TRACK)
+    ranker.listwise = False
+    await ranker.do()
+    assert len(sent) == ranking.Ranking.NUM_RESULTS_TO_SEND
+    assert len(calls) < 20
+    assert [ast.literal_eval(call)["name"] for call in calls[:4]] == ["0", "1", "2", "3"]
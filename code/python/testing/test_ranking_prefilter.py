@@ -0,0 +1,80 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import core.ranking_prefilter as prefilter
+from core.config import CONFIG, RankingPrefilterConfig
+
+
+def make_items(texts):
+    return [[f"https://example.com/{i}", json.dumps({"@type": "Thing", "name": text}), text, "example"]
+            for i, text in enumerate(texts)]
+
+
+def make_handler(query="vegan chocolate cake"):
+    return SimpleNamespace(query=query, decontextualized_query="", site="example", query_params={})
+
+
+def test_bm25_prefers_items_with_rare_query_terms():
+    texts = ["chocolate cake recipe", "vanilla cake", "vegan chocolate cake", "grilled fish"]
+    scores = prefilter.bm25_scores("vegan chocolate cake", texts)
+    assert int(np.argmax(scores)) == 2
+    assert scores[3] == 0.0
+
+
+def test_combine_falls_back_to_retrieval_order_without_vectors():
+    scores = prefilter.combine_scores([None, None, None], [0.0, 0.0, 0.0], vector_weight=0.7)
+    assert list(np.argsort(-scores)) == [0, 1, 2]
+    scores = prefilter.combine_scores([0.1, None, 0.9], [0.0, 0.0, 0.0], vector_weight=1.0)
+    assert scores[2] > scores[0]
+
+
+async def test_select_keeps_top_k_in_retrieval_order(monkeypatch, tmp_path):
+    config = RankingPrefilterConfig(enabled=True, top_k=2, site_top_k={"other": 5}, vector_weight=0.5)
+    monkeypatch.setattr(CONFIG.nlweb, "ranking_prefilter", config)
+
+    async def fake_embedding(text, **kwargs):
+        return [1.0, 0.0]
+
+    async def fake_item_vectors(json_strs, embed_missing):
+        return [[0.0, 1.0], [1.0, 0.1], None, [1.0, 0.0]]
+
+    monkeypatch.setattr(prefilter, "get_embedding", fake_embedding)
+    monkeypatch.setattr(prefilter, "_item_vectors", fake_item_vectors)
+    items = make_items(["grilled fish", "chocolate cake", "pasta", "vegan chocolate cake"])
+
+    kept = await prefilter.RankingPrefilter(make_handler()).select(items)
+    assert [item[0] for item in kept] == ["https://example.com/1", "https://example.com/3"]
+
+    # Recording scores every item but drops none
+    config.record_path = str(tmp_path / "records.jsonl")
+    recorder = prefilter.RankingPrefilter(make_handler())
+    assert len(await recorder.select(items)) == 4
+    recorder.record([{"url": "https://example.com/3", "ranking": {"score": 90}}])
+    entry = json.loads((tmp_path / "records.jsonl").read_text())
+    assert [item["rank"] for item in entry["items"]] == [0, 1, 2, 3]
+    assert entry["items"][3]["llm_score"] == 90 and entry["items"][2]["vector"] is None
+
+
+def test_evaluation_harness_reports_recall_and_savings():
+    from benchmark.ranking_prefilter_eval import evaluate
+    items = [{"vector": None, "bm25": 0.0, "llm_score": 90 if i == 1 else 10} for i in range(4)]
+    totals = evaluate([{"site": "example", "items": items}], [1, 2], vector_weight=0.7, num_results=10)
+    assert totals["example"][1] == {"recall": 0.0, "saved": 0.75, "queries": 1}
+    assert totals["example"][2]["recall"] == 1.0
+
+
+async def test_single_endpoint_scores_replace_the_embedding_lookup(monkeypatch):
+    from core.search_result import SearchResult
+
+    async def unexpected(*args, **kwargs):
+        raise AssertionError("retrieval scores should be used")
+
+    monkeypatch.setattr(prefilter, "get_embedding", unexpected)
+    items = [SearchResult(*row, score=score, endpoint="local")
+             for row, score in zip(make_items(["a", "b", "c"]), [0.2, 0.9, 0.5])]
+    scores = await prefilter.RankingPrefilter(make_handler()).score(items)
+    assert list(np.argsort(-scores)) == [1, 2, 0]
@@ -24,7 +24,8 @@ class EndpointTrackingClient(VectorDBClient):
         super().__init__(*args, **kwargs)
         self.last_endpoint_stats = {}
     
-    def _aggregate_results(self, endpoint_results: Dict[str, List[List[str]]]) -> List[List[str]]:
+    def _aggregate_results(self, endpoint_results: Dict[str, List[List[str]]],
+                           num_results: int = None) -> List[List[str]]:
         """Override to capture endpoint statistics before aggregation"""
         # Store endpoint statistics
         self.last_endpoint_stats = {}
@@ -33,7 +34,7 @@ class EndpointTrackingClient(VectorDBClient):
                 self.last_endpoint_stats[endpoint_name] = len(results)
         
         # Call parent method for actual aggregation
-        return super()._aggregate_results(endpoint_results)
+        return super()._aggregate_results(endpoint_results, num_results)
     
     async def search_with_stats(self, query: str, site: str, num_results: int = 50, **kwargs) -> Tuple[List[List[str]], Dict[str, int]]:
         """Search and return both results and endpoint statistics"""
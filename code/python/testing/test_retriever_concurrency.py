@@ -0,0 +1,249 @@
+import asyncio
+import os
+
+import core.retriever as retriever
+import core.site_index as site_index
+from core.config import CONFIG, RetrievalProviderConfig
+from core.site_index import SiteRoutingIndex
+from core.utils.latency import LatencyTracker
+
+
+class SlowBackend:
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+        self.sites = None
+        self.sites_error = None
+        self.get_sites_calls = 0
+
+    async def get_sites(self, **kwargs):
+        self.get_sites_calls += 1
+        if self.sites_error:
+            raise self.sites_error
+        return self.sites
+
+    async def search(self, query, site, num_results=50, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return [[f"https://example.com/{query}", "{}", query, site]]
+
+
+def install_backend(monkeypatch, max_concurrency=None):
+    backend = SlowBackend()
+    endpoints = {"standin": RetrievalProviderConfig(
+        database_path="unused", db_type="qdrant", enabled=True, max_concurrency=max_concurrency)}
+    monkeypatch.setattr(CONFIG, "retrieval_endpoints", endpoints)
+    monkeypatch.setattr(CONFIG, "write_endpoint", None)
+    monkeypatch.setitem(retriever._client_cache, "qdrant_standin", backend)
+    monkeypatch.setattr(retriever, "_endpoint_semaphores", {})
+    monkeypatch.setattr(retriever, "_vector_db_clients", {})
+    monkeypatch.setattr(retriever, "_site_index", SiteRoutingIndex())
+    monkeypatch.setattr(retriever, "_sites_refresh_tasks", {})
+    monkeypatch.setattr(retriever, "_sites_failed_at", {})
+    monkeypatch.setattr(CONFIG, "sites_cache_ttl", 60, raising=False)
+    monkeypatch.setattr(retriever, "_endpoint_latency", LatencyTracker())
+    return backend
+
+
+async def test_searches_on_shared_client_run_concurrently(monkeypatch):
+    backend = install_backend(monkeypatch)
+    client = retriever.VectorDBClient()
+    results = await asyncio.gather(
+        *(client.search(f"q{i}", "example", query_embedding=[0.0]) for i in range(6)))
+    assert backend.peak == 6
+    assert [r[0][0] for r in results] == [f"https://example.com/q{i}" for i in range(6)]
+
+
+async def test_max_concurrency_caps_in_flight_searches(monkeypatch):
+    backend = install_backend(monkeypatch, max_concurrency=2)
+    client = retriever.VectorDBClient()
+    await asyncio.gather(*(client.search(f"q{i}", "example", query_embedding=[0.0]) for i in range(6)))
+    assert backend.peak == 2
+
+
+async def test_registry_reuses_clients_and_site_discovery(monkeypatch):
+    backend = install_backend(monkeypatch)
+    backend.sites = ["example"]
+    client = retriever.get_vector_db_client()
+    assert retriever.get_vector_db_client() is client
+
+    await asyncio.gather(*(client.search(f"q{i}", "example", query_embedding=[0.0]) for i in range(4)))
+    await retriever.get_vector_db_client().search("again", "example", query_embedding=[0.0])
+    assert backend.get_sites_calls == 1
+
+
+async def test_sites_written_by_the_loader_are_picked_up_without_a_rescan(monkeypatch, tmp_path):
+    backend = install_backend(monkeypatch)
+    backend.sites = ["example"]
+    path = str(tmp_path / "site_index.json")
+    monkeypatch.setattr(retriever, "_site_index", SiteRoutingIndex(path))
+    monkeypatch.setattr(site_index, "RELOAD_INTERVAL", 0.0)
+    client = retriever.get_vector_db_client()
+    assert not await client._endpoint_has_site("standin", "other")
+
+    # The data loader, in another process, uploads documents for a new site
+    loader_index = SiteRoutingIndex(path)
+    loader_index.add_sites("standin", ["other"])
+    loader_index.save()
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000_000))
+
+    assert await client._endpoint_has_site("standin", "other")
+    assert backend.get_sites_calls == 1
+
+
+
+async def test_stale_site_list_is_reconciled_in_background(monkeypatch):
+    backend = install_backend(monkeypatch)
+    backend.sites = ["example"]
+    client = retriever.get_vector_db_client()
+    assert not await client._endpoint_has_site("standin", "replicated")
+
+    # Age the entry past the TTL: the stale list is still served while it refreshes
+    fetched_at, sites = retriever.get_site_index().get("standin")
+    retriever.get_site_index().set("standin", sites, fetched_at=fetched_at - 120)
+    backend.sites = ["example", "replicated"]
+    assert not await client._endpoint_has_site("standin", "replicated")
+    await retriever._sites_refresh_tasks["standin"]
+    assert await client._endpoint_has_site("standin", "replicated")
+    assert backend.get_sites_calls == 2
+
+
+async def test_failed_site_discovery_is_not_persisted(monkeypatch):
+    backend = install_backend(monkeypatch)
+    backend.sites_error = RuntimeError("backend unavailable")
+    client = retriever.get_vector_db_client()
+    # Unknown sites: the endpoint is queried, and the failure is not retried on every lookup
+    assert await client._endpoint_has_site("standin", "example")
+    assert await client._endpoint_has_site("standin", "example")
+    assert "standin" not in retriever.get_site_index() and backend.get_sites_calls == 1
+
+    # Once discovery succeeds the index is used, and a later failed refresh keeps it
+    backend.sites_error = None
+    backend.sites = ["example"]
+    retriever._sites_failed_at["standin"] -= 120
+    await client._get_endpoint_sites("standin")
+    await retriever._sites_refresh_tasks["standin"]
+    assert retriever.get_site_index().get("standin")[1] == {"example"}
+
+    backend.sites_error = RuntimeError("backend unavailable")
+    fetched_at, sites = retriever.get_site_index().get("standin")
+    retriever.get_site_index().set("standin", sites, fetched_at=fetched_at - 120)
+    await client._get_endpoint_sites("standin")
+    assert await retriever._sites_refresh_tasks["standin"] == {"example"}
+    assert retriever.get_site_index().get("standin")[1] == {"example"}
+    assert not await client._endpoint_has_site("standin", "other")
+
+def test_merge_interleaves_by_rank_and_merges_duplicates():
+    client = retriever.VectorDBClient.__new__(retriever.VectorDBClient)
+    client.enabled_endpoints = {}
+    merged = client._aggregate_results({
+        "a": [["u1", '{"name": "one"}', "one", "s"], ["u2", "{}", "two", "s"]],
+        "b": [["u3", "{}", "three", "s"], ["u1", '{"extra": 1}', "one", "s"]],
+    })
+    assert [r[0] for r in merged] == ["u1", "u3", "u2"]
+    assert '"extra"' in merged[0][1]
+    assert [r[0] for r in client._aggregate_results({"a": [["u1", "{}", "", "s"], ["u2", "{}", "", "s"]]}, 1)] == ["u1"]
+
+
+async def test_slow_endpoint_misses_deadline_without_blocking_others(monkeypatch):
+    fast = install_backend(monkeypatch)
+    async def never(query, site, num_results=50, **kwargs):
+        await asyncio.sleep(10)
+
+    add_endpoint(monkeypatch, "slow", never, timeout=0.05)
+
+    client = retriever.get_vector_db_client()
+    results = await asyncio.wait_for(client.search("q", "example", query_embedding=[0.0]), 1)
+    assert [r[0] for r in results] == ["https://example.com/q"]
+
+
+def add_endpoint(monkeypatch, name, search, **config):
+    backend = SlowBackend()
+    if search is not None:
+        backend.search = search
+    CONFIG.retrieval_endpoints[name] = RetrievalProviderConfig(
+        database_path="unused", db_type="qdrant", enabled=True, **config)
+    monkeypatch.setitem(retriever._client_cache, f"qdrant_{name}", backend)
+    return backend
+
+
+async def test_slow_primary_is_hedged_to_replica(monkeypatch):
+    install_backend(monkeypatch)
+    monkeypatch.setattr(retriever, "_DEFAULT_HEDGE_DELAY", 0.02)
+    calls = []
+
+    async def stuck(query, site, num_results=50, **kwargs):
+        calls.append("standin")
+        await asyncio.sleep(10)
+
+    async def replica(query, site, num_results=50, **kwargs):
+        calls.append("replica")
+        return [["https://example.com/from-replica", "{}", query, site]]
+
+    add_endpoint(monkeypatch, "replica", replica, replica_of="standin")
+    retriever._client_cache["qdrant_standin"].search = stuck
+
+    client = retriever.get_vector_db_client()
+    results = await asyncio.wait_for(client.search("q", "example", query_embedding=[0.0]), 1)
+    assert [r[0] for r in results] == ["https://example.com/from-replica"]
+    assert calls == ["standin", "replica"]
+    # With no estimate yet, the abandoned primary's elapsed time is not recorded
+    await asyncio.sleep(0)
+    assert retriever._endpoint_latency.get("standin") is None
+
+    # Once it has an estimate, a primary abandoned after running past it records a censored sample
+    retriever._endpoint_latency.record("standin", 0.001)
+    retriever._endpoint_latency.record("replica", 5.0)
+    await asyncio.wait_for(client.search("q", "example", query_embedding=[0.0]), 1)
+    await asyncio.sleep(0)
+    assert retriever._endpoint_latency.get("standin").count == 2
+
+
+async def test_cancelled_hedge_does_not_lower_the_replica_estimate(monkeypatch):
+    install_backend(monkeypatch)
+    monkeypatch.setattr(retriever, "_DEFAULT_HEDGE_DELAY", 0.02)
+
+    async def primary(query, site, num_results=50, **kwargs):
+        await asyncio.sleep(0.04)
+        return [["https://example.com/from-primary", "{}", query, site]]
+
+    async def stuck(query, site, num_results=50, **kwargs):
+        await asyncio.sleep(10)
+
+    add_endpoint(monkeypatch, "replica", stuck, replica_of="standin")
+    retriever._client_cache["qdrant_standin"].search = primary
+    retriever._endpoint_latency.record("replica", 0.5)
+
+    client = retriever.get_vector_db_client()
+    results = await asyncio.wait_for(client.search("q", "example", query_embedding=[0.0]), 1)
+    assert [r[0] for r in results] == ["https://example.com/from-primary"]
+    await asyncio.sleep(0)
+    assert retriever._endpoint_latency.get("replica").count == 1
+
+
+async def test_retrieval_deadline_returns_partial_results(monkeypatch):
+    install_backend(monkeypatch)
+    monkeypatch.setattr(CONFIG, "retrieval_deadline", 0.05, raising=False)
+
+    async def slow(query, site, num_results=50, **kwargs):
+        await asyncio.sleep(10)
+
+    add_endpoint(monkeypatch, "slow", slow)
+    messages = []
+
+    class Stream:
+        async def write_stream(self, message):
+            messages.append(message)
+
+    class Handler:
+        http_handler = Stream()
+        query_id = "abc"
+
+    client = retriever.get_vector_db_client()
+    results = await asyncio.wait_for(
+        client.search("q", "example", query_embedding=[0.0], handler=Handler()), 1)
+    assert [r[0] for r in results] == ["https://example.com/q"]
+    assert messages[0]["message_type"] == "retrieval_partial"
+    assert messages[0]["missing_endpoints"] == ["slow"]
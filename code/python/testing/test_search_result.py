@@ -0,0 +1,33 @@
+import copy
+import json
+import pickle
+
+from core.retriever import VectorDBClient
+from core.search_result import SearchResult
+
+
+def test_search_result_is_a_legacy_row():
+    result = SearchResult("https://example.com/a", '{"name": "A"}', "A", "example", score=0.87, endpoint="qdrant_local")
+    url, json_str, name, site = result
+    assert (url, name, site) == ("https://example.com/a", "A", "example")
+    assert result == ["https://example.com/a", '{"name": "A"}', "A", "example"]
+    assert json.dumps(result) == json.dumps(list(result))
+    assert result.url == url and result.json == json_str and result.score == 0.87
+
+    for clone in (pickle.loads(pickle.dumps(result)), copy.deepcopy(result)):
+        assert clone == result and clone.score == 0.87 and clone.endpoint == "qdrant_local"
+
+
+def test_aggregation_keeps_score_and_endpoint_of_best_copy():
+    client = VectorDBClient.__new__(VectorDBClient)
+    results = client._aggregate_results({
+        "a": [SearchResult("u1", '{"x": 1}', "one", "s", score=0.9),
+              SearchResult("u2", '{"y": 1}', "two", "s", score=0.5)],
+        # Plain rows from backends that report no score still merge
+        "b": [["u2", '{"y": 2}', "two", "s"], ["u3", "{}", "three", "s"]],
+    })
+    assert [r.url for r in results] == ["u1", "u2", "u3"]
+    assert (results[0].score, results[0].endpoint) == (0.9, "a")
+    # In the interleave u2 comes first from endpoint b, ahead of its second place at endpoint a
+    assert (results[1].score, results[1].endpoint) == (None, "b")
+    assert json.loads(results[1].json) == {"y": [1, 2]}
@@ -0,0 +1,63 @@
+import os
+
+import core.site_index as site_index
+from core.site_index import SiteRoutingIndex
+
+
+def test_index_persists_and_reloads(tmp_path):
+    path = str(tmp_path / "site_index.json")
+    index = SiteRoutingIndex(path)
+    index.set("qdrant_local", ["seriouseats", "zenti.com"], fetched_at=100.0)
+    index.set("shopify", None, fetched_at=100.0)
+    index.save()
+
+    reloaded = SiteRoutingIndex(path)
+    assert reloaded.get("qdrant_local") == (100.0, frozenset({"seriouseats", "zenti.com"}))
+    assert reloaded.get("shopify") == (100.0, None)
+
+
+def test_uploads_and_deletes_update_known_endpoints_only():
+    index = SiteRoutingIndex()
+    index.set("qdrant_local", ["seriouseats"], fetched_at=100.0)
+
+    assert index.add_sites("qdrant_local", ["seriouseats", "zenti.com", None])
+    assert index.get("qdrant_local") == (100.0, frozenset({"seriouseats", "zenti.com"}))
+    assert not index.add_sites("qdrant_local", ["zenti.com"])
+
+    # Unindexed endpoints still need a full listing from the backend first
+    assert not index.add_sites("elasticsearch", ["zenti.com"])
+    assert "elasticsearch" not in index
+
+    assert index.remove_site("qdrant_local", "seriouseats")
+    assert index.get("qdrant_local")[1] == frozenset({"zenti.com"})
+    assert not index.remove_site("qdrant_local", "seriouseats")
+
+
+def test_corrupt_index_file_is_ignored(tmp_path):
+    path = tmp_path / "site_index.json"
+    path.write_text("{not json")
+    index = SiteRoutingIndex(str(path))
+    assert index.get("qdrant_local") is None
+
+
+def test_reload_picks_up_writes_from_other_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(site_index, "RELOAD_INTERVAL", 0.0)
+    path = str(tmp_path / "site_index.json")
+    server = SiteRoutingIndex(path)
+    server.set("qdrant_local", ["seriouseats"], fetched_at=100.0)
+    server.save()
+    assert not server.reload_if_changed()
+
+    loader = SiteRoutingIndex(path)
+    loader.add_sites("qdrant_local", ["zenti.com"])
+    loader.save()
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000_000))
+    assert server.reload_if_changed()
+    assert server.get("qdrant_local")[1] == frozenset({"seriouseats", "zenti.com"})
+
+    # A broken write keeps the entries already loaded
+    with open(path, "w") as f:
+        f.write("{not json")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 2_000_000_000))
+    server.reload_if_changed()
+    assert server.get("qdrant_local")[1] == frozenset({"seriouseats", "zenti.com"})
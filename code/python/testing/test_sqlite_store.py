@@ -0,0 +1,25 @@
+import time
+
+from core.sqlite_store import SQLiteLRUStore
+
+
+def test_least_recently_accessed_rows_are_pruned(tmp_path):
+    store = SQLiteLRUStore(str(tmp_path / "store.sqlite"), "items", {"value": "TEXT NOT NULL"}, max_entries=3)
+    for i in range(3):
+        store.put_many({f"k{i}": (str(i),)})
+        time.sleep(0.002)
+    assert store.get_many(["k0", "missing"]) == {"k0": ("0",)}
+    store.put_many({"k3": ("3",)})
+    # k1 was the least recently accessed
+    assert set(store.get_many(["k0", "k1", "k2", "k3"])) == {"k0", "k2", "k3"}
+    assert store.count() == 3 and store.evictions == 1
+    store.close()
+
+
+def test_expired_rows_are_not_returned(tmp_path):
+    path = str(tmp_path / "store.sqlite")
+    store = SQLiteLRUStore(path, "items", {"value": "TEXT NOT NULL"}, max_entries=10, expiring=True)
+    store.put_many({"old": ("a",)}, expires_at=time.time() - 1)
+    store.put_many({"new": ("b",)}, expires_at=None)
+    assert store.get_many(["old", "new"]) == {"new": ("b", None)}
+    store.close()
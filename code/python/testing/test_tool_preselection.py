@@ -0,0 +1,96 @@
+import core.router as router
+import core.tool_index as tool_index
+from core.config import CONFIG, ToolPreselectionConfig
+from core.router import Tool, ToolSelector
+from core.tool_index import ToolEmbeddingIndex, tool_description
+
+VOCABULARY = ["find", "recipes", "ingredients", "compare", "versus", "substitute"]
+
+
+def embed(text):
+    words = text.lower().replace("?", " ").split()
+    return [float(words.count(word)) + 0.01 for word in VOCABULARY]
+
+
+def make_tool(name, examples, schema_type="Item"):
+    prompt = f"""The user has the following query: {{request.query}}.
+        The {name} tool is best for {" ".join(examples)}.
+        Assign a score from 0 to 100 for whether the {name} tool is appropriate."""
+    return Tool(name=name, path="", method="builtin", arguments={}, examples=examples, schema_type=schema_type,
+                prompt=prompt, return_structure={"score": "integer"})
+
+
+TOOLS = [make_tool("search", ["find recipes", "find find recipes"]),
+         make_tool("details", ["ingredients"]),
+         make_tool("compare", ["compare versus"]),
+         make_tool("substitutions", ["substitute ingredients"])]
+
+
+def build_index():
+    return ToolEmbeddingIndex(TOOLS, [embed(text) for tool in TOOLS for text in tool_index.tool_texts(tool)])
+
+
+def test_description_drops_variables_and_scoring_instructions():
+    description = tool_description(TOOLS[2])
+    assert description == "compare: The compare tool is best for compare versus."
+
+
+def test_search_wins_by_margin_or_shortlist_keeps_search():
+    index = build_index()
+    tools, skip_llm = index.shortlist(embed("find recipes"), TOOLS, top_k=2, search_margin=0.1)
+    assert skip_llm and [t.name for t in tools] == ["search"]
+
+    tools, skip_llm = index.shortlist(embed("substitute ingredients"), TOOLS, top_k=2, search_margin=0.1)
+    assert not skip_llm and [t.name for t in tools] == ["substitutions", "details", "search"]
+
+    # A tool the index has never seen means the index is stale: score everything
+    unknown = make_tool("unknown", ["x"], schema_type="Recipe")
+    assert index.shortlist(embed("find"), TOOLS + [unknown], 2, 0.1) == (TOOLS + [unknown], False)
+
+
+async def test_tools_are_embedded_once_and_failures_fall_back(monkeypatch):
+    batches = []
+
+    async def fake_batch(texts):
+        batches.append(len(texts))
+        return [embed(text) for text in texts]
+
+    async def fake_embedding(text, query_params=None):
+        return embed(text)
+
+    monkeypatch.setattr(tool_index, "batch_get_embeddings", fake_batch)
+    monkeypatch.setattr(tool_index, "get_embedding", fake_embedding)
+    monkeypatch.setattr(tool_index, "_index", None)
+    monkeypatch.setattr(tool_index, "_index_lock", None)
+
+    for query in ["find recipes", "compare versus"]:
+        await tool_index.preselect_tools(query, TOOLS, TOOLS, 2, 0.1)
+    assert batches == [sum(len(tool_index.tool_texts(t)) for t in TOOLS)]
+
+    async def failing_embedding(text, query_params=None):
+        raise RuntimeError("embedding endpoint down")
+
+    monkeypatch.setattr(tool_index, "get_embedding", failing_embedding)
+    assert await tool_index.preselect_tools("find", TOOLS, TOOLS, 2, 0.1) == (TOOLS, False)
+
+
+async def test_selector_skips_llm_when_search_is_preselected(monkeypatch, make_handler):
+    async def fake_preselect(query, tools, all_tools, top_k, search_margin, query_params=None):
+        return [tools[0]], True
+
+    async def no_llm(*args, **kwargs):
+        raise AssertionError("LLM scoring should be skipped")
+
+    monkeypatch.setattr(router, "preselect_tools", fake_preselect)
+    monkeypatch.setattr(router, "ask_llm", no_llm)
+    monkeypatch.setattr(CONFIG.nlweb, "tool_preselection", ToolPreselectionConfig(enabled=True))
+    monkeypatch.setattr(CONFIG.nlweb, "tool_selection_enabled", True)
+    monkeypatch.setattr(ToolSelector, "get_tools_by_type", lambda self, schema_type: TOOLS)
+    monkeypatch.setattr(ToolSelector, "_type_tools_cache", {"Item": TOOLS})
+
+    handler = make_handler("find recipes")
+    await ToolSelector(handler).do()
+
+    top = handler.tool_routing_results[0]
+    assert top["tool"].name == "search" and top["result"]["search_query"] == "find recipes"
+    assert handler.messages[0]["selected_tool"] == "search" and not handler.abort_fast_track_event.is_set()
@@ -0,0 +1,72 @@
+import core.router as router
+from core.config import CONFIG, ToolPreselectionConfig
+from core.router import Tool, ToolSelector
+
+
+def make_tool(name, params):
+    prompt = f"""
+        The user has the following query: {{request.query}}.
+        The {name} tool is for {name} queries.
+        Assign a score from 0 to 100 for whether the {name} tool is appropriate."""
+    return Tool(name=name, path="", method="builtin", arguments={}, examples=[], schema_type="Item",
+                prompt=prompt, return_structure={"score": "integer between 0 and 100", **params})
+
+
+TOOLS = [make_tool("search", {"search_query": "the search query"}),
+         make_tool("details", {"item_name": "the item"}),
+         make_tool("compare", {"item1": "first item", "item2": "second item"})]
+
+
+QUERY = "ingredients of lasagna"
+
+
+def setup(monkeypatch, mode, response):
+    calls = []
+
+    async def fake_ask_llm(prompt, schema, **kwargs):
+        calls.append((prompt, schema, kwargs))
+        return response
+
+    monkeypatch.setattr(router, "ask_llm", fake_ask_llm)
+    monkeypatch.setattr(CONFIG.nlweb, "tool_selection_enabled", True)
+    monkeypatch.setattr(CONFIG.nlweb, "tool_selection_mode", mode)
+    monkeypatch.setattr(CONFIG.nlweb, "tool_preselection", ToolPreselectionConfig(enabled=False))
+    monkeypatch.setattr(ToolSelector, "_type_tools_cache", {"Item": TOOLS})
+    return calls
+
+
+async def test_single_call_scores_all_tools_at_once(monkeypatch, make_handler):
+    response = {"search": {"score": 40, "search_query": "lasagna"},
+                "details": {"score": "85", "item_name": "lasagna"}}
+    calls = setup(monkeypatch, "single_call", response)
+    handler = make_handler(QUERY)
+    await ToolSelector(handler).do()
+
+    assert len(calls) == 1
+    prompt, schema, kwargs = calls[0]
+    assert prompt.count(QUERY) == 1
+    assert 'Tool "compare":\nThe compare tool is for compare queries.' in prompt
+    assert schema["compare"] == TOOLS[2].return_structure and list(schema) == ["search", "details", "compare"]
+    assert kwargs["prompt_name"] == ToolSelector.SINGLE_CALL_PROMPT_NAME
+
+    # Scores are coerced to int, and tools missing from the answer score 0
+    assert [(r["tool"].name, r["score"]) for r in handler.tool_routing_results] == [("details", 85)]
+    assert handler.tool_routing_results[0]["result"]["item_name"] == "lasagna"
+    assert handler.messages[0]["selected_tool"] == "details" and handler.abort_fast_track_event.is_set()
+
+
+async def test_per_tool_mode_makes_one_call_per_tool(monkeypatch, make_handler):
+    calls = setup(monkeypatch, "per_tool", {"score": 50})
+    handler = make_handler(QUERY)
+    await ToolSelector(handler).do()
+    assert len(calls) == len(TOOLS)
+    # Nothing reaches the threshold, so search is the fallback
+    assert [r["tool"].name for r in handler.tool_routing_results] == ["search"]
+
+
+async def test_failed_single_call_falls_back_to_search(monkeypatch, make_handler):
+    setup(monkeypatch, "single_call", {})
+    handler = make_handler(QUERY)
+    await ToolSelector(handler).do()
+    assert handler.tool_routing_results[0]["tool"].name == "search"
+    assert handler.messages[0]["selected_tool"] == "search" and handler.messages[0]["score"] == 0
@@ -128,11 +128,14 @@ class AioHTTPServer:
     
     async def _on_startup(self, app: web.Application):
         """Initialize resources on startup"""
-        import aiohttp
+        # Shared outbound connection pool, also exposed as the app's client session
+        from core.http_pool import get_aiohttp_session, get_http_client
+        app['client_session'] = get_aiohttp_session()
+        get_http_client()
         
-        # Create shared client session
-        timeout = aiohttp.ClientTimeout(total=30)
-        app['client_session'] = aiohttp.ClientSession(timeout=timeout)
+        # Discover endpoint sites in the background so first queries skip it
+        from core.retriever import warm_site_cache
+        app['site_cache_warmup'] = asyncio.create_task(warm_site_cache())
         
         logger.info(f"Server starting on {self.config['server']['host']}:{self.config['port']}")
         logger.info(f"Mode: {self.config['mode']}")
@@ -140,8 +143,9 @@ class AioHTTPServer:
     
     async def _on_cleanup(self, app: web.Application):
         """Cleanup resources"""
-        if app['client_session']:
-            await app['client_session'].close()
+        from core.http_pool import close_http_pool
+        await close_http_pool()
+        app['client_session'] = None
     
     async def _on_shutdown(self, app: web.Application):
         """Graceful shutdown"""
@@ -14,6 +14,23 @@ async def health_check(request):
         "host": request.app['config']['server']['host']
     })
 
+async def metrics_handler(request):
+    """Runtime performance counters (caches, pools, queues)"""
+    from core.llm import get_llm_cache_stats, get_llm_scheduler_stats, get_llm_latency_stats
+    from core.embedding import get_embedding_cache_stats
+    from core.retriever import get_retrieval_latency_stats
+    from core.http_pool import get_http_pool_stats
+    from core.prompt_cache import get_prompt_cache_stats
+    return web.json_response({
+        "llm_cache": get_llm_cache_stats(),
+        "llm_scheduler": get_llm_scheduler_stats(),
+        "llm_latency": get_llm_latency_stats(),
+        "prompt_cache": get_prompt_cache_stats(),
+        "embedding_cache": get_embedding_cache_stats(),
+        "retrieval_latency": get_retrieval_latency_stats(),
+        "http_pool": get_http_pool_stats()
+    })
+
 async def root_handler(request):
     """Root endpoint that redirects to the chat interface"""
     raise web.HTTPFound('/static/zenti-final.html')
@@ -21,4 +38,5 @@ async def root_handler(request):
 def setup_health_routes(app: web.Application):
     """Setup health check routes"""
     app.router.add_get('/health', health_check)
+    app.router.add_get('/health/metrics', metrics_handler)
     app.router.add_get('/', root_handler)
\ No newline at end of file